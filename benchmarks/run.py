@@ -0,0 +1,317 @@
+"""
+Benchmarks for the hot paths of django-tailwind-cli.
+
+The benchmarks run offline. A small Python script stands in for the Tailwind CSS CLI, so the
+numbers measure the overhead of the management commands and not the CLI itself. The watch
+benchmark measures the latency of a rebuild after a template was saved.
+
+Usage:
+
+    python benchmarks/run.py [--sizes 1000 10000 100000] [--repeat 5] [--output results.json]
+
+The results are written as JSON, so they can be compared across commits.
+"""
+
+import argparse
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from functools import partial
+from pathlib import Path
+from typing import Any, Callable
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "src"))
+
+STUB_CLI = """#!{python}
+import sys
+from pathlib import Path
+
+args = sys.argv[1:]
+output = Path(args[args.index("--output") + 1])
+output.parent.mkdir(parents=True, exist_ok=True)
+output.write_text(".p-4{{padding:1rem}}")
+"""
+
+TEMPLATE = """{{% extends "base.html" %}}
+{{% block content %}}
+<div class="flex items-center p-{n} text-gray-{n}00">
+    <span class="font-bold">{{{{ title }}}}</span>
+</div>
+{{% endblock %}}
+"""
+
+FILES_PER_DIR = 50
+
+WATCH_TEMPLATES = 1000
+WATCH_DEBOUNCE = 0.05
+WATCH_TIMEOUT = 30.0
+
+# Runs `tailwind watch` in a fresh interpreter, like `manage.py tailwind watch` would.
+WATCH_SCRIPT = """
+import sys
+
+import django
+from django.conf import settings
+
+project_dir, template_dir, stub_cli, debounce = sys.argv[1:]
+settings.configure(
+    BASE_DIR=project_dir,
+    INSTALLED_APPS=["django.contrib.staticfiles", "django_tailwind_cli"],
+    TEMPLATES=[
+        {"BACKEND": "django.template.backends.django.DjangoTemplates", "DIRS": [template_dir]}
+    ],
+    STATIC_URL="/static/",
+    STATICFILES_DIRS=[project_dir + "/assets"],
+    TAILWIND_CLI_PATH=stub_cli,
+    TAILWIND_CLI_AUTOMATIC_DOWNLOAD=False,
+    TAILWIND_CLI_CACHE_DIR=project_dir + "/.tailwind-cli-watch",
+    TAILWIND_CLI_WATCH_DEBOUNCE=float(debounce),
+)
+django.setup()
+
+from django.core.management import call_command
+
+call_command("tailwind", "watch")
+"""
+
+
+def setup_django(project_dir: Path) -> None:
+    import django
+    from django.conf import settings
+
+    stub_cli = project_dir / "tailwindcss"
+    stub_cli.write_text(STUB_CLI.format(python=sys.executable))
+    stub_cli.chmod(0o755)
+
+    settings.configure(
+        BASE_DIR=project_dir,
+        DEBUG=False,
+        INSTALLED_APPS=["django.contrib.staticfiles", "django_tailwind_cli"],
+        TEMPLATES=[
+            {
+                "BACKEND": "django.template.backends.django.DjangoTemplates",
+                "DIRS": [],
+                "APP_DIRS": True,
+            }
+        ],
+        STATIC_URL="/static/",
+        STATICFILES_DIRS=[project_dir / "assets"],
+        TAILWIND_CLI_PATH=str(stub_cli),
+        TAILWIND_CLI_AUTOMATIC_DOWNLOAD=False,
+    )
+    django.setup()
+
+
+def create_templates(template_dir: Path, count: int) -> None:
+    for i in range(count):
+        path = template_dir / f"app{i // (FILES_PER_DIR * 20)}" / f"d{i // FILES_PER_DIR}"
+        path.mkdir(parents=True, exist_ok=True)
+        (path / f"t{i}.html").write_text(TEMPLATE.format(n=i % 9 + 1))
+
+
+def measure(func: Callable[[], Any], repeat: int) -> dict[str, float]:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return {
+        "min": min(timings),
+        "median": statistics.median(timings),
+        "max": max(timings),
+    }
+
+
+def call_tailwind(*args: str) -> None:
+    from django.core.management import call_command
+
+    call_command("tailwind", *args, stdout=io.StringIO())
+
+
+def list_templates_cold(cache_dir: Path) -> None:
+    from django_tailwind_cli import template_index
+
+    template_index._template_index = None
+    (cache_dir / "templates.json").unlink(missing_ok=True)
+    call_tailwind("list_templates")
+
+
+def bench_templates(project_dir: Path, sizes: list[int], repeat: int) -> dict[str, Any]:
+    from django.test import override_settings
+
+    results: dict[str, Any] = {}
+    for size in sizes:
+        template_dir = project_dir / f"templates-{size}"
+        create_templates(template_dir, size)
+        templates = [
+            {
+                "BACKEND": "django.template.backends.django.DjangoTemplates",
+                "DIRS": [template_dir],
+                "APP_DIRS": True,
+            }
+        ]
+        cache_dir = project_dir / f".tailwind-cli-{size}"
+        with override_settings(TEMPLATES=templates, TAILWIND_CLI_CACHE_DIR=cache_dir):
+            results[str(size)] = {
+                "list_templates_cold": measure(partial(list_templates_cold, cache_dir), repeat),
+                "list_templates_warm": measure(lambda: call_tailwind("list_templates"), repeat),
+                "build_forced": measure(lambda: call_tailwind("build", "--force"), repeat),
+                "build_up_to_date": measure(lambda: call_tailwind("build"), repeat),
+            }
+    return results
+
+
+def bench_init(repeat: int) -> dict[str, Any]:
+    code = (
+        "import django; from django.conf import settings; "
+        "settings.configure(INSTALLED_APPS=['django_tailwind_cli'], STATICFILES_DIRS=['.']); "
+        "django.setup(); from django.core.management import call_command; "
+        "call_command('tailwind', '--help')"
+    )
+
+    def help_in_fresh_interpreter() -> None:
+        subprocess.run(  # noqa: S603
+            [sys.executable, "-c", code],
+            check=True,
+            stdout=subprocess.DEVNULL,
+            env={**os.environ, "PYTHONPATH": str(ROOT / "src")},
+        )
+
+    return {
+        "help_cold_start": measure(help_in_fresh_interpreter, repeat),
+        "download_cli_existing": measure(lambda: call_tailwind("download_cli"), repeat),
+    }
+
+
+def _mtime_ns(path: Path) -> int:
+    """Get the modification time of a file, once it has been written completely."""
+    try:
+        stat = path.stat()
+    except OSError:
+        return 0
+    # The stub CLI truncates the file before writing it.
+    return stat.st_mtime_ns if stat.st_size else 0
+
+
+def _wait_for_rewrite(path: Path, mtime_ns: int) -> None:
+    deadline = time.monotonic() + WATCH_TIMEOUT
+    while _mtime_ns(path) in (mtime_ns, 0):
+        if time.monotonic() > deadline:
+            msg = f"{path} was not rewritten within {WATCH_TIMEOUT:g}s."
+            raise TimeoutError(msg)
+        time.sleep(0.001)
+
+
+def bench_watch(project_dir: Path, repeat: int) -> dict[str, Any]:
+    """Measure the time from saving a template until `tailwind watch` rewrote the stylesheet.
+
+    The debounced watcher of the management commands is used, as the stub CLI can't watch itself.
+    """
+    from django_tailwind_cli import utils
+
+    template_dir = project_dir / "templates-watch"
+    create_templates(template_dir, WATCH_TEMPLATES)
+    template = next(template_dir.rglob("*.html"))
+    dist_css = utils.get_full_dist_css_path()
+    mtime_ns = _mtime_ns(dist_css)
+
+    process = subprocess.Popen(  # noqa: S603
+        [
+            sys.executable,
+            "-c",
+            WATCH_SCRIPT,
+            str(project_dir),
+            str(template_dir),
+            str(project_dir / "tailwindcss"),
+            str(WATCH_DEBOUNCE),
+        ],
+        stdout=subprocess.DEVNULL,
+        env={**os.environ, "PYTHONPATH": str(ROOT / "src")},
+    )
+    try:
+        # The watcher is set up before the initial build.
+        _wait_for_rewrite(dist_css, mtime_ns)
+        counter = iter(range(sys.maxsize))
+
+        def save_template() -> None:
+            mtime_ns = _mtime_ns(dist_css)
+            template.write_text(TEMPLATE.format(n=next(counter)))
+            _wait_for_rewrite(dist_css, mtime_ns)
+
+        timings = measure(save_template, repeat)
+    finally:
+        process.terminate()
+        process.wait()
+    return {"templates": WATCH_TEMPLATES, "debounce": WATCH_DEBOUNCE, "rebuild": timings}
+
+
+def bench_template_tag(renders: int, repeat: int) -> dict[str, Any]:
+    from django.template import engines
+
+    template = engines["django"].from_string("{% load tailwind_cli %}{% tailwind_css %}")
+
+    def render() -> None:
+        for _ in range(renders):
+            template.render({})
+
+    timings = measure(render, repeat)
+    return {
+        "renders": renders,
+        "per_render_us": {key: value / renders * 1_000_000 for key, value in timings.items()},
+    }
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.run(  # noqa: S603
+            ["git", "rev-parse", "HEAD"],  # noqa: S607
+            capture_output=True,
+            check=True,
+            cwd=ROOT,
+            text=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--renders", type=int, default=10000)
+    parser.add_argument("--output", type=Path, help="Write the results to this file.")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        project_dir = Path(tmp)
+        setup_django(project_dir)
+
+        import django
+
+        results = {
+            "revision": git_revision(),
+            "python": platform.python_version(),
+            "django": django.get_version(),
+            "platform": platform.platform(),
+            "init": bench_init(args.repeat),
+            "templates": bench_templates(project_dir, args.sizes, args.repeat),
+            "watch": bench_watch(project_dir, args.repeat),
+            "template_tag": bench_template_tag(args.renders, args.repeat),
+        }
+
+    output = json.dumps(results, indent=2)
+    if args.output:
+        args.output.write_text(output + "\n")
+    else:
+        print(output)  # noqa: T201
+
+
+if __name__ == "__main__":
+    main()
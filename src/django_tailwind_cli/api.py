@@ -0,0 +1,421 @@
+"""
+Python API of the production build.
+
+`build` and `abuild` do what `tailwind build` does, so that deployment scripts, test fixtures and
+asyncio applications can build the stylesheets without going through `call_command`:
+
+    from django_tailwind_cli import api
+
+    stats = api.build()
+    stats = await api.abuild(timeout=60, on_output=lambda entry, line: print(entry, line))
+
+The CLI runs with `asyncio.create_subprocess_exec`, and its output is passed on line by line. The
+work done in Python, e.g. hashing the templates for the fingerprint or compressing the stylesheets,
+runs in a thread, so it doesn't block the event loop. If the build is cancelled or times out, the
+CLI processes are terminated and killed, if they don't exit in time.
+"""
+
+import asyncio
+import os
+import subprocess
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import AbstractContextManager
+from pathlib import Path
+from typing import Callable, NamedTuple, Optional
+
+from django_tailwind_cli import compression, critical, manifest, metrics, signals, utils
+from django_tailwind_cli.conf import settings
+from django_tailwind_cli.template_index import get_template_index
+
+# Each build runs a CLI process, which uses a core on its own.
+MAX_PARALLEL_BUILDS = os.cpu_count() or 1
+STOP_TIMEOUT = 5.0
+
+DEFAULT_CONFIG_FILE = "tailwind.config.js"
+
+# Called with the name of the entry and a line of the output of the CLI.
+OutputCallback = Callable[[str, str], None]
+
+
+class BuildError(subprocess.CalledProcessError):
+    """Raised, if the CLI exits with an error. `output` holds the output of the CLI."""
+
+
+class CliNotFoundError(Exception):
+    """Raised, if the CLI doesn't exist and can't be downloaded."""
+
+
+def get_cli_cmd(entry: utils.Entry, *args: str) -> list[str]:
+    """Get the command line running the CLI for an entry."""
+    cli_cmd = [
+        str(utils.get_full_cli_path()),
+        "--output",
+        str(utils.get_full_dist_css_path(entry)),
+        *args,
+    ]
+    if entry.src_css is not None:
+        cli_cmd.extend(
+            [
+                "--input",
+                str(utils.get_full_src_css_path(entry)),
+            ]
+        )
+    if utils.uses_generated_config():
+        cli_cmd.extend(["--config", str(utils.write_generated_config_file(entry))])
+    elif utils.get_full_config_file_path(entry) != Path(settings.BASE_DIR) / DEFAULT_CONFIG_FILE:
+        # On its own the CLI only finds tailwind.config.js in the working directory.
+        cli_cmd.extend(["--config", str(utils.get_full_config_file_path(entry))])
+    return cli_cmd
+
+
+def _ignore_message(message: str, level: str) -> None:
+    pass
+
+
+def create_config_files(on_message: utils.MessageCallback = _ignore_message) -> None:
+    """Create the missing config files of the entries from the default config."""
+    for tailwind_config_file in dict.fromkeys(
+        utils.get_full_config_file_path(entry) for entry in utils.get_entries()
+    ):
+        if not tailwind_config_file.exists():
+            on_message("Tailwind CSS config not found.", utils.MESSAGE_ERROR)
+            tailwind_config_file.write_text(DEFAULT_TAILWIND_CONFIG)
+            on_message(
+                f"Created Tailwind CSS config at '{tailwind_config_file}'", utils.MESSAGE_SUCCESS
+            )
+
+
+def require_cli(on_message: utils.MessageCallback = _ignore_message) -> None:
+    """Make sure that the CLI is installed and the config files exist."""
+    cli_path = utils.get_full_cli_path()
+    if settings.TAILWIND_CLI_AUTOMATIC_DOWNLOAD:
+        if cli_path.exists():
+            on_message(
+                f"Tailwind CSS CLI already exists at '{cli_path}'{utils.get_src_repo_note()}",
+                utils.MESSAGE_SUCCESS,
+            )
+        else:
+            # The download pulls in the network stack, so it's only imported when it's needed.
+            from django_tailwind_cli import download
+
+            try:
+                download.install_cli(on_message)
+            except download.DownloadError as e:
+                raise CliNotFoundError(str(e)) from e
+    create_config_files(on_message)
+
+    if not cli_path.exists():
+        raise CliNotFoundError("Tailwind CSS CLI not found.")
+
+
+def postprocess(entry: utils.Entry, on_message: utils.MessageCallback = _ignore_message) -> None:
+    """Write the content hashed and the precompressed copies of a compiled stylesheet."""
+    dist_css = utils.get_full_dist_css_path(entry)
+    if not dist_css.exists():
+        return
+
+    stylesheets = [dist_css]
+    if settings.TAILWIND_CLI_HASHED_FILENAMES:
+        hashed_css = manifest.write_hashed_css(entry)
+        stylesheets.append(hashed_css)
+        on_message(f"Stored content hashed stylesheet '{hashed_css}'.", utils.MESSAGE_SUCCESS)
+
+    if settings.TAILWIND_CLI_PRECOMPRESS:
+        for compressed_file in compression.compress_files(stylesheets):
+            on_message(
+                f"Stored precompressed stylesheet '{compressed_file}'.", utils.MESSAGE_SUCCESS
+            )
+
+
+async def run_cli(
+    cmd: list[str],
+    *,
+    name: str = utils.DEFAULT_ENTRY_NAME,
+    on_output: Optional[OutputCallback] = None,
+) -> None:
+    """Run a command line of the CLI and pass each line of its output to `on_output`.
+
+    Raises BuildError, if the CLI exits with an error. If the task is cancelled, the CLI is
+    terminated and killed, if it doesn't exit within STOP_TIMEOUT seconds.
+    """
+    process = await asyncio.create_subprocess_exec(
+        *cmd,
+        cwd=settings.BASE_DIR,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.STDOUT,
+    )
+    assert process.stdout is not None
+    lines = []
+    try:
+        while line := await process.stdout.readline():
+            text = line.decode(errors="replace").rstrip()
+            lines.append(text)
+            if on_output is not None:
+                on_output(name, text)
+        returncode = await process.wait()
+    except BaseException:
+        if process.returncode is None:
+            process.terminate()
+            try:
+                await asyncio.wait_for(process.wait(), STOP_TIMEOUT)
+            except asyncio.TimeoutError:
+                process.kill()
+                await process.wait()
+        raise
+    if returncode:
+        raise BuildError(returncode, cmd, output="\n".join(lines))
+
+
+class _Job(NamedTuple):
+    """The command lines still to run for an entry after the checks of the build."""
+
+    entry: utils.Entry
+    status: str
+    fingerprint: str
+    cmds: list[list[str]]
+    critical: bool
+
+
+class _BuildCancelledError(Exception):
+    """Raised in the thread of a build, that was cancelled or timed out meanwhile."""
+
+
+class _Build:
+    """The phases of a build running in a thread, reported to `on_message`.
+
+    The thread can't be interrupted, so it checks before each phase, whether the build was
+    cancelled, and stops without writing anything further.
+    """
+
+    def __init__(self, *, force: bool, on_message: utils.MessageCallback) -> None:
+        self.force = force
+        self.on_message = on_message
+        self.timings = metrics.Timings()
+        self.jobs: list[_Job] = []
+        self.statuses: dict[utils.Entry, str] = {}
+        self.cancelled = threading.Event()
+
+    def _check_cancelled(self) -> None:
+        if self.cancelled.is_set():
+            raise _BuildCancelledError
+
+    def _phase(self, name: str) -> AbstractContextManager[None]:
+        self._check_cancelled()
+        return self.timings.phase(name)
+
+    def _success(self, message: str) -> None:
+        self.on_message(message, utils.MESSAGE_SUCCESS)
+
+    def prepare(self) -> None:
+        """Check which entries need to be built and restore the others."""
+        # The client of the build daemon pulls in multiprocessing.
+        from django_tailwind_cli import daemon
+
+        with self._phase("validate"):
+            utils.validate_settings()
+        with self._phase("resolve_cli"):
+            require_cli(self.on_message)
+
+        # The templates are shared by all entries, so they are only hashed once.
+        with self._phase("templates"):
+            template_files = get_template_index().entries()
+        if settings.TAILWIND_CLI_EXTRACT_CLASSES:
+            from django_tailwind_cli import candidates
+
+            with self._phase("extract"):
+                candidates.write_candidates_file(template_files)
+
+        for entry in utils.get_entries():
+            with self._phase("fingerprint"):
+                build_cmd = get_cli_cmd(entry, "--minify")
+                critical_cmd = (
+                    critical.get_build_cmd(build_cmd, entry)
+                    if settings.TAILWIND_CLI_CRITICAL_TEMPLATES
+                    else None
+                )
+                critical_cmds = [critical_cmd] if critical_cmd is not None else []
+                fingerprint = utils.get_build_fingerprint(build_cmd, entry, template_files)
+                dist_css = utils.get_full_dist_css_path(entry)
+                up_to_date = not self.force and utils.is_build_up_to_date(fingerprint, entry)
+
+            if up_to_date:
+                self.statuses[entry] = metrics.UP_TO_DATE
+                self._success(f"Production stylesheet '{dist_css}' is up to date.")
+                continue
+
+            with self._phase("cache"):
+                restored = not self.force and utils.restore_from_build_cache(fingerprint, entry)
+            if restored:
+                self.jobs.append(
+                    _Job(entry, metrics.RESTORED, fingerprint, critical_cmds, bool(critical_cmds))
+                )
+                continue
+
+            # The daemon doesn't build the critical css, so it only helps without it.
+            if not self.force and critical_cmd is None and daemon.is_running():
+                with self._phase("daemon"):
+                    css = daemon.request_css(
+                        entry,
+                        build_cmd,
+                        daemon.get_inputs_mtime_ns(entry, template_files),
+                        daemon.get_templates_digest(f.path for f in template_files),
+                    )
+                if css is not None:
+                    self._check_cancelled()
+                    utils.write_file_atomic(dist_css, css)
+                    self.jobs.append(_Job(entry, metrics.BUILT_BY_DAEMON, fingerprint, [], False))
+                    continue
+
+            self.jobs.append(
+                _Job(
+                    entry,
+                    metrics.BUILT,
+                    fingerprint,
+                    [build_cmd, *critical_cmds],
+                    bool(critical_cmds),
+                )
+            )
+
+    def finish(self) -> metrics.BuildStats:
+        """Post-process the stylesheets, remember their fingerprints and measure them."""
+        for job in self.jobs:
+            self.statuses[job.entry] = job.status
+            dist_css = utils.get_full_dist_css_path(job.entry)
+            if job.critical:
+                critical.clear_cache()
+                self._success(
+                    f"Built critical css '{utils.get_full_critical_css_path(job.entry)}'."
+                )
+            with self._phase("postprocess"):
+                postprocess(job.entry, self.on_message)
+                utils.write_build_fingerprint(job.fingerprint, job.entry)
+                if job.status != metrics.RESTORED:
+                    utils.store_in_build_cache(job.fingerprint, job.entry)
+            if job.status == metrics.RESTORED:
+                self._success(f"Restored production stylesheet '{dist_css}' from cache.")
+            elif job.status == metrics.BUILT_BY_DAEMON:
+                self._success(f"Built production stylesheet '{dist_css}' with the build daemon.")
+            else:
+                self._success(f"Built production stylesheet '{dist_css}'.")
+
+        self._check_cancelled()
+        stylesheets = [
+            stylesheet
+            for entry in utils.get_entries()
+            if (stylesheet := metrics.measure_stylesheet(entry, self.statuses[entry])) is not None
+        ]
+        self.timings.stop()
+        return metrics.BuildStats(dict(self.timings.phases), self.timings.total, stylesheets)
+
+
+async def _run_jobs(jobs: list[_Job], on_output: Optional[OutputCallback]) -> None:
+    """Run the command lines of the jobs.
+
+    The command lines of a job run one after the other, the jobs run concurrently, at most
+    MAX_PARALLEL_BUILDS at a time. If one of them fails, the others are cancelled.
+    """
+    semaphore = asyncio.Semaphore(MAX_PARALLEL_BUILDS)
+
+    async def run_job(job: _Job) -> None:
+        async with semaphore:
+            for cmd in job.cmds:
+                await run_cli(cmd, name=job.entry.name, on_output=on_output)
+
+    tasks = [asyncio.ensure_future(run_job(job)) for job in jobs]
+    try:
+        await asyncio.gather(*tasks)
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+async def _abuild(
+    *, force: bool, on_output: Optional[OutputCallback], on_message: utils.MessageCallback
+) -> metrics.BuildStats:
+    loop = asyncio.get_running_loop()
+    build = _Build(force=force, on_message=on_message)
+    try:
+        await loop.run_in_executor(None, build.prepare)
+
+        jobs = [job for job in build.jobs if job.cmds]
+        if jobs:
+            with build.timings.phase("run_cli"):
+                await _run_jobs(jobs, on_output)
+
+        build_stats = await loop.run_in_executor(None, build.finish)
+    except asyncio.CancelledError:
+        # The thread of a running phase keeps going, but stops before the next one.
+        build.cancelled.set()
+        raise
+    signals.build_finished.send(sender=None, stats=build_stats)
+    return build_stats
+
+
+async def abuild(
+    *,
+    force: bool = False,
+    on_output: Optional[OutputCallback] = None,
+    on_message: utils.MessageCallback = _ignore_message,
+    timeout: Optional[float] = None,
+) -> metrics.BuildStats:
+    """Build the production stylesheets of all entries.
+
+    Entries, whose inputs didn't change, are skipped unless `force` is set. `on_output` is called
+    with the name of the entry and each line of the output of the CLI, `on_message` with the
+    progress messages of `tailwind build` and their level.
+
+    Raises BuildError, if the CLI fails, CliNotFoundError, if the CLI is missing, and
+    asyncio.TimeoutError, if the build takes longer than `timeout` seconds. A cancelled build
+    doesn't write anything after the phase, that was running, e.g. the download of the CLI, ended.
+    """
+    return await asyncio.wait_for(
+        _abuild(force=force, on_output=on_output, on_message=on_message), timeout
+    )
+
+
+def build(
+    *,
+    force: bool = False,
+    on_output: Optional[OutputCallback] = None,
+    on_message: utils.MessageCallback = _ignore_message,
+    timeout: Optional[float] = None,
+) -> metrics.BuildStats:
+    """Build the production stylesheets of all entries, see `abuild`.
+
+    This starts its own event loop. Inside of a running one, e.g. if `tailwind build` is called from
+    a coroutine, the build runs in a thread with its own event loop and blocks the running one
+    meanwhile, so prefer `abuild` there.
+    """
+    build_coro = abuild(force=force, on_output=on_output, on_message=on_message, timeout=timeout)
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(build_coro)
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        return executor.submit(asyncio.run, build_coro).result()
+
+
+DEFAULT_TAILWIND_CONFIG = """/** @type {import('tailwindcss').Config} */
+const plugin = require("tailwindcss/plugin");
+
+module.exports = {
+  content: ["./templates/**/*.html", "**/templates/**/*.html"],
+  theme: {
+    extend: {},
+  },
+  plugins: [
+    require("@tailwindcss/typography"),
+    require("@tailwindcss/forms"),
+    require("@tailwindcss/aspect-ratio"),
+    require("@tailwindcss/container-queries"),
+    plugin(function ({ addVariant }) {
+      addVariant("htmx-settling", ["&.htmx-settling", ".htmx-settling &"]);
+      addVariant("htmx-request", ["&.htmx-request", ".htmx-request &"]);
+      addVariant("htmx-swapping", ["&.htmx-swapping", ".htmx-swapping &"]);
+      addVariant("htmx-added", ["&.htmx-added", ".htmx-added &"]);
+    }),
+  ],
+};
+"""
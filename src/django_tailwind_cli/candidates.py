@@ -0,0 +1,134 @@
+"""
+Class name candidates extracted from the templates for `TAILWIND_CLI_EXTRACT_CLASSES`.
+
+The candidates of all templates are written to a single file, which replaces the templates in the
+`content` of the CLI. The candidates of each template are cached by the SHA-256 digest of the file,
+which the template index keeps up to date. After a template was edited, only this template is
+tokenized again. The candidates file is only rewritten, if the candidates changed, so that the
+watchers of the CLI don't rebuild the stylesheets for edits that don't touch any class.
+"""
+
+import asyncio
+import json
+import threading
+from pathlib import Path
+from typing import TYPE_CHECKING, Optional
+
+from django_tailwind_cli import extract, utils
+
+if TYPE_CHECKING:
+    from django_tailwind_cli.template_index import TemplateFile
+
+CACHE_VERSION = 1
+# The watchers of the CLI debounce their rebuilds themselves, so a short window is enough.
+DEBOUNCE = 0.1
+
+
+class CandidatesCache:
+    """Cache of the candidates of the template files by their digest."""
+
+    def __init__(self, cache_file: Optional[Path] = None) -> None:
+        self.cache_file = cache_file
+        self._candidates: dict[str, list[str]] = {}
+        self._load()
+
+    def _load(self) -> None:
+        if self.cache_file is None:
+            return
+        try:
+            data = json.loads(self.cache_file.read_text())
+        except (OSError, ValueError):
+            return
+        if isinstance(data, dict) and data.get("version") == CACHE_VERSION:
+            self._candidates = data["candidates"]
+
+    def save(self) -> None:
+        """Store the cache in its cache file."""
+        if self.cache_file is None:
+            return
+        data = {"version": CACHE_VERSION, "candidates": self._candidates}
+        utils.write_file_atomic(self.cache_file, json.dumps(data).encode())
+
+    def candidates(self, template_files: list["TemplateFile"]) -> set[str]:
+        """Get the candidates of all template files, tokenizing only new and changed files.
+
+        Digests of templates, that no longer exist, are forgotten.
+        """
+        cached = self._candidates
+        self._candidates = {}
+        candidates: set[str] = set()
+        changed = False
+        for template_file in template_files:
+            file_candidates = cached.get(template_file.sha256)
+            if file_candidates is None:
+                try:
+                    content = Path(template_file.path).read_text(errors="replace")
+                except OSError:
+                    continue
+                file_candidates = sorted(extract.extract_template_candidates(content))
+                changed = True
+            self._candidates[template_file.sha256] = file_candidates
+            candidates.update(file_candidates)
+        if changed or len(cached) != len(self._candidates):
+            self.save()
+        return candidates
+
+
+_candidates_cache: Optional[CandidatesCache] = None
+
+
+def get_candidates_cache() -> CandidatesCache:
+    """Get the candidates cache of the current project."""
+    global _candidates_cache
+    cache_dir = utils.get_cache_dir()
+    cache_file = cache_dir / "candidates.json" if cache_dir is not None else None
+    if _candidates_cache is None or _candidates_cache.cache_file != cache_file:
+        _candidates_cache = CandidatesCache(cache_file)
+    return _candidates_cache
+
+
+def write_candidates_file(template_files: Optional[list["TemplateFile"]] = None) -> bool:
+    """Write the candidates of the templates to the candidates file.
+
+    The templates are taken from the template index, unless they are passed in `template_files`.
+    Returns True, if the candidates changed.
+    """
+    from django_tailwind_cli.template_index import get_template_index
+
+    if template_files is None:
+        template_files = get_template_index().entries()
+    candidates = get_candidates_cache().candidates(template_files)
+    content = "".join(f"{candidate}\n" for candidate in sorted(candidates)).encode()
+
+    candidates_path = utils.get_full_candidates_path()
+    try:
+        if candidates_path.read_bytes() == content:
+            return False
+    except OSError:
+        pass
+    utils.write_file_atomic(candidates_path, content)
+    return True
+
+
+def _watch_templates(stop: threading.Event) -> None:
+    from django_tailwind_cli import watcher
+
+    with watcher.create_watcher(watcher.get_watch_roots()) as file_watcher:
+        # Templates might have changed before the watcher was set up.
+        write_candidates_file()
+        for _ in watcher.iter_bursts(file_watcher, DEBOUNCE, stop):
+            write_candidates_file()
+
+
+async def watch() -> None:
+    """Keep the candidates file up to date until cancelled.
+
+    The templates are watched in a thread, so that the event loop of the supervisor keeps
+    multiplexing the output of the watchers meanwhile. The template index is only refreshed after
+    a template changed.
+    """
+    stop = threading.Event()
+    try:
+        await asyncio.get_running_loop().run_in_executor(None, _watch_templates, stop)
+    finally:
+        stop.set()
@@ -0,0 +1,99 @@
+"""
+Precompressed copies of the compiled css.
+
+When `TAILWIND_CLI_PRECOMPRESS` is set, `tailwind build` writes `.gz` and/or `.br` files next to the
+compiled css, so that WhiteNoise or nginx can serve them without compressing on every request.
+Brotli support requires the optional `brotli` package.
+"""
+
+import gzip
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable
+
+from django_tailwind_cli import utils
+from django_tailwind_cli.conf import settings
+
+GZIP = "gzip"
+BROTLI = "br"
+
+EXTENSIONS = {GZIP: ".gz", BROTLI: ".br"}
+
+
+def _gzip_compress(content: bytes) -> bytes:
+    # A fixed mtime makes the output reproducible.
+    return gzip.compress(content, compresslevel=9, mtime=0)
+
+
+def _brotli_compress(content: bytes) -> bytes:
+    import brotli
+
+    return brotli.compress(content, quality=11, mode=brotli.MODE_TEXT)
+
+
+def _brotli_decompress(content: bytes) -> bytes:
+    import brotli
+
+    return brotli.decompress(content)
+
+
+def _get_codecs() -> dict[str, tuple[Callable[[bytes], bytes], Callable[[bytes], bytes]]]:
+    codecs = {}
+    for compression in settings.TAILWIND_CLI_PRECOMPRESS:
+        if compression == GZIP:
+            codecs[GZIP] = (_gzip_compress, gzip.decompress)
+        elif compression == BROTLI:
+            try:
+                import brotli  # noqa: F401
+            except ImportError as e:
+                msg = (
+                    "Brotli compression requires the brotli package. "
+                    "Install django-tailwind-cli[brotli]."
+                )
+                raise ValueError(msg) from e
+            codecs[BROTLI] = (_brotli_compress, _brotli_decompress)
+        else:
+            msg = (
+                f"Unknown compression '{compression}' in TAILWIND_CLI_PRECOMPRESS. "
+                f"Use '{GZIP}' or '{BROTLI}'."
+            )
+            raise ValueError(msg)
+    return codecs
+
+
+def _compress_file(
+    path: Path,
+    extension: str,
+    compress: Callable[[bytes], bytes],
+    decompress: Callable[[bytes], bytes],
+) -> bool:
+    content = path.read_bytes()
+    compressed_path = path.with_name(path.name + extension)
+    try:
+        if decompress(compressed_path.read_bytes()) == content:
+            return False
+    except Exception:  # noqa: BLE001
+        # The file is missing or damaged, so it is written again.
+        pass
+    utils.write_file_atomic(compressed_path, compress(content))
+    return True
+
+
+def compress_files(paths: list[Path]) -> list[Path]:
+    """Write precompressed copies of the files in the formats of `TAILWIND_CLI_PRECOMPRESS`.
+
+    The files are compressed in parallel with the highest compression levels. Existing copies are
+    only replaced, if the content of the file changed. Returns the paths of the written copies.
+    """
+    codecs = _get_codecs()
+    jobs = [
+        (path, EXTENSIONS[compression], compress, decompress)
+        for path in paths
+        for compression, (compress, decompress) in codecs.items()
+    ]
+    if not jobs:
+        return []
+
+    with ThreadPoolExecutor(max_workers=len(jobs)) as executor:
+        written = list(executor.map(lambda job: _compress_file(*job), jobs))
+    return [path.with_name(path.name + ext) for (path, ext, _, _), w in zip(jobs, written) if w]
@@ -10,9 +10,25 @@ class TailwindCliAppConfig(AppConf):
     AUTOMATIC_DOWNLOAD = True
     SRC_CSS = None
     DIST_CSS = "css/tailwind.css"
+    HASHED_FILENAMES = False
+    HASHED_FILENAMES_KEEP = 5
+    PRECOMPRESS = []
+    CRITICAL_TEMPLATES = []
     CONFIG_FILE = "tailwind.config.js"
+    ENTRIES = []
+    AUTO_CONTENT = False
+    EXTRACT_CLASSES = False
+    EXTRA_CONTENT = []
     SRC_REPO = "tailwindlabs/tailwindcss"
     ASSET_NAME = "tailwindcss"
+    CHECKSUM = None
+    SHARED_CACHE = False
+    CACHE_DIR = ".tailwind-cli"
+    TEMPLATE_IGNORE_PATTERNS = [".*", "node_modules", "__pycache__"]
+    BUILD_CACHE_DIR = None
+    BUILD_CACHE_MAX_SIZE = 50 * 1024 * 1024
+    LIVE_RELOAD = False
+    WATCH_DEBOUNCE = None
 
     class Meta:
         prefix = "TAILWIND_CLI"
@@ -0,0 +1,74 @@
+"""
+Critical css for the content above the fold.
+
+When `TAILWIND_CLI_CRITICAL_TEMPLATES` is set, `tailwind build` runs the CLI a second time with only
+these templates as content. The result is a small stylesheet, which the `tailwind_css` template tag
+inlines in a `<style>` block, while the full stylesheet is loaded without blocking the rendering.
+"""
+
+from functools import lru_cache
+from pathlib import Path
+from typing import Optional
+
+from django.template import TemplateDoesNotExist
+from django.template.loader import get_template
+from django.utils.safestring import SafeString, mark_safe
+
+from django_tailwind_cli import utils
+from django_tailwind_cli.conf import settings
+from django_tailwind_cli.signals import stylesheet_changed
+
+
+def get_critical_template_files() -> list[Path]:
+    """Get the files of the templates in `TAILWIND_CLI_CRITICAL_TEMPLATES`.
+
+    The template names are resolved with the template loaders of the project.
+    """
+    template_files = []
+    for template_name in settings.TAILWIND_CLI_CRITICAL_TEMPLATES:
+        try:
+            origin = get_template(template_name).origin
+        except TemplateDoesNotExist as e:
+            msg = f"Critical template '{template_name}' does not exist."
+            raise ValueError(msg) from e
+        template_files.append(Path(origin.name))
+    return template_files
+
+
+def get_build_cmd(build_cmd: list[str], entry: Optional[utils.Entry] = None) -> list[str]:
+    """Derive the command line building the critical css from the one of the full stylesheet."""
+    critical_cmd = list(build_cmd)
+    critical_cmd[critical_cmd.index("--output") + 1] = str(utils.get_full_critical_css_path(entry))
+    content = ",".join(template_file.as_posix() for template_file in get_critical_template_files())
+    critical_cmd.extend(["--content", content])
+    return critical_cmd
+
+
+@lru_cache
+def _read_critical_css(critical_css_path: str) -> Optional[SafeString]:
+    try:
+        css = Path(critical_css_path).read_text()
+    except OSError:
+        return None
+    # A closing tag inside of the css would end the <style> block.
+    return mark_safe(css.replace("</", "<\\/"))  # noqa: S308
+
+
+def get_critical_css(entry: Optional[utils.Entry] = None) -> Optional[SafeString]:
+    """Get the critical css of an entry to inline or None, if there is none.
+
+    The file is read once per process.
+    """
+    if not settings.TAILWIND_CLI_CRITICAL_TEMPLATES:
+        return None
+    try:
+        critical_css_path = utils.get_full_critical_css_path(entry)
+    except ValueError:
+        return None
+    return _read_critical_css(str(critical_css_path))
+
+
+def clear_cache() -> None:
+    """Forget the critical css read by `get_critical_css`."""
+    _read_critical_css.cache_clear()
+    stylesheet_changed.send(sender=None)
@@ -0,0 +1,245 @@
+"""
+Build daemon for repeated production builds.
+
+Starting the standalone Tailwind CSS CLI takes a while, because it unpacks its embedded Node.js
+runtime and loads the plugins of the config. `tailwind daemon` keeps a watcher with `--minify`
+running for each entry, which writes into the cache directory and rebuilds whenever an input
+changes. `tailwind build` asks the daemon over a local socket for the compiled css instead of
+starting the CLI.
+
+The daemon only answers with css of a rebuild, that started after the newest input was modified
+and saw the same templates as `tailwind build`, so that removed templates count as well. If there
+is no such rebuild in time, or the daemon runs a different command line, `tailwind build` falls
+back to running the CLI itself.
+"""
+
+import hashlib
+import os
+import secrets
+import sys
+import threading
+import time
+from collections.abc import Iterable, Iterator
+from contextlib import contextmanager
+from multiprocessing.connection import Client, Connection, Listener
+from pathlib import Path
+from typing import Any, Callable, NamedTuple, Optional
+
+from django_tailwind_cli import utils
+from django_tailwind_cli.conf import settings
+from django_tailwind_cli.template_index import TemplateFile, TemplateIndex
+
+WAIT_TIMEOUT = 10.0
+# Time for the daemon to answer on top of the time it waits for a rebuild.
+RESPONSE_TIMEOUT = WAIT_TIMEOUT + 5.0
+
+
+class Watcher(NamedTuple):
+    """A watcher run by the daemon for an entry."""
+
+    build_cmd: list[str]
+    output: Path
+
+
+def get_address() -> Optional[str]:
+    """Get the address of the daemon of the project or None, if the cache is disabled."""
+    cache_dir = utils.get_cache_dir()
+    if cache_dir is None:
+        return None
+    if sys.platform == "win32":
+        digest = hashlib.sha256(str(cache_dir).encode()).hexdigest()[:16]
+        return rf"\\.\pipe\django-tailwind-cli-{digest}"
+    return str(cache_dir / "daemon.sock")
+
+
+def is_running() -> bool:
+    """Check if the daemon of the project appears to be running."""
+    address = get_address()
+    if address is None:
+        return False
+    if sys.platform == "win32":
+        return _get_authkey_path().exists()
+    return os.path.exists(address)
+
+
+def _get_authkey_path() -> Path:
+    cache_dir = utils.get_cache_dir()
+    assert cache_dir is not None
+    return cache_dir / "daemon.key"
+
+
+def get_output_path(entry: utils.Entry) -> Path:
+    """Get path to the css written by the watcher of the daemon for an entry."""
+    cache_dir = utils.get_cache_dir()
+    assert cache_dir is not None
+    return cache_dir / "daemon" / f"{entry.name}.css"
+
+
+def get_inputs_mtime_ns(entry: utils.Entry, template_files: list[TemplateFile]) -> int:
+    """Get the time of the newest modification of the inputs of an entry.
+
+    Removed templates don't leave a modification time behind, see `get_templates_digest`.
+    """
+    paths = [utils.get_full_config_file_path(entry)]
+    if utils.uses_generated_config():
+        paths.append(utils.get_full_generated_config_file_path(entry))
+        paths.extend(utils.get_extra_content_files())
+    if settings.TAILWIND_CLI_EXTRACT_CLASSES:
+        paths.append(utils.get_full_candidates_path())
+    if entry.src_css is not None:
+        paths.append(utils.get_full_src_css_path(entry))
+
+    mtime_ns = max((template_file.mtime_ns for template_file in template_files), default=0)
+    for path in paths:
+        try:
+            mtime_ns = max(mtime_ns, path.stat().st_mtime_ns)
+        except OSError:
+            pass
+    return mtime_ns
+
+
+def get_templates_digest(template_paths: Iterable[str]) -> str:
+    """Get a digest of the paths of the templates, which changes, if a template is removed."""
+    return hashlib.sha256("\0".join(sorted(template_paths)).encode()).hexdigest()
+
+
+class BuildDaemon:
+    """Serve the css of the watchers to `tailwind build`.
+
+    The state of the watchers is tracked from their output. The CLI prints `Rebuilding...` when it
+    starts a build and `Done in ...` when it wrote the css. When a build starts, the daemon lists
+    the templates, that the build sees. `list_templates` defaults to a template index of the
+    daemon, as the shared one is refreshed by the services of the supervisor in another thread.
+    """
+
+    def __init__(
+        self,
+        watchers: dict[str, Watcher],
+        list_templates: Optional[Callable[[], list[str]]] = None,
+    ) -> None:
+        self.watchers = watchers
+        self._list_templates = list_templates or TemplateIndex().files
+        self._condition = threading.Condition()
+        templates_digest = get_templates_digest(self._list_templates())
+        now_ns = time.time_ns()
+        # The start, the end and the digest of the templates of the last build of each watcher.
+        self._builds: dict[str, list[Any]] = {
+            name: [now_ns, 0, templates_digest] for name in watchers
+        }
+
+    def on_output(self, name: str, line: str) -> None:
+        """Track the builds of a watcher from a line of its output."""
+        if line.startswith("Rebuilding"):
+            # The templates are listed before the start is taken, so that a template removed
+            # meanwhile makes the build look older rather than newer.
+            templates_digest = get_templates_digest(self._list_templates())
+            with self._condition:
+                self._builds[name][0] = time.time_ns()
+                self._builds[name][2] = templates_digest
+            return
+        with self._condition:
+            if line.startswith("Done in"):
+                self._builds[name][1] = time.time_ns()
+                self._condition.notify_all()
+
+    def handle(self, request: dict[str, Any]) -> dict[str, Any]:
+        """Answer a request for the css of an entry."""
+        watcher = self.watchers.get(request["entry"])
+        if watcher is None or watcher.build_cmd != request["build_cmd"]:
+            return {"status": "mismatch"}
+
+        build = self._builds[request["entry"]]
+        deadline = time.monotonic() + WAIT_TIMEOUT
+        with self._condition:
+            while True:
+                started_ns, finished_ns, templates_digest = build
+                if (
+                    finished_ns >= started_ns > request["inputs_mtime_ns"]
+                    and templates_digest == request["templates_digest"]
+                ):
+                    try:
+                        css = watcher.output.read_bytes()
+                    except OSError:
+                        return {"status": "missing"}
+                    return {"status": "ok", "css": css}
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    return {"status": "timeout"}
+                self._condition.wait(timeout)
+
+    def _serve_connection(self, connection: Connection) -> None:
+        with connection:
+            try:
+                connection.send(self.handle(connection.recv()))
+            except (EOFError, OSError, KeyError, TypeError):
+                pass
+
+    def _serve(self, listener: Listener) -> None:
+        while True:
+            try:
+                connection = listener.accept()
+            except OSError:
+                # The listener was closed.
+                return
+            except Exception:  # noqa: BLE001, S112
+                # E.g. a client with a wrong authkey.
+                continue
+            threading.Thread(target=self._serve_connection, args=(connection,), daemon=True).start()
+
+    @contextmanager
+    def listen(self) -> Iterator[str]:
+        """Accept requests in a background thread. Yields the address of the daemon."""
+        address = get_address()
+        if address is None:
+            msg = "The build daemon requires TAILWIND_CLI_CACHE_DIR."
+            raise ValueError(msg)
+
+        authkey = secrets.token_bytes(32)
+        authkey_path = _get_authkey_path()
+        authkey_path.parent.mkdir(parents=True, exist_ok=True)
+        if sys.platform != "win32":
+            Path(address).unlink(missing_ok=True)
+        listener = Listener(address, authkey=authkey)
+        fd = os.open(authkey_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "wb") as f:
+            f.write(authkey)
+
+        thread = threading.Thread(target=self._serve, args=(listener,), daemon=True)
+        thread.start()
+        try:
+            yield address
+        finally:
+            authkey_path.unlink(missing_ok=True)
+            listener.close()
+
+
+def request_css(
+    entry: utils.Entry, build_cmd: list[str], inputs_mtime_ns: int, templates_digest: str
+) -> Optional[bytes]:
+    """Ask the daemon for the css of an entry.
+
+    Returns None, if no daemon is running or it can't provide css built from the current inputs.
+    """
+    address = get_address()
+    if address is None or not is_running():
+        return None
+    try:
+        authkey = _get_authkey_path().read_bytes()
+        with Client(address, authkey=authkey) as connection:
+            connection.send(
+                {
+                    "entry": entry.name,
+                    "build_cmd": build_cmd,
+                    "inputs_mtime_ns": inputs_mtime_ns,
+                    "templates_digest": templates_digest,
+                }
+            )
+            if not connection.poll(RESPONSE_TIMEOUT):
+                return None
+            response = connection.recv()
+    except (OSError, EOFError, ValueError):
+        return None
+    except Exception:  # noqa: BLE001
+        # E.g. an authentication error, if the daemon restarted meanwhile.
+        return None
+    return response.get("css") if response.get("status") == "ok" else None
@@ -0,0 +1,293 @@
+"""
+Download of the Tailwind CSS CLI.
+
+The CLI is streamed into a partial file next to its destination. Interrupted transfers are resumed
+with HTTP range requests, the result is verified against a SHA-256 checksum and only then moved to
+its final location.
+
+Optionally the binaries are kept in a machine-wide store, addressed by their checksum, and the
+projects only link to them.
+
+`install_cli` puts it all together for the management commands and the Python API of the build.
+"""
+
+import hashlib
+import http.client
+import os
+import shutil
+import ssl
+import time
+import urllib.error
+import urllib.request
+from pathlib import Path
+from typing import Callable, Optional
+
+import certifi
+
+from django_tailwind_cli import utils
+from django_tailwind_cli.conf import settings
+
+CHUNK_SIZE = 64 * 1024
+TIMEOUT = 30
+RETRIES = 3
+RETRY_DELAY = 1.0
+
+ProgressCallback = Callable[[int, Optional[int]], None]
+
+
+class DownloadError(Exception):
+    """Raised when the CLI cannot be downloaded or verified."""
+
+
+def _open_url(url: str, offset: int = 0) -> http.client.HTTPResponse:
+    request = urllib.request.Request(url)  # noqa: S310
+    if offset:
+        request.add_header("Range", f"bytes={offset}-")
+    certifi_context = ssl.create_default_context(cafile=certifi.where())
+    return urllib.request.urlopen(request, context=certifi_context, timeout=TIMEOUT)  # noqa: S310
+
+
+def get_partial_path(dest_file: Path) -> Path:
+    """Get path to the partial file used while downloading to `dest_file`."""
+    return dest_file.with_name(f"{dest_file.name}.part")
+
+
+def get_lock_path(dest_file: Path) -> Path:
+    """Get path to the lock file guarding the download to `dest_file`."""
+    return dest_file.with_name(f".{dest_file.name}.lock")
+
+
+def get_expected_checksum(asset_name: str) -> Optional[str]:
+    """Get the expected SHA-256 checksum of the CLI.
+
+    A checksum pinned by `TAILWIND_CLI_CHECKSUM` wins. Otherwise the checksum file of the release is
+    fetched. None is returned, if the release doesn't publish checksums.
+    """
+    if settings.TAILWIND_CLI_CHECKSUM:
+        return settings.TAILWIND_CLI_CHECKSUM.lower()
+
+    try:
+        with _open_url(utils.get_checksums_url()) as response:
+            checksums = response.read().decode()
+    except urllib.error.HTTPError as e:
+        if e.code == 404:
+            return None
+        raise DownloadError(f"Failed to fetch checksums: {e}") from e
+    except (OSError, http.client.HTTPException) as e:
+        raise DownloadError(f"Failed to fetch checksums: {e}") from e
+
+    for line in checksums.splitlines():
+        parts = line.split()
+        if len(parts) == 2 and parts[1].lstrip("*").split("/")[-1] == asset_name:
+            return parts[0].lower()
+    return None
+
+
+def _download_to_partial(
+    url: str, partial_file: Path, progress: Optional[ProgressCallback]
+) -> None:
+    offset = partial_file.stat().st_size if partial_file.exists() else 0
+    with _open_url(url, offset) as response:
+        if offset and response.status != 206:
+            # The server ignored the range request, so start from scratch.
+            offset = 0
+        content_length = response.headers.get("Content-Length")
+        total = offset + int(content_length) if content_length is not None else None
+
+        with partial_file.open(mode="ab" if offset else "wb") as dest:
+            downloaded = offset
+            while True:
+                chunk = response.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                dest.write(chunk)
+                downloaded += len(chunk)
+                if progress is not None:
+                    progress(downloaded, total)
+
+    if total is not None and downloaded != total:
+        raise http.client.IncompleteRead(b"", total - downloaded)
+
+
+def _sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with path.open("rb") as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def download_file(
+    url: str,
+    dest_file: Path,
+    *,
+    checksum: Optional[str] = None,
+    progress: Optional[ProgressCallback] = None,
+    retries: int = RETRIES,
+) -> None:
+    """Download `url` to `dest_file`.
+
+    The file is streamed into a partial file first. Failed transfers are retried and resumed where
+    they stopped. If a checksum is given, the download is verified before it is atomically moved
+    into place and made executable.
+    """
+    dest_file.parent.mkdir(parents=True, exist_ok=True)
+    partial_file = get_partial_path(dest_file)
+
+    for attempt in range(retries + 1):
+        try:
+            _download_to_partial(url, partial_file, progress)
+            break
+        except urllib.error.HTTPError as e:
+            if e.code == 416:
+                # The partial file is larger than the remote file, so it can't be resumed.
+                partial_file.unlink(missing_ok=True)
+            elif e.code < 500:
+                raise DownloadError(f"Failed to download '{url}': {e}") from e
+            if attempt == retries:
+                raise DownloadError(f"Failed to download '{url}': {e}") from e
+        except (OSError, http.client.HTTPException) as e:
+            if attempt == retries:
+                raise DownloadError(f"Failed to download '{url}': {e}") from e
+        time.sleep(RETRY_DELAY * (attempt + 1))
+
+    if checksum is not None:
+        actual_checksum = _sha256(partial_file)
+        if actual_checksum != checksum.lower():
+            partial_file.unlink(missing_ok=True)
+            msg = (
+                f"Checksum mismatch for '{url}': expected {checksum.lower()}, "
+                f"got {actual_checksum}."
+            )
+            raise DownloadError(msg)
+
+    partial_file.chmod(0o755)
+    os.replace(partial_file, dest_file)
+
+
+def _shared_ref_path(store: Path, url: str) -> Path:
+    return store / "refs" / hashlib.sha256(url.encode()).hexdigest()
+
+
+def get_shared_cli(store: Path, url: str) -> Optional[Path]:
+    """Get the binary downloaded from `url` from the shared store, if it is present."""
+    try:
+        checksum = _shared_ref_path(store, url).read_text().strip()
+    except FileNotFoundError:
+        return None
+    blob = store / "blobs" / checksum
+    return blob if blob.exists() else None
+
+
+def get_shared_download_path(store: Path, url: str) -> Path:
+    """Get path to download the binary from `url` to, before it is added to the shared store."""
+    return store / "blobs" / f"download-{_shared_ref_path(store, url).name}"
+
+
+def add_shared_cli(store: Path, url: str, downloaded_file: Path) -> Path:
+    """Move a downloaded binary into the shared store and remember where it came from."""
+    blob = store / "blobs" / _sha256(downloaded_file)
+    os.replace(downloaded_file, blob)
+
+    ref_path = _shared_ref_path(store, url)
+    ref_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_ref_path = ref_path.with_name(f"{ref_path.name}.tmp")
+    tmp_ref_path.write_text(blob.name)
+    os.replace(tmp_ref_path, ref_path)
+    return blob
+
+
+def link_file(source: Path, dest_file: Path) -> None:
+    """Link `dest_file` to `source`.
+
+    A hardlink is preferred. If the paths are on different file systems, a symlink is used, and a
+    copy is the last resort.
+    """
+    dest_file.parent.mkdir(parents=True, exist_ok=True)
+    tmp_file = dest_file.with_name(f".{dest_file.name}.link")
+    tmp_file.unlink(missing_ok=True)
+    try:
+        os.link(source, tmp_file)
+    except OSError:
+        try:
+            os.symlink(source, tmp_file)
+        except OSError:
+            shutil.copy2(source, tmp_file)
+    os.replace(tmp_file, dest_file)
+
+
+def _download_progress(on_message: utils.MessageCallback) -> ProgressCallback:
+    last_reported = -1
+
+    def report(downloaded: int, total: Optional[int]) -> None:
+        nonlocal last_reported
+        if not total:
+            return
+        percent = downloaded * 100 // total
+        if percent // 10 > last_reported // 10:
+            last_reported = percent
+            on_message(
+                f"Downloaded {downloaded // 1024} of {total // 1024} KiB ({percent}%)",
+                utils.MESSAGE_INFO,
+            )
+
+    return report
+
+
+def _download_cli(url: str, dest_file: Path, on_message: utils.MessageCallback) -> None:
+    on_message(f"Downloading Tailwind CSS CLI from '{url}'", utils.MESSAGE_SUCCESS)
+    checksum = get_expected_checksum(url.rsplit("/", 1)[-1])
+    if checksum is None:
+        on_message(
+            "No checksum available. Skipping verification of the download.", utils.MESSAGE_ERROR
+        )
+    download_file(url, dest_file, checksum=checksum, progress=_download_progress(on_message))
+
+
+def install_cli(on_message: utils.MessageCallback) -> Path:
+    """Make sure, that the CLI exists at its configured path, and return the path.
+
+    The CLI is downloaded or linked from the shared store, if it is missing. Raises DownloadError,
+    if that fails.
+    """
+    dest_file = utils.get_full_cli_path()
+    extra_msg = utils.get_src_repo_note()
+
+    if dest_file.exists():
+        on_message(
+            f"Tailwind CSS CLI already exists at '{dest_file}'{extra_msg}", utils.MESSAGE_SUCCESS
+        )
+        return dest_file
+
+    # Several processes might start at the same time, e.g. parallel test workers. Only the first
+    # one downloads the CLI, the others wait for it and find the finished binary.
+    with utils.file_lock(get_lock_path(dest_file)):
+        if dest_file.exists():
+            on_message(
+                f"Tailwind CSS CLI already exists at '{dest_file}'{extra_msg}",
+                utils.MESSAGE_SUCCESS,
+            )
+            return dest_file
+
+        download_url = utils.get_download_url()
+        on_message("Tailwind CSS CLI not found.", utils.MESSAGE_ERROR)
+        store = utils.get_shared_cache_dir()
+        if store is None:
+            _download_cli(download_url, dest_file, on_message)
+            on_message(
+                f"Downloaded Tailwind CSS CLI to '{dest_file}'{extra_msg}", utils.MESSAGE_SUCCESS
+            )
+            return dest_file
+
+        with utils.file_lock(store / ".lock"):
+            shared_cli = get_shared_cli(store, download_url)
+            if shared_cli is None:
+                downloaded_file = get_shared_download_path(store, download_url)
+                _download_cli(download_url, downloaded_file, on_message)
+                shared_cli = add_shared_cli(store, download_url, downloaded_file)
+        link_file(shared_cli, dest_file)
+    on_message(
+        f"Linked Tailwind CSS CLI from shared cache '{shared_cli}' to '{dest_file}'{extra_msg}",
+        utils.MESSAGE_SUCCESS,
+    )
+    return dest_file
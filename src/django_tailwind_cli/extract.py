@@ -0,0 +1,125 @@
+"""
+Extraction of class names from templates and compiled stylesheets.
+
+The tokenizer splits a template at whitespace, quotes, angle brackets, curly braces and equal signs,
+similar to the default extractor of Tailwind CSS, and keeps the tokens that could be a class name.
+Like the extractor of the CLI it finds more candidates than there are classes, e.g. plain words of
+the text. Intersected with the classes of a compiled stylesheet, the candidates tell which template
+uses which class.
+
+For `TAILWIND_CLI_EXTRACT_CLASSES` the templates are read with the lexer of the Django template
+language instead. Only the values of class attributes, the string literals of template tags and
+variables and the string literals of inline scripts are tokenized, so that the text of the page
+doesn't produce candidates.
+"""
+
+import re
+from pathlib import Path
+from typing import Union
+
+from django.template.base import Lexer, TokenType
+
+TOKEN_RE = re.compile(r"[^\s\"'`<>{}=]+")
+# A class starts with a letter, an arbitrary value or property, a negative sign or the important
+# modifier, and contains at least one lowercase letter.
+CANDIDATE_RE = re.compile(r"[!-]?[a-z@*\[].*")
+HAS_LOWERCASE_RE = re.compile(r"[a-z]")
+MAX_CANDIDATE_LENGTH = 128
+TRAILING_PUNCTUATION = ".,;"
+
+# Attributes like `class`, `:class` of Alpine.js or `x-bind:class`.
+CLASS_ATTRIBUTE_RE = re.compile(
+    r"""[\w:.@-]*class[\w:.@-]*\s*=\s*(?:"([^"]*)"|'([^']*)')""", re.IGNORECASE
+)
+STRING_LITERAL_RE = re.compile(r""""((?:[^"\\]|\\.)*)"|'((?:[^'\\]|\\.)*)'""")
+SCRIPT_RE = re.compile(r"<script\b[^>]*>(.*?)</script>", re.IGNORECASE | re.DOTALL)
+
+# A class selector in a stylesheet. Backslashes escape the special characters in Tailwind classes,
+# e.g. `.md\:p-4` or `.w-1\/2`, and leading digits are escaped as code points, e.g. `.\32xl\:p-4`.
+CSS_CLASS_RE = re.compile(r"(?<![\w\\])\.((?:\\[0-9a-fA-F]{1,6} ?|\\.|[\w-])+)")
+CSS_ESCAPE_RE = re.compile(r"\\([0-9a-fA-F]{1,6} ?|.)")
+CSS_BLOCK_RE = re.compile(r"\{[^{}]*\}")
+
+
+def extract_candidates(content: str) -> set[str]:
+    """Get the tokens of a template, that could be class names."""
+    candidates = set()
+    for token in TOKEN_RE.findall(content):
+        token = token.rstrip(TRAILING_PUNCTUATION)
+        if (
+            len(token) <= MAX_CANDIDATE_LENGTH
+            and CANDIDATE_RE.fullmatch(token)
+            and HAS_LOWERCASE_RE.search(token)
+        ):
+            candidates.add(token)
+    return candidates
+
+
+def _extract_string_literals(content: str) -> set[str]:
+    candidates = set()
+    for double_quoted, single_quoted in STRING_LITERAL_RE.findall(content):
+        literal = double_quoted or single_quoted
+        candidates |= extract_candidates(literal)
+        # E.g. the choices of the yesno filter.
+        if "," in literal:
+            candidates |= extract_candidates(literal.replace(",", " "))
+    return candidates
+
+
+def extract_template_candidates(content: str) -> set[str]:
+    """Get the class name candidates of a Django template.
+
+    Both branches of conditions count, e.g. `class="{% if active %}font-bold{% endif %}"`. Comments
+    are skipped.
+    """
+    candidates = set()
+    html = []
+    in_comment = False
+    for token in Lexer(content).tokenize():
+        if token.token_type == TokenType.TEXT:
+            if not in_comment:
+                html.append(token.contents)
+            continue
+        if token.token_type == TokenType.BLOCK:
+            tag_name = token.contents.split(maxsplit=1)[0] if token.contents else ""
+            if tag_name in ("comment", "endcomment"):
+                in_comment = tag_name == "comment"
+                continue
+        if token.token_type in (TokenType.BLOCK, TokenType.VAR) and not in_comment:
+            candidates |= _extract_string_literals(token.contents)
+        # A tag separates the text around it.
+        html.append(" ")
+
+    html_text = "".join(html)
+    for double_quoted, single_quoted in CLASS_ATTRIBUTE_RE.findall(html_text):
+        candidates |= extract_candidates(double_quoted or single_quoted)
+    for script in SCRIPT_RE.findall(html_text):
+        candidates |= _extract_string_literals(script)
+    return candidates
+
+
+def extract_file_candidates(path: Union[str, Path]) -> set[str]:
+    """Get the class name candidates of a template file."""
+    try:
+        content = Path(path).read_text(errors="replace")
+    except OSError:
+        return set()
+    return extract_candidates(content)
+
+
+def _unescape(match: re.Match) -> str:
+    escaped = match.group(1)
+    if len(escaped) > 1 or escaped in "0123456789abcdefABCDEF":
+        return chr(int(escaped.strip(), 16))
+    return escaped
+
+
+def extract_css_classes(css: str) -> set[str]:
+    """Get the class names used in the selectors of a stylesheet."""
+    # Numbers in the declarations, e.g. `padding:.5rem`, would look like class selectors.
+    selectors = CSS_BLOCK_RE.sub(" ", css)
+    return {
+        CSS_ESCAPE_RE.sub(_unescape, match)
+        for match in CSS_CLASS_RE.findall(selectors)
+        if not match[0].isdigit()
+    }
@@ -0,0 +1,147 @@
+"""
+Live reload of the stylesheets during development.
+
+`tailwind runserver` runs a tiny server-sent events endpoint next to the watchers. It polls the
+compiled stylesheets and sends an event with the name of the stylesheet, whenever a watcher rewrote
+it. With `DEBUG = True` the `tailwind_css` template tag adds a small script, which listens to these
+events and swaps the stylesheet without reloading the page.
+
+The URL of the endpoint is passed to the development server in the environment variable
+`TAILWIND_CLI_LIVE_RELOAD_URL`. Only pages served by the development server may read the events,
+other origins don't get a CORS header.
+"""
+
+import asyncio
+import os
+import socket
+from collections.abc import Collection
+from pathlib import Path
+from typing import Optional
+
+URL_ENV_VAR = "TAILWIND_CLI_LIVE_RELOAD_URL"
+POLL_INTERVAL = 0.1
+KEEPALIVE_INTERVAL = 15.0
+DEFAULT_PORT = "8000"
+LOOPBACK_HOSTS = ("localhost", "127.0.0.1", "[::1]")
+WILDCARD_HOSTS = ("0", "0.0.0.0", "[::]")
+
+RESPONSE_HEADERS = (
+    b"HTTP/1.1 200 OK\r\n"
+    b"Content-Type: text/event-stream\r\n"
+    b"Cache-Control: no-cache\r\n"
+    b"Connection: keep-alive\r\n"
+)
+
+
+def get_live_reload_url() -> Optional[str]:
+    """Get the URL of the live reload endpoint or None, if it isn't running."""
+    return os.environ.get(URL_ENV_VAR) or None
+
+
+def get_allowed_origins(addrport: Optional[str]) -> set[str]:
+    """Get the origins of the development server listening on `addrport`.
+
+    `addrport` is the optional argument of `runserver`, e.g. `8001`, `0.0.0.0:8001` or
+    `[::1]:8001`. The loopback addresses are always allowed, as the server is reachable through
+    them as well.
+    """
+    host, _, port = (addrport or "").rpartition(":")
+    if not port.isdigit():
+        host, port = addrport or "", DEFAULT_PORT
+    hosts = set(LOOPBACK_HOSTS)
+    if host and host not in WILDCARD_HOSTS:
+        hosts.add(host)
+    return {f"{scheme}://{host}:{port}" for scheme in ("http", "https") for host in hosts}
+
+
+class LiveReloadServer:
+    """Server-sent events endpoint announcing changes of the compiled stylesheets.
+
+    `stylesheets` maps the paths of the compiled stylesheets to the names, that are sent to the
+    browser. Only pages from `allowed_origins` get a CORS header, so that other sites can't
+    listen to the events. The socket is bound on creation, so that the URL is known before the
+    development server is started.
+    """
+
+    def __init__(
+        self,
+        stylesheets: dict[Path, str],
+        allowed_origins: Collection[str] = (),
+        host: str = "127.0.0.1",
+    ) -> None:
+        self.stylesheets = stylesheets
+        self.allowed_origins = allowed_origins
+        self._socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self._socket.bind((host, 0))
+        self._socket.listen()
+        self._socket.setblocking(False)
+        self._clients: set[asyncio.Queue] = set()
+
+    @property
+    def url(self) -> str:
+        host, port = self._socket.getsockname()[:2]
+        return f"http://{host}:{port}/events"
+
+    def _stat(self, path: Path) -> Optional[tuple[int, int]]:
+        try:
+            stat = path.stat()
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def _get_response_headers(self, origin: Optional[str]) -> bytes:
+        headers = RESPONSE_HEADERS
+        if origin in self.allowed_origins:
+            headers += f"Access-Control-Allow-Origin: {origin}\r\nVary: Origin\r\n".encode()
+        return headers + b"\r\n"
+
+    def broadcast(self, name: str) -> None:
+        """Send the name of a changed stylesheet to all connected browsers."""
+        for queue in self._clients:
+            queue.put_nowait(name)
+
+    async def _handle_client(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        queue: asyncio.Queue = asyncio.Queue()
+        try:
+            # Only the origin of the request matters, every path serves the events.
+            origin = None
+            while line := (await reader.readline()).strip():
+                name, _, value = line.decode("latin-1").partition(":")
+                if name.strip().lower() == "origin":
+                    origin = value.strip()
+            writer.write(self._get_response_headers(origin))
+            await writer.drain()
+            self._clients.add(queue)
+            while True:
+                try:
+                    name = await asyncio.wait_for(queue.get(), KEEPALIVE_INTERVAL)
+                except asyncio.TimeoutError:
+                    writer.write(b": keepalive\n\n")
+                else:
+                    writer.write(f"event: css\ndata: {name}\n\n".encode())
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            self._clients.discard(queue)
+            writer.close()
+
+    async def _poll(self) -> None:
+        known = {path: self._stat(path) for path in self.stylesheets}
+        while True:
+            await asyncio.sleep(POLL_INTERVAL)
+            for path, name in self.stylesheets.items():
+                current = self._stat(path)
+                if current is not None and current != known[path]:
+                    self.broadcast(name)
+                known[path] = current
+
+    async def serve(self) -> None:
+        """Serve the events and poll the stylesheets until cancelled."""
+        server = await asyncio.start_server(self._handle_client, sock=self._socket)
+        try:
+            await self._poll()
+        finally:
+            server.close()
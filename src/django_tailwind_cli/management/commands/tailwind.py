@@ -1,24 +1,22 @@
 """`tailwind` management command."""
 
 import importlib.util
+import json
 import os
-import shutil
-import ssl
 import subprocess
 import sys
-import urllib.request
-from multiprocessing import Process
-from pathlib import Path
-from typing import Optional, Union
+import threading
+from collections.abc import Awaitable
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional
 
-import certifi
 import typer
 from django.core.management.base import CommandError
-from django.template.utils import get_app_template_dirs
 from django_typer.management import TyperCommand, command, initialize
 
-from django_tailwind_cli import utils
-from django_tailwind_cli.conf import DEFAULT_SRC_REPO, settings
+from django_tailwind_cli import api, metrics, utils
+from django_tailwind_cli.conf import settings
+from django_tailwind_cli.template_index import get_template_index
 
 
 class Command(TyperCommand):
@@ -33,72 +31,245 @@ class Command(TyperCommand):
             msg = "Configuration error"
             raise CommandError(msg) from e
 
-        # Before running the actual subcommand, we need to make sure that the CLI is installed and
-        # the config file exists.
-        if settings.TAILWIND_CLI_AUTOMATIC_DOWNLOAD:
-            self.download_cli()
-        self._create_tailwind_config_if_not_exists()
+    def _require_cli(self) -> None:
+        """Make sure that the CLI is installed and the config file exists.
+
+        Only the subcommands running the CLI call this, so that the others start without touching
+        the file system or the network.
+        """
+        try:
+            api.require_cli(self._write_message)
+        except api.CliNotFoundError as e:
+            raise CommandError(str(e)) from e
 
     @command(help="Build a minified production ready CSS file.")
-    def build(self):
-        if not utils.get_full_cli_path().exists():
-            raise CommandError("Tailwind CSS CLI not found.")
-
-        build_cmd = [
-            str(utils.get_full_cli_path()),
-            "--output",
-            str(utils.get_full_dist_css_path()),
-            "--minify",
-        ]
-        if settings.TAILWIND_CLI_SRC_CSS is not None:
-            build_cmd.extend(
-                [
-                    "--input",
-                    str(utils.get_full_src_css_path()),
-                ]
-            )
+    def build(
+        self,
+        *,
+        force: bool = typer.Option(
+            False, "--force", help="Build the stylesheet even if no inputs have changed."
+        ),
+        json_output: bool = typer.Option(
+            False,
+            "--json",
+            help="Print the timings and sizes as JSON. Other messages are written to stderr.",
+        ),
+    ):
+        stdout = self.stdout
+        if json_output:
+            self.stdout = self.stderr
         try:
-            subprocess.run(build_cmd, cwd=settings.BASE_DIR, check=True)  # noqa: S603
+            build_stats = api.build(
+                force=force, on_output=self._write_output(), on_message=self._write_message
+            )
         except KeyboardInterrupt:
             self._write_error("Canceled building production stylesheet.")
-        else:
-            self._write_success(f"Built production stylesheet '{utils.get_full_dist_css_path()}'.")
+            return
+        except (api.CliNotFoundError, ValueError) as e:
+            raise CommandError(str(e)) from e
+        finally:
+            self.stdout = stdout
+        if json_output:
+            self.stdout.write(json.dumps(build_stats.as_dict(), indent=2))
+            return
+        for stylesheet in build_stats.stylesheets:
+            self.stdout.write(f"{stylesheet.path}: {metrics.format_stylesheet(stylesheet)}")
+        self.stdout.write(
+            f"Timings: {metrics.format_timings(build_stats.timings, build_stats.total_time)}"
+        )
+
+    def _write_output(self) -> api.OutputCallback:
+        """Write the output of the CLI, prefixed with the entry, if there are several."""
+        prefix_output = len(utils.get_entries()) > 1
+
+        def write(name: str, line: str) -> None:
+            self.stdout.write(f"[{name}] {line}" if prefix_output else line)
+
+        return write
+
+    def _run_builds(self, builds: list[list[Optional[list[str]]]]) -> None:
+        """Run the command lines of several builds.
+
+        The command lines of a build run one after the other, the builds run concurrently in a
+        bounded pool of threads. Each thread just waits for its CLI process.
+        """
+
+        def run(cmds: list[Optional[list[str]]]) -> None:
+            for cmd in cmds:
+                if cmd is not None:
+                    subprocess.run(cmd, cwd=settings.BASE_DIR, check=True)  # noqa: S603
+
+        if len(builds) == 1:
+            run(builds[0])
+            return
+
+        with ThreadPoolExecutor(max_workers=min(len(builds), api.MAX_PARALLEL_BUILDS)) as executor:
+            for _ in executor.map(run, builds):
+                pass
 
     @command(help="Start Tailwind CLI in watch mode during development.")
     def watch(self):
-        if not utils.get_full_cli_path().exists():
-            raise CommandError("Tailwind CSS CLI not found.")
-
-        watch_cmd = [
-            str(utils.get_full_cli_path()),
-            "--output",
-            str(utils.get_full_dist_css_path()),
-            "--watch",
-        ]
-        if settings.TAILWIND_CLI_SRC_CSS is not None:
-            watch_cmd.extend(
-                [
-                    "--input",
-                    str(utils.get_full_src_css_path()),
-                ]
-            )
+        self._require_cli()
+
+        if settings.TAILWIND_CLI_WATCH_DEBOUNCE is not None:
+            try:
+                self._watch_debounced()
+            except KeyboardInterrupt:
+                self._write_success("Stopped watching for changes.")
+            return
 
+        entries = utils.get_entries()
+        services = self._get_content_services()
         try:
-            subprocess.run(watch_cmd, cwd=settings.BASE_DIR, check=True)  # noqa: S603
+            if len(entries) == 1 and not services:
+                watch_cmd = api.get_cli_cmd(entries[0], "--watch")
+                subprocess.run(watch_cmd, cwd=settings.BASE_DIR, check=True)  # noqa: S603
+            else:
+                # One watcher per entry, supervised from this process.
+                from django_tailwind_cli import supervisor
+
+                watchers = [
+                    supervisor.ChildProcess(entry.name, api.get_cli_cmd(entry, "--watch"))
+                    for entry in entries
+                ]
+                supervisor.run(
+                    watchers, write=self.stdout.write, cwd=settings.BASE_DIR, services=services
+                )
         except KeyboardInterrupt:
             self._write_success("Stopped watching for changes.")
 
+    @command(help="Keep the Tailwind CLI running to speed up repeated production builds.")
+    def daemon(self):
+        from django_tailwind_cli import daemon, supervisor
+
+        if utils.get_cache_dir() is None:
+            msg = "The build daemon requires TAILWIND_CLI_CACHE_DIR."
+            raise CommandError(msg)
+        self._require_cli()
+
+        # The daemon runs the watchers of `tailwind watch`, but they minify the css and write it
+        # into the cache, where `tailwind build` picks it up.
+        watchers: dict[str, daemon.Watcher] = {}
+        children = []
+        for entry in utils.get_entries():
+            build_cmd = api.get_cli_cmd(entry, "--minify")
+            output = daemon.get_output_path(entry)
+            output.parent.mkdir(parents=True, exist_ok=True)
+            watch_cmd = [*build_cmd, "--watch"]
+            watch_cmd[watch_cmd.index("--output") + 1] = str(output)
+            watchers[entry.name] = daemon.Watcher(build_cmd, output)
+            children.append(supervisor.ChildProcess(entry.name, watch_cmd))
+
+        build_daemon = daemon.BuildDaemon(watchers)
+        try:
+            with build_daemon.listen() as address:
+                self._write_success(f"Build daemon listening on '{address}'.")
+                supervisor.run(
+                    children,
+                    write=self.stdout.write,
+                    cwd=settings.BASE_DIR,
+                    services=self._get_content_services(),
+                    on_output=build_daemon.on_output,
+                )
+        except KeyboardInterrupt:
+            self._write_success("Stopped build daemon.")
+
+    def _watch_debounced(self, stop: Optional[threading.Event] = None) -> None:
+        """Watch the inputs from Python and run the CLI once per burst of changes."""
+        from django_tailwind_cli import watcher
+
+        builds: list[list[Optional[list[str]]]] = [
+            [api.get_cli_cmd(entry)] for entry in utils.get_entries()
+        ]
+        with watcher.create_watcher(watcher.get_watch_roots()) as file_watcher:
+            self._rebuild(builds)
+            debounce = settings.TAILWIND_CLI_WATCH_DEBOUNCE
+            for changes in watcher.iter_bursts(file_watcher, debounce, stop):
+                self.stdout.write(f"{len(changes)} changed files. Rebuilding stylesheets.")
+                self._rebuild(builds)
+
+    def _rebuild(self, builds: list[list[Optional[list[str]]]]) -> None:
+        if settings.TAILWIND_CLI_EXTRACT_CLASSES:
+            from django_tailwind_cli import candidates
+
+            candidates.write_candidates_file()
+        try:
+            self._run_builds(builds)
+        except subprocess.CalledProcessError as e:
+            # The next change might fix the error, so the watcher keeps running.
+            self._write_error(f"The Tailwind CSS CLI exited with code {e.returncode}.")
+
+    async def _watch_debounced_service(self) -> None:
+        """Run `_watch_debounced` in a thread until cancelled."""
+        import asyncio
+
+        stop = threading.Event()
+        try:
+            await asyncio.get_running_loop().run_in_executor(None, self._watch_debounced, stop)
+        finally:
+            stop.set()
+
+    def _get_content_services(self) -> list[Callable[[], Awaitable[None]]]:
+        """Get the services keeping the content of the watchers up to date.
+
+        With `TAILWIND_CLI_EXTRACT_CLASSES` the candidates file is written before the watchers
+        start and rewritten, whenever the candidates of the templates change.
+        """
+        if not settings.TAILWIND_CLI_EXTRACT_CLASSES:
+            return []
+        from django_tailwind_cli import candidates
+
+        candidates.write_candidates_file()
+        return [candidates.watch]
+
     @command(name="list_templates", help="List the templates of your django project.")
     def list_templates(self):
-        template_files: list[str] = []
-        app_template_dirs = get_app_template_dirs("templates")
-        for app_template_dir in app_template_dirs:
-            template_files += self._list_template_files(app_template_dir)
+        for template_file in get_template_index().iter_files():
+            self.stdout.write(template_file)
 
-        for template_dir in settings.TEMPLATES[0]["DIRS"]:
-            template_files += self._list_template_files(template_dir)
+    @command(help="Report the classes used by the templates of your django project.")
+    def stats(
+        self,
+        *,
+        limit: int = typer.Option(10, "--limit", help="Number of heaviest templates to list."),
+        json_output: bool = typer.Option(False, "--json", help="Print the report as JSON."),
+    ):
+        from django_tailwind_cli import usage
 
-        self.stdout.write("\n".join(template_files))
+        css_classes = usage.get_css_classes()
+        report = usage.collect_usage(get_template_index().files(), css_classes)
+        if json_output:
+            self.stdout.write(json.dumps(report.as_dict(limit), indent=2))
+            return
+
+        if report.css_classes is None:
+            self._write_error(
+                "No compiled stylesheet found, counting all class name candidates. "
+                "Run 'tailwind build' first for exact numbers."
+            )
+            self.stdout.write(f"{len(report.templates)} templates use {report.classes} candidates.")
+        else:
+            self.stdout.write(
+                f"{len(report.templates)} templates use {report.classes} of the "
+                f"{report.css_classes} classes in the compiled stylesheets."
+            )
+
+        self.stdout.write("\nClasses per app:")
+        width = max((len(app.app) for app in report.apps), default=0)
+        for app in report.apps:
+            self.stdout.write(
+                f"  {app.app.ljust(width)}  {app.classes:>6} classes  {app.templates:>6} templates"
+            )
+
+        self.stdout.write("\nTemplates with the most classes no other template uses:")
+        for template in report.heaviest_templates(limit):
+            self.stdout.write(
+                f"  {template.path}: {template.unique_classes} unique of {template.classes} classes"
+            )
+
+        self.stdout.write("\nTemplates without classes:")
+        for template in report.templates_without_classes():
+            self.stdout.write(f"  {template.path}")
 
     @command(help="Start the Django development server and the Tailwind CLI in watch mode.")
     def runserver(
@@ -136,7 +307,7 @@ class Command(TyperCommand):
         if addrport:
             debug_server_cmd.append(addrport)
 
-        self._runserver(debug_server_cmd)
+        self._runserver(debug_server_cmd, addrport)
 
     @command(
         name="runserver_plus",
@@ -234,109 +405,80 @@ class Command(TyperCommand):
         if addrport:
             debug_server_cmd.append(addrport)
 
-        self._runserver(debug_server_cmd)
-
-    def _runserver(self, debug_server_cmd: list[str]) -> None:
-        # Start the watch process in a separate process.
-        watch_cmd = [sys.executable, "manage.py", "tailwind", "watch"]
-        watch_process = Process(
-            target=subprocess.run,
-            args=(watch_cmd,),
-            kwargs={
-                "cwd": settings.BASE_DIR,
-                "check": True,
-            },
-        )
+        self._runserver(debug_server_cmd, addrport)
 
-        # Start the runserver process in the current process.
-        debugserver_process = Process(
-            target=subprocess.run,
-            args=(debug_server_cmd,),
-            kwargs={
-                "cwd": settings.BASE_DIR,
-                "check": True,
-            },
-        )
+    def _runserver(self, debug_server_cmd: list[str], addrport: Optional[str]) -> None:
+        from django_tailwind_cli import supervisor
 
-        try:
-            watch_process.start()
-            debugserver_process.start()
-            watch_process.join()
-            debugserver_process.join()
-        except KeyboardInterrupt:  # pragma: no cover
-            watch_process.terminate()
-            debugserver_process.terminate()
+        self._require_cli()
 
-    @command(name="download_cli", help="Download the Tailwind CSS CLI to .")
-    def download_cli(self) -> None:
-        dest_file = utils.get_full_cli_path()
-        extra_msg = (
-            ""
-            if settings.TAILWIND_CLI_SRC_REPO == DEFAULT_SRC_REPO
-            else f" from '{settings.TAILWIND_CLI_SRC_REPO}'"
+        # The watchers and the server are started directly by a supervisor in this process, so no
+        # further Python interpreter has to boot Django just to start the CLI.
+        children = []
+        services: list[Callable[[], Awaitable[None]]] = []
+        if settings.TAILWIND_CLI_WATCH_DEBOUNCE is not None:
+            services.append(self._watch_debounced_service)
+        else:
+            # The server and the watchers are torn down together, when one of them exits.
+            children.extend(
+                supervisor.ChildProcess(
+                    entry.name, api.get_cli_cmd(entry, "--watch"), restart=False
+                )
+                for entry in utils.get_entries()
+            )
+            services.extend(self._get_content_services())
+        children.append(
+            supervisor.ChildProcess("server", debug_server_cmd, restart=False, prefix_output=False)
         )
 
-        if dest_file.exists():
-            self._write_success(f"Tailwind CSS CLI already exists at '{dest_file}'{extra_msg}")
-            return
+        env = {**os.environ, "PYTHONUNBUFFERED": "1"}
+        if settings.TAILWIND_CLI_LIVE_RELOAD:
+            from django_tailwind_cli import livereload
 
-        download_url = utils.get_download_url()
-        self._write_error("Tailwind CSS CLI not found.")
-        self._write_success(f"Downloading Tailwind CSS CLI from '{download_url}'")
-        dest_file.parent.mkdir(parents=True, exist_ok=True)
-        certifi_context = ssl.create_default_context(cafile=certifi.where())
-        with urllib.request.urlopen(download_url, context=certifi_context) as source:
-            with dest_file.open(mode="wb") as dest:
-                shutil.copyfileobj(source, dest)
-        # make cli executable
-        dest_file.chmod(0o755)
-        self._write_success(f"Downloaded Tailwind CSS CLI to '{dest_file}'{extra_msg}")
-
-    def _create_tailwind_config_if_not_exists(self) -> None:
-        tailwind_config_file = utils.get_full_config_file_path()
-
-        if not tailwind_config_file.exists():
-            self.stdout.write(self.style.ERROR("Tailwind CSS config not found."))
-            tailwind_config_file.write_text(DEFAULT_TAILWIND_CONFIG)
-            self.stdout.write(
-                self.style.SUCCESS(f"Created Tailwind CSS config at '{tailwind_config_file}'")
+            live_reload_server = livereload.LiveReloadServer(
+                {
+                    utils.get_full_dist_css_path(entry): entry.dist_css
+                    for entry in utils.get_entries()
+                },
+                allowed_origins=livereload.get_allowed_origins(addrport),
+            )
+            env[livereload.URL_ENV_VAR] = live_reload_server.url
+            services.append(live_reload_server.serve)
+
+        try:
+            returncode = supervisor.run(
+                children,
+                write=self.stdout.write,
+                cwd=settings.BASE_DIR,
+                env=env,
+                services=services,
             )
+        except KeyboardInterrupt:
+            return
+        if returncode:
+            msg = f"The development server exited with code {returncode}."
+            raise CommandError(msg, returncode=returncode)
+
+    @command(name="download_cli", help="Download the Tailwind CSS CLI to .")
+    def download_cli(self) -> None:
+        # The download pulls in the network stack, so it's only imported when it's needed.
+        from django_tailwind_cli import download
 
-    @staticmethod
-    def _list_template_files(template_dir: Union[str, Path]) -> list[str]:
-        template_files: list[str] = []
-        for d, _, filenames in os.walk(str(template_dir)):
-            for filename in filenames:
-                if filename.endswith(".html") or filename.endswith(".txt"):
-                    template_files.append(os.path.join(d, filename))
-        return template_files
+        try:
+            download.install_cli(self._write_message)
+        except download.DownloadError as e:
+            raise CommandError(str(e)) from e
+
+    def _write_message(self, message: str, level: str) -> None:
+        if level == utils.MESSAGE_SUCCESS:
+            self._write_success(message)
+        elif level == utils.MESSAGE_ERROR:
+            self._write_error(message)
+        else:
+            self.stdout.write(message)
 
     def _write_error(self, message: str) -> None:
         self.stdout.write(self.style.ERROR(message))
 
     def _write_success(self, message: str) -> None:
         self.stdout.write(self.style.SUCCESS(message))
-
-
-DEFAULT_TAILWIND_CONFIG = """/** @type {import('tailwindcss').Config} */
-const plugin = require("tailwindcss/plugin");
-
-module.exports = {
-  content: ["./templates/**/*.html", "**/templates/**/*.html"],
-  theme: {
-    extend: {},
-  },
-  plugins: [
-    require("@tailwindcss/typography"),
-    require("@tailwindcss/forms"),
-    require("@tailwindcss/aspect-ratio"),
-    require("@tailwindcss/container-queries"),
-    plugin(function ({ addVariant }) {
-      addVariant("htmx-settling", ["&.htmx-settling", ".htmx-settling &"]);
-      addVariant("htmx-request", ["&.htmx-request", ".htmx-request &"]);
-      addVariant("htmx-swapping", ["&.htmx-swapping", ".htmx-swapping &"]);
-      addVariant("htmx-added", ["&.htmx-added", ".htmx-added &"]);
-    }),
-  ],
-};
-"""
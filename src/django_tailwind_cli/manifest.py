@@ -0,0 +1,102 @@
+"""
+Content hashed copies of the compiled css.
+
+When `TAILWIND_CLI_HASHED_FILENAMES` is active, `tailwind build` stores a copy of the compiled css
+with the hash of its content in the file name, e.g. `css/tailwind.3f2a1b9c8d7e.css`, and records
+the name in a small JSON manifest next to it. The `tailwind_css` template tag reads the manifest
+once per process and links the hashed file, so that it can be cached forever by browsers and CDNs.
+"""
+
+import hashlib
+import json
+import re
+from functools import lru_cache
+from pathlib import Path, PurePosixPath
+from typing import Optional
+
+from django_tailwind_cli import compression, utils
+from django_tailwind_cli.conf import settings
+from django_tailwind_cli.signals import stylesheet_changed
+
+HASH_LENGTH = 12
+
+
+def get_hashed_name(name: str, content: bytes) -> str:
+    """Add the hash of `content` to the file name `name`."""
+    path = PurePosixPath(name)
+    digest = hashlib.sha256(content).hexdigest()[:HASH_LENGTH]
+    return str(path.with_name(f"{path.stem}.{digest}{path.suffix}"))
+
+
+def _prune_hashed_copies(dist_css: Path, hashed_css: Path) -> None:
+    """Remove all but the `TAILWIND_CLI_HASHED_FILENAMES_KEEP` most recent hashed copies.
+
+    The precompressed files of removed copies are removed along with them.
+    """
+    pattern = re.compile(
+        rf"{re.escape(dist_css.stem)}\.[0-9a-f]{{{HASH_LENGTH}}}{re.escape(dist_css.suffix)}"
+    )
+    previous_copies = []
+    for path in dist_css.parent.iterdir():
+        if path != hashed_css and pattern.fullmatch(path.name):
+            try:
+                previous_copies.append((path.stat().st_mtime_ns, path))
+            except FileNotFoundError:
+                continue
+    previous_copies.sort(reverse=True)
+    keep = max(settings.TAILWIND_CLI_HASHED_FILENAMES_KEEP - 1, 0)
+    for _, path in previous_copies[keep:]:
+        path.unlink(missing_ok=True)
+        for extension in compression.EXTENSIONS.values():
+            path.with_name(f"{path.name}{extension}").unlink(missing_ok=True)
+
+
+def write_hashed_css(entry: Optional[utils.Entry] = None) -> Path:
+    """Store a content hashed copy of the compiled css of an entry and update the manifest.
+
+    The copies of the previous builds are kept for pages, that still link them, e.g. during a
+    rolling deploy or from cached html. Only the `TAILWIND_CLI_HASHED_FILENAMES_KEEP` most recent
+    copies are kept.
+    """
+    entry = entry or utils.get_entry()
+    dist_css = utils.get_full_dist_css_path(entry)
+    content = dist_css.read_bytes()
+    hashed_name = get_hashed_name(entry.dist_css, content)
+    hashed_css = dist_css.with_name(PurePosixPath(hashed_name).name)
+    if hashed_css.exists():
+        # A build reverted to an earlier stylesheet, which is the most recent copy again.
+        hashed_css.touch()
+    else:
+        utils.write_file_atomic(hashed_css, content)
+    _prune_hashed_copies(dist_css, hashed_css)
+
+    manifest = {entry.dist_css: hashed_name}
+    utils.write_file_atomic(utils.get_full_manifest_path(entry), json.dumps(manifest).encode())
+    _read_manifest.cache_clear()
+    stylesheet_changed.send(sender=None)
+    return hashed_css
+
+
+@lru_cache
+def _read_manifest(manifest_path: str) -> dict[str, str]:
+    try:
+        return json.loads(Path(manifest_path).read_text())
+    except (OSError, ValueError):
+        return {}
+
+
+def get_dist_css(entry: Optional[utils.Entry] = None) -> str:
+    """Get the name of the compiled css of an entry to link, relative to the static files.
+
+    This is the hashed name from the manifest, if `TAILWIND_CLI_HASHED_FILENAMES` is active and a
+    manifest exists. Otherwise it is the `dist_css` of the entry.
+    """
+    entry = entry or utils.get_entry()
+    if not settings.TAILWIND_CLI_HASHED_FILENAMES:
+        return entry.dist_css
+    try:
+        manifest_path = utils.get_full_manifest_path(entry)
+    except ValueError:
+        return entry.dist_css
+    manifest = _read_manifest(str(manifest_path))
+    return manifest.get(entry.dist_css, entry.dist_css)
@@ -0,0 +1,144 @@
+"""
+Timings and sizes of production builds.
+
+`tailwind build` measures how long each phase of the build takes and how large the compiled
+stylesheets are, uncompressed and compressed with gzip. The sizes are stored next to each
+stylesheet, so that the next build can report how much the stylesheet grew or shrank.
+"""
+
+import gzip
+import json
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from typing import Any, NamedTuple, Optional
+
+from django_tailwind_cli import utils
+
+BUILT = "built"
+BUILT_BY_DAEMON = "built by daemon"
+RESTORED = "restored"
+UP_TO_DATE = "up to date"
+
+
+class Timings:
+    """Durations of the phases of a build in seconds.
+
+    The clock of the whole build starts with the creation of the timings.
+    """
+
+    def __init__(self) -> None:
+        self.phases: dict[str, float] = {}
+        self._start = time.perf_counter()
+        self._end: Optional[float] = None
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """Measure the duration of a phase. Repeated phases are added up."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = self.phases.get(name, 0.0) + time.perf_counter() - start
+
+    def stop(self) -> None:
+        """Stop the clock of the whole build."""
+        self._end = time.perf_counter()
+
+    @property
+    def total(self) -> float:
+        """Wall-clock time of the build until `stop` or until now.
+
+        This includes the time between the phases, e.g. waiting for the executor threads.
+        """
+        end = self._end if self._end is not None else time.perf_counter()
+        return end - self._start
+
+
+class StylesheetStats(NamedTuple):
+    """Sizes of a compiled stylesheet in bytes.
+
+    The deltas are None, if there is no previous build to compare with.
+    """
+
+    entry: str
+    path: str
+    status: str
+    size: int
+    gzip_size: int
+    size_delta: Optional[int]
+    gzip_size_delta: Optional[int]
+
+
+class BuildStats(NamedTuple):
+    """Timings of a build and the sizes of its stylesheets."""
+
+    timings: dict[str, float]
+    total_time: float
+    stylesheets: list[StylesheetStats]
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "timings": self.timings,
+            "total_time": self.total_time,
+            "stylesheets": [stylesheet._asdict() for stylesheet in self.stylesheets],
+        }
+
+
+def measure_stylesheet(entry: utils.Entry, status: str) -> Optional[StylesheetStats]:
+    """Measure the compiled css of an entry and remember its sizes for the next build.
+
+    Returns None, if there is no compiled css.
+    """
+    dist_css = utils.get_full_dist_css_path(entry)
+    try:
+        content = dist_css.read_bytes()
+    except OSError:
+        return None
+    size = len(content)
+    gzip_size = len(gzip.compress(content, compresslevel=9, mtime=0))
+
+    stats_path = utils.get_full_stats_path(entry)
+    try:
+        previous = json.loads(stats_path.read_text())
+        size_delta = size - previous["size"]
+        gzip_size_delta = gzip_size - previous["gzip_size"]
+    except (OSError, ValueError, KeyError, TypeError):
+        size_delta = gzip_size_delta = None
+    if status != UP_TO_DATE:
+        utils.write_file_atomic(
+            stats_path, json.dumps({"size": size, "gzip_size": gzip_size}).encode()
+        )
+
+    return StylesheetStats(
+        entry.name, str(dist_css), status, size, gzip_size, size_delta, gzip_size_delta
+    )
+
+
+def format_size(size: int) -> str:
+    """Format a size in bytes for humans."""
+    if abs(size) < 1024:
+        return f"{size} B"
+    return f"{size / 1024:.1f} KiB"
+
+
+def format_delta(delta: int) -> str:
+    """Format the change of a size in bytes for humans."""
+    return ("+" if delta >= 0 else "-") + format_size(abs(delta))
+
+
+def format_stylesheet(stylesheet: StylesheetStats) -> str:
+    """Describe the sizes of a stylesheet in a line of text."""
+    line = f"{format_size(stylesheet.size)} (gzip {format_size(stylesheet.gzip_size)})"
+    if stylesheet.size_delta is not None and stylesheet.gzip_size_delta is not None:
+        line += (
+            f", {format_delta(stylesheet.size_delta)} "
+            f"(gzip {format_delta(stylesheet.gzip_size_delta)}) since the previous build"
+        )
+    return line
+
+
+def format_timings(timings: dict[str, float], total_time: float) -> str:
+    """Describe the timings of a build in a line of text."""
+    phases = ", ".join(f"{name} {duration * 1000:.0f} ms" for name, duration in timings.items())
+    return f"{phases}, total {total_time * 1000:.0f} ms"
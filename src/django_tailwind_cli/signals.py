@@ -0,0 +1,12 @@
+"""Signals sent by django-tailwind-cli."""
+
+from django.dispatch import Signal
+
+# Sent when a file referenced by the `tailwind_css` template tag changed, e.g. the manifest of the
+# content hashed stylesheet or the critical css.
+stylesheet_changed = Signal()
+
+# Sent when `tailwind build` or `django_tailwind_cli.api.build` finished. The argument `stats` is a
+# `django_tailwind_cli.metrics.BuildStats` with the timings of the build and the sizes of the
+# stylesheets.
+build_finished = Signal()
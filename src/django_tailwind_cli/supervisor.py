@@ -0,0 +1,203 @@
+"""
+Supervision of several child processes from a single process.
+
+The supervisor starts the children with asyncio, prefixes each line of their output with the name of
+the child and restarts children that exit unexpectedly, waiting longer after each crash. When the
+supervisor stops, e.g. on Ctrl-C, all children are terminated and killed if they don't exit in time.
+"""
+
+import asyncio
+import signal
+import time
+import traceback
+from collections.abc import Awaitable, Sequence
+from pathlib import Path
+from typing import Callable, NamedTuple, Optional, Union
+
+RESTART_DELAY = 1.0
+MAX_RESTART_DELAY = 30.0
+# A child running for this long is considered stable, so the next restart happens quickly again.
+STABLE_AFTER = 10.0
+STOP_TIMEOUT = 5.0
+# The exit code, if a service fails. A crashed service, e.g. the live reload server, shouldn't go
+# unnoticed, so the supervisor stops the children.
+SERVICE_FAILED = 1
+
+# Stop the children, when the supervisor is asked to stop. Ctrl-C is delivered to the children by
+# the terminal itself.
+STOP_SIGNALS = [getattr(signal, name) for name in ("SIGTERM", "SIGHUP") if hasattr(signal, name)]
+
+
+class ChildProcess(NamedTuple):
+    """A command run by the supervisor.
+
+    If `restart` is False, the supervisor stops all children when this child exits. If
+    `prefix_output` is False, the child writes to the terminal directly, e.g. for interactive
+    debuggers.
+    """
+
+    name: str
+    cmd: list[str]
+    restart: bool = True
+    prefix_output: bool = True
+
+
+class Supervisor:
+    """Run child processes and multiplex their output.
+
+    `services` are coroutine functions, that run next to the children in the event loop of the
+    supervisor until it stops. `on_output` is called with the name of the child and the line for
+    each line of prefixed output.
+    """
+
+    def __init__(
+        self,
+        children: list[ChildProcess],
+        *,
+        write: Callable[[str], None],
+        cwd: Optional[Union[str, Path]] = None,
+        env: Optional[dict[str, str]] = None,
+        services: Sequence[Callable[[], Awaitable[None]]] = (),
+        on_output: Optional[Callable[[str, str], None]] = None,
+    ) -> None:
+        self.children = children
+        self.write = write
+        self.cwd = cwd
+        self.env = env
+        self.services = services
+        self.on_output = on_output
+        self._processes: dict[str, asyncio.subprocess.Process] = {}
+        self._received_signal: Optional[int] = None
+        self._width = max(len(child.name) for child in children)
+
+    def _prefix(self, name: str) -> str:
+        return f"[{name}]".ljust(self._width + 2) + " "
+
+    async def _pipe_output(self, name: str, stream: asyncio.StreamReader) -> None:
+        prefix = self._prefix(name)
+        while True:
+            line = await stream.readline()
+            if not line:
+                break
+            text = line.decode(errors="replace").rstrip()
+            if self.on_output is not None:
+                self.on_output(name, text)
+            self.write(prefix + text)
+
+    async def _run_child(self, child: ChildProcess) -> int:
+        delay = RESTART_DELAY
+        while True:
+            started = time.monotonic()
+            process = await asyncio.create_subprocess_exec(
+                *child.cmd,
+                cwd=self.cwd,
+                env=self.env,
+                stdout=asyncio.subprocess.PIPE if child.prefix_output else None,
+                stderr=asyncio.subprocess.STDOUT if child.prefix_output else None,
+            )
+            self._processes[child.name] = process
+            if process.stdout is not None:
+                await self._pipe_output(child.name, process.stdout)
+            returncode = await process.wait()
+            if not child.restart:
+                self.write(f"{self._prefix(child.name)}Exited with code {returncode}.")
+                return returncode
+
+            if time.monotonic() - started > STABLE_AFTER:
+                delay = RESTART_DELAY
+            self.write(
+                f"{self._prefix(child.name)}Exited with code {returncode}. "
+                f"Restarting in {delay:g}s."
+            )
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, MAX_RESTART_DELAY)
+
+    async def run(self) -> int:
+        """Run the children until one of them exits for good and return its exit code.
+
+        Children with `restart` set are restarted, so this only returns when a child without it
+        exits or a service fails. The traceback of a failed service is written and SERVICE_FAILED
+        is returned. All other children are stopped before returning. If the supervisor receives
+        SIGTERM or SIGHUP, it stops all children and returns 128 plus the number of the signal.
+        """
+        loop = asyncio.get_running_loop()
+        run_task = asyncio.current_task()
+        assert run_task is not None
+
+        def on_signal(signum: int) -> None:
+            self._received_signal = signum
+            run_task.cancel()
+
+        handled_signals = []
+        for signum in STOP_SIGNALS:
+            try:
+                loop.add_signal_handler(signum, on_signal, signum)
+            except (NotImplementedError, RuntimeError):
+                # Windows or not the main thread.
+                continue
+            handled_signals.append(signum)
+
+        service_tasks = {
+            asyncio.ensure_future(service()): getattr(service, "__name__", repr(service))
+            for service in self.services
+        }
+        tasks = [asyncio.ensure_future(self._run_child(child)) for child in self.children]
+        try:
+            pending = {*tasks, *service_tasks}
+            while True:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task not in service_tasks:
+                        return task.result()
+                    exception = task.exception()
+                    if exception is not None:
+                        self._report_service_failure(service_tasks[task], exception)
+                        return SERVICE_FAILED
+        except asyncio.CancelledError:
+            if self._received_signal is None:
+                raise
+            return 128 + self._received_signal
+        finally:
+            for signum in handled_signals:
+                loop.remove_signal_handler(signum)
+            for task in [*tasks, *service_tasks]:
+                task.cancel()
+            await asyncio.gather(*tasks, *service_tasks, return_exceptions=True)
+            await self.stop()
+
+    def _report_service_failure(self, name: str, exception: BaseException) -> None:
+        self.write(f"Service '{name}' failed. Stopping.")
+        for line in traceback.format_exception(type(exception), exception, exception.__traceback__):
+            for text in line.rstrip("\n").splitlines():
+                self.write(text)
+
+    async def stop(self) -> None:
+        """Terminate all running children and kill them, if they don't exit in time."""
+        running = [p for p in self._processes.values() if p.returncode is None]
+        for process in running:
+            try:
+                process.terminate()
+            except ProcessLookupError:
+                pass
+        for process in running:
+            try:
+                await asyncio.wait_for(process.wait(), STOP_TIMEOUT)
+            except asyncio.TimeoutError:
+                process.kill()
+                await process.wait()
+
+
+def run(
+    children: list[ChildProcess],
+    *,
+    write: Callable[[str], None],
+    cwd: Optional[Union[str, Path]] = None,
+    env: Optional[dict[str, str]] = None,
+    services: Sequence[Callable[[], Awaitable[None]]] = (),
+    on_output: Optional[Callable[[str, str], None]] = None,
+) -> int:
+    """Run the children with a supervisor and return the exit code of the child that ended it."""
+    supervisor = Supervisor(
+        children, write=write, cwd=cwd, env=env, services=services, on_output=on_output
+    )
+    return asyncio.run(supervisor.run())
@@ -0,0 +1,218 @@
+"""
+Persistent index of the template files.
+
+The index remembers the listing of every template directory along with its modification time and
+the size, modification time and SHA-256 digest of every template file. When it is refreshed, only
+the directories whose modification time changed are listed again and only the files whose size or
+modification time changed are hashed again. The index is stored in `TAILWIND_CLI_CACHE_DIR`, so
+that the template tree is walked at most once per change, no matter which management command
+needs the templates.
+"""
+
+import hashlib
+import json
+import os
+import time
+from collections.abc import Iterator
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from fnmatch import fnmatch
+from pathlib import Path
+from typing import Any, NamedTuple, Optional
+
+from django_tailwind_cli import utils
+from django_tailwind_cli.conf import settings
+
+INDEX_VERSION = 1
+
+# Entries modified less than two seconds before they were read are not trusted, because a second
+# modification within the resolution of the file system timestamps would go unnoticed.
+RACY_NS = 2_000_000_000
+
+MAX_WORKERS = min(32, (os.cpu_count() or 1) + 4)
+
+
+class TemplateFile(NamedTuple):
+    """A template file as stored in the index."""
+
+    path: str
+    size: int
+    mtime_ns: int
+    sha256: str
+
+
+def _is_ignored(name: str, ignore_patterns: list[str]) -> bool:
+    return any(fnmatch(name, pattern) for pattern in ignore_patterns)
+
+
+def _trusted_mtime_ns(mtime_ns: int, now_ns: int) -> int:
+    return mtime_ns if now_ns - mtime_ns > RACY_NS else -1
+
+
+class TemplateIndex:
+    """Index of the template files of a project."""
+
+    def __init__(self, index_file: Optional[Path] = None) -> None:
+        self.index_file = index_file
+        self._ignore_patterns: list[str] = []
+        self._dirs: dict[str, dict[str, Any]] = {}
+        # Maps the path of a file to its size, trusted modification time and digest.
+        self._files: dict[str, list[Any]] = {}
+        # Whether the index changed since it was loaded or saved.
+        self._dirty = False
+        self._load()
+
+    def _load(self) -> None:
+        if self.index_file is None:
+            return
+        try:
+            data = json.loads(self.index_file.read_text())
+        except (OSError, ValueError):
+            return
+        if not isinstance(data, dict) or data.get("version") != INDEX_VERSION:
+            return
+        self._ignore_patterns = data["ignore_patterns"]
+        self._dirs = data["dirs"]
+        self._files = data["files"]
+
+    def save(self) -> None:
+        """Store the index in its index file."""
+        if self.index_file is None:
+            return
+        data = {
+            "version": INDEX_VERSION,
+            "ignore_patterns": self._ignore_patterns,
+            "dirs": self._dirs,
+            "files": self._files,
+        }
+        utils.write_file_atomic(self.index_file, json.dumps(data).encode())
+        self._dirty = False
+
+    def _save_if_dirty(self) -> None:
+        if self._dirty:
+            self.save()
+
+    def _list_dir(self, path: str, now_ns: int) -> Optional[tuple[str, dict[str, Any]]]:
+        try:
+            mtime_ns = os.stat(path).st_mtime_ns
+        except OSError:
+            return None
+
+        cached = self._dirs.get(path)
+        if cached is not None and cached["mtime_ns"] == mtime_ns:
+            return path, cached
+
+        file_names: list[str] = []
+        dir_names: list[str] = []
+        try:
+            with os.scandir(path) as it:
+                for entry in it:
+                    if _is_ignored(entry.name, self._ignore_patterns):
+                        continue
+                    if entry.is_dir(follow_symlinks=False):
+                        dir_names.append(entry.name)
+                    elif entry.name.endswith(utils.TEMPLATE_EXTENSIONS):
+                        file_names.append(entry.name)
+        except OSError:
+            return None
+        listing = {
+            "mtime_ns": _trusted_mtime_ns(mtime_ns, now_ns),
+            "files": file_names,
+            "dirs": dir_names,
+        }
+        return path, listing
+
+    def _refresh_dirs(self) -> Iterator[str]:
+        ignore_patterns = list(settings.TAILWIND_CLI_TEMPLATE_IGNORE_PATTERNS)
+        if ignore_patterns != self._ignore_patterns:
+            self._ignore_patterns = ignore_patterns
+            self._dirs = {}
+            self._dirty = True
+
+        now_ns = time.time_ns()
+        dirs: dict[str, dict[str, Any]] = {}
+        seen: set[str] = set()
+        with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+
+            def submit(path: str) -> None:
+                if path not in seen:
+                    seen.add(path)
+                    pending.add(executor.submit(self._list_dir, path, now_ns))
+
+            pending: set = set()
+            for template_dir in utils.get_template_dirs():
+                submit(str(template_dir))
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    result = future.result()
+                    if result is None:
+                        continue
+                    path, listing = result
+                    if listing != self._dirs.get(path):
+                        self._dirty = True
+                    dirs[path] = listing
+                    for dir_name in listing["dirs"]:
+                        submit(os.path.join(path, dir_name))
+                    for file_name in listing["files"]:
+                        yield os.path.join(path, file_name)
+        if dirs.keys() != self._dirs.keys():
+            self._dirty = True
+        self._dirs = dirs
+
+    def iter_files(self) -> Iterator[str]:
+        """Refresh the index and iterate over the paths of all template files.
+
+        The paths are yielded as soon as their directory has been processed, so their order is not
+        stable.
+        """
+        yield from self._refresh_dirs()
+        self._save_if_dirty()
+
+    def files(self) -> list[str]:
+        """Refresh the index and get a sorted list of the paths of all template files."""
+        return sorted(self.iter_files())
+
+    def _hash_file(self, path: str, now_ns: int) -> Optional[TemplateFile]:
+        try:
+            stat = os.stat(path)
+            cached = self._files.get(path)
+            if cached is not None and cached[:2] == [stat.st_size, stat.st_mtime_ns]:
+                sha256 = cached[2]
+            else:
+                sha256 = hashlib.sha256(Path(path).read_bytes()).hexdigest()
+        except OSError:
+            return None
+        file_entry = [stat.st_size, _trusted_mtime_ns(stat.st_mtime_ns, now_ns), sha256]
+        if file_entry != self._files.get(path):
+            self._files[path] = file_entry
+            self._dirty = True
+        return TemplateFile(path, stat.st_size, stat.st_mtime_ns, sha256)
+
+    def entries(self) -> list[TemplateFile]:
+        """Refresh the index and get all template files sorted by their path."""
+        paths = sorted(self._refresh_dirs())
+        now_ns = time.time_ns()
+        with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+            template_files = [
+                f
+                for f in executor.map(lambda path: self._hash_file(path, now_ns), paths)
+                if f is not None
+            ]
+        if len(self._files) != len(template_files):
+            self._files = {f.path: self._files[f.path] for f in template_files}
+            self._dirty = True
+        self._save_if_dirty()
+        return template_files
+
+
+_template_index: Optional[TemplateIndex] = None
+
+
+def get_template_index() -> TemplateIndex:
+    """Get the template index of the current project."""
+    global _template_index
+    cache_dir = utils.get_cache_dir()
+    index_file = cache_dir / "templates.json" if cache_dir is not None else None
+    if _template_index is None or _template_index.index_file != index_file:
+        _template_index = TemplateIndex(index_file)
+    return _template_index
@@ -1,15 +1,67 @@
 """Tailwind template tags."""
 
-from typing import Union
+from functools import lru_cache
+from typing import Any, Optional, Union
 
 from django import template
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.template import Context
+from django.utils.safestring import SafeString, mark_safe
 
+from django_tailwind_cli import critical, livereload, manifest, utils
 from django_tailwind_cli.conf import settings
+from django_tailwind_cli.signals import stylesheet_changed
 
 register = template.Library()
 
 
-@register.inclusion_tag("tailwind_cli/tailwind_css.html")
-def tailwind_css() -> dict[str, Union[bool, str]]:
-    """Template tag to include the css files into the html templates."""
-    return {"debug": settings.DEBUG, "tailwind_dist_css": settings.TAILWIND_CLI_DIST_CSS}
+def get_tailwind_css_context(
+    entry_name: Optional[str] = None,
+) -> dict[str, Union[bool, Optional[str]]]:
+    """Get the context to render `tailwind_cli/tailwind_css.html` with."""
+    entry = utils.get_entry(entry_name)
+    if settings.DEBUG:
+        # The watcher only updates the unhashed stylesheet.
+        return {
+            "debug": True,
+            "tailwind_dist_css": entry.dist_css,
+            "tailwind_live_reload_url": (
+                livereload.get_live_reload_url() if settings.TAILWIND_CLI_LIVE_RELOAD else None
+            ),
+        }
+    return {
+        "debug": False,
+        "tailwind_dist_css": manifest.get_dist_css(entry),
+        "tailwind_critical_css": critical.get_critical_css(entry),
+    }
+
+
+@lru_cache
+def _render_tailwind_css(engine: template.Engine, entry_name: Optional[str]) -> SafeString:
+    html = engine.get_template("tailwind_cli/tailwind_css.html").render(
+        Context(get_tailwind_css_context(entry_name), autoescape=engine.autoescape)
+    )
+    return mark_safe(html)  # noqa: S308
+
+
+def clear_cache() -> None:
+    """Forget the html rendered by the `tailwind_css` tag."""
+    _render_tailwind_css.cache_clear()
+
+
+@receiver(setting_changed)
+@receiver(stylesheet_changed)
+def _clear_cache_on_change(**kwargs: Any) -> None:  # noqa: ARG001
+    clear_cache()
+
+
+@register.simple_tag(takes_context=True)
+def tailwind_css(context: Context, entry_name: Optional[str] = None) -> SafeString:
+    """Template tag to include the css files into the html templates.
+
+    The name of an entry of `TAILWIND_CLI_ENTRIES` selects the stylesheet. By default the first
+    entry is used. The html is rendered once per process and template engine, so it depends on the
+    settings and on the files written by `tailwind build`, but not on the context.
+    """
+    return _render_tailwind_css(context.template.engine, entry_name)
@@ -0,0 +1,143 @@
+"""
+Report of the classes used by the templates.
+
+`tailwind stats` extracts the class name candidates of every template and intersects them with the
+classes of the compiled stylesheets. The report shows how many classes each template and each app
+uses, which templates contribute the most classes no other template uses, and which templates
+don't contribute any class at all. Templates without classes can be excluded from the content of
+the CLI, and classes only used by a single template are candidates for a cleanup.
+"""
+
+import os
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, NamedTuple, Optional
+
+from django.apps import apps
+
+from django_tailwind_cli import extract, utils
+from django_tailwind_cli.conf import settings
+from django_tailwind_cli.template_index import MAX_WORKERS
+
+PROJECT_LABEL = "(project)"
+
+
+class TemplateUsage(NamedTuple):
+    """Classes used by a template.
+
+    `unique_classes` counts the classes, that no other template uses.
+    """
+
+    path: str
+    app: str
+    classes: int
+    unique_classes: int
+
+
+class AppUsage(NamedTuple):
+    """Classes used by the templates of an app."""
+
+    app: str
+    templates: int
+    classes: int
+
+
+class UsageReport(NamedTuple):
+    """Classes used by all templates of the project.
+
+    `css_classes` is None, if no compiled stylesheet exists. The counts are based on all class
+    name candidates of the templates then.
+    """
+
+    templates: list[TemplateUsage]
+    apps: list[AppUsage]
+    classes: int
+    css_classes: Optional[int]
+
+    def heaviest_templates(self, limit: int) -> list[TemplateUsage]:
+        """Get the templates contributing the most classes, that no other template uses."""
+        templates = [t for t in self.templates if t.unique_classes]
+        return sorted(templates, key=lambda t: (-t.unique_classes, -t.classes, t.path))[:limit]
+
+    def templates_without_classes(self) -> list[TemplateUsage]:
+        return [t for t in self.templates if not t.classes]
+
+    def as_dict(self, limit: int) -> dict[str, Any]:
+        return {
+            "classes": self.classes,
+            "css_classes": self.css_classes,
+            "apps": [app._asdict() for app in self.apps],
+            "heaviest_templates": [t._asdict() for t in self.heaviest_templates(limit)],
+            "templates_without_classes": [t.path for t in self.templates_without_classes()],
+            "templates": [t._asdict() for t in self.templates],
+        }
+
+
+def get_css_classes() -> Optional[set[str]]:
+    """Get the classes of the compiled stylesheets of all entries or None, if there are none."""
+    css_classes: Optional[set[str]] = None
+    for entry in utils.get_entries():
+        try:
+            css = utils.get_full_dist_css_path(entry).read_text()
+        except OSError:
+            continue
+        css_classes = (css_classes or set()) | extract.extract_css_classes(css)
+    return css_classes
+
+
+def get_app_label(path: str, app_paths: list[tuple[str, str]]) -> str:
+    """Get the label of the app containing a template or PROJECT_LABEL.
+
+    `app_paths` are pairs of the path and the label of the apps, the longest paths first.
+    """
+    for app_path, label in app_paths:
+        if path.startswith(app_path):
+            return label
+    return PROJECT_LABEL
+
+
+def _get_app_paths() -> list[tuple[str, str]]:
+    app_paths = []
+    base_dir = os.path.join(Path(settings.BASE_DIR).resolve(), "")
+    for app_config in apps.get_app_configs():
+        app_path = os.path.join(Path(app_config.path).resolve(), "")
+        # An app containing the whole project, e.g. in tests, would claim every template.
+        if base_dir.startswith(app_path):
+            continue
+        app_paths.append((app_path, app_config.label))
+    return sorted(app_paths, key=lambda app_path: -len(app_path[0]))
+
+
+def collect_usage(template_files: list[str], css_classes: Optional[set[str]] = None) -> UsageReport:
+    """Collect the classes used by the template files.
+
+    Without `css_classes` all class name candidates of the templates count as classes.
+    """
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        candidates = list(executor.map(extract.extract_file_candidates, template_files))
+    if css_classes is not None:
+        candidates = [c & css_classes for c in candidates]
+
+    counts: Counter[str] = Counter()
+    for classes in candidates:
+        counts.update(classes)
+
+    app_paths = _get_app_paths()
+    templates = []
+    app_classes: dict[str, set[str]] = {}
+    app_templates: Counter[str] = Counter()
+    for path, classes in zip(template_files, candidates):
+        app = get_app_label(str(Path(path).resolve()), app_paths)
+        unique_classes = sum(1 for c in classes if counts[c] == 1)
+        templates.append(TemplateUsage(path, app, len(classes), unique_classes))
+        app_classes.setdefault(app, set()).update(classes)
+        app_templates[app] += 1
+
+    app_usages = sorted(
+        (AppUsage(app, app_templates[app], len(classes)) for app, classes in app_classes.items()),
+        key=lambda app: (-app.classes, app.app),
+    )
+    return UsageReport(
+        templates, app_usages, len(counts), len(css_classes) if css_classes is not None else None
+    )
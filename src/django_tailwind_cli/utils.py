@@ -5,13 +5,98 @@ This module contains utility functions to read the configuration, download the C
 the various paths.
 """
 
+import hashlib
+import json
 import os
 import platform
+import sys
+import tempfile
+from collections.abc import Iterator
+from contextlib import contextmanager
+from functools import lru_cache
+from glob import iglob
 from pathlib import Path
+from typing import TYPE_CHECKING, Any, Callable, NamedTuple, Optional, Union
 
-from django_tailwind_cli.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.template import engines
+from django.template.backends.django import DjangoTemplates
 
+from django_tailwind_cli.conf import DEFAULT_SRC_REPO, settings
 
+if TYPE_CHECKING:
+    from django_tailwind_cli.template_index import TemplateFile
+
+TEMPLATE_EXTENSIONS = (".html", ".txt")
+
+DEFAULT_ENTRY_NAME = "default"
+
+# Levels of the messages reported while the CLI is installed or the stylesheets are built.
+MESSAGE_INFO = "info"
+MESSAGE_SUCCESS = "success"
+MESSAGE_ERROR = "error"
+
+# Called with the text and the level of a message.
+MessageCallback = Callable[[str, str], None]
+
+
+class Entry(NamedTuple):
+    """A stylesheet built by the Tailwind CSS CLI."""
+
+    name: str
+    src_css: Optional[str]
+    dist_css: str
+    config_file: str
+
+
+@lru_cache
+def get_entries() -> tuple[Entry, ...]:
+    """Get the stylesheets to build.
+
+    If `TAILWIND_CLI_ENTRIES` is empty, there is a single entry named `default`, which is
+    configured by `TAILWIND_CLI_SRC_CSS`, `TAILWIND_CLI_DIST_CSS` and `TAILWIND_CLI_CONFIG_FILE`.
+    """
+    if not settings.TAILWIND_CLI_ENTRIES:
+        return (
+            Entry(
+                DEFAULT_ENTRY_NAME,
+                settings.TAILWIND_CLI_SRC_CSS,
+                settings.TAILWIND_CLI_DIST_CSS,
+                settings.TAILWIND_CLI_CONFIG_FILE,
+            ),
+        )
+
+    entries: dict[str, Entry] = {}
+    for entry in settings.TAILWIND_CLI_ENTRIES:
+        if "name" not in entry or "dist_css" not in entry:
+            msg = "Each entry of TAILWIND_CLI_ENTRIES needs a 'name' and a 'dist_css'."
+            raise ValueError(msg)
+        if entry["name"] in entries:
+            msg = f"Duplicate entry '{entry['name']}' in TAILWIND_CLI_ENTRIES."
+            raise ValueError(msg)
+        entries[entry["name"]] = Entry(
+            entry["name"],
+            entry.get("src_css"),
+            entry["dist_css"],
+            entry.get("config_file", settings.TAILWIND_CLI_CONFIG_FILE),
+        )
+    return tuple(entries.values())
+
+
+def get_entry(name: Optional[str] = None) -> Entry:
+    """Get the entry with the given name or the first entry, if no name is given."""
+    entries = get_entries()
+    if name is None:
+        return entries[0]
+    for entry in entries:
+        if entry.name == name:
+            return entry
+    msg = f"Unknown entry '{name}'. Add it to TAILWIND_CLI_ENTRIES."
+    raise ValueError(msg)
+
+
+@lru_cache
 def get_system_and_machine() -> tuple[str, str]:
     """Get the system and machine name."""
     system = platform.system().lower()
@@ -37,8 +122,27 @@ def get_download_url() -> str:
     )
 
 
+def get_src_repo_note() -> str:
+    """Get the note on a custom `TAILWIND_CLI_SRC_REPO` for the messages about the CLI."""
+    if settings.TAILWIND_CLI_SRC_REPO == DEFAULT_SRC_REPO:
+        return ""
+    return f" from '{settings.TAILWIND_CLI_SRC_REPO}'"
+
+
+def get_checksums_url() -> str:
+    """Get the url of the SHA-256 checksums published along with the Tailwind CSS CLI."""
+    return (
+        f"https://github.com/{settings.TAILWIND_CLI_SRC_REPO}/releases/download/"
+        f"v{settings.TAILWIND_CLI_VERSION}/sha256sums.txt"
+    )
+
+
+@lru_cache
 def get_full_cli_path() -> Path:
-    """Get path to the Tailwind CSS CLI."""
+    """Get path to the Tailwind CSS CLI.
+
+    The path is resolved once per process, until the settings change.
+    """
 
     cli_path = Path(settings.TAILWIND_CLI_PATH).expanduser() if settings.TAILWIND_CLI_PATH else None
 
@@ -56,26 +160,426 @@ def get_full_cli_path() -> Path:
         return cli_path / executable_name
 
 
-def get_full_src_css_path() -> Path:
-    """Get path to the source css."""
-    if settings.TAILWIND_CLI_SRC_CSS is None:
+def get_shared_cache_dir() -> Optional[Path]:
+    """Get path to the machine-wide cache of CLI binaries or None, if it is disabled."""
+    if not settings.TAILWIND_CLI_SHARED_CACHE:
+        return None
+    if sys.platform == "win32":
+        cache_home = os.environ.get("LOCALAPPDATA") or Path("~/AppData/Local").expanduser()
+    else:
+        cache_home = os.environ.get("XDG_CACHE_HOME") or Path("~/.cache").expanduser()
+    return Path(cache_home) / "django-tailwind-cli"
+
+
+@contextmanager
+def file_lock(lock_file: Path) -> Iterator[None]:
+    """Hold an exclusive inter-process lock on `lock_file` while the context is active."""
+    lock_file.parent.mkdir(parents=True, exist_ok=True)
+    with lock_file.open("a+b") as f:
+        if sys.platform == "win32":
+            import msvcrt
+
+            f.seek(0)
+            while True:
+                try:
+                    msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:
+                    # LK_LOCK gives up after 10 seconds, keep on waiting.
+                    continue
+            try:
+                yield
+            finally:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+        else:
+            import fcntl
+
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+@lru_cache
+def get_full_src_css_path(entry: Optional[Entry] = None) -> Path:
+    """Get path to the source css of an entry. Defaults to the first entry."""
+    entry = entry or get_entry()
+    if entry.src_css is None:
         msg = "No source CSS file specified. Please set TAILWIND_SRC_CSS in your settings."
         raise ValueError(msg)
-    return Path(settings.BASE_DIR) / settings.TAILWIND_CLI_SRC_CSS
+    return Path(settings.BASE_DIR) / entry.src_css
 
 
-def get_full_dist_css_path() -> Path:
-    """Get path to the compiled css."""
+@lru_cache
+def get_full_dist_css_path(entry: Optional[Entry] = None) -> Path:
+    """Get path to the compiled css of an entry. Defaults to the first entry."""
     if settings.STATICFILES_DIRS is None or len(settings.STATICFILES_DIRS) == 0:
         msg = "STATICFILES_DIRS is empty. Please add a path to your static files."
         raise ValueError(msg)
 
-    return Path(settings.STATICFILES_DIRS[0]) / settings.TAILWIND_CLI_DIST_CSS
+    entry = entry or get_entry()
+    return Path(settings.STATICFILES_DIRS[0]) / entry.dist_css
+
+
+def get_full_config_file_path(entry: Optional[Entry] = None) -> Path:
+    """Get path to the tailwind.config.js file of an entry. Defaults to the first entry."""
+    entry = entry or get_entry()
+    return Path(settings.BASE_DIR) / entry.config_file
+
+
+def get_full_manifest_path(entry: Optional[Entry] = None) -> Path:
+    """Get path to the manifest of the content hashed compiled css."""
+    dist_css = get_full_dist_css_path(entry)
+    return dist_css.parent / f".{dist_css.name}.manifest.json"
+
+
+def get_full_critical_css_path(entry: Optional[Entry] = None) -> Path:
+    """Get path to the critical css.
+
+    The file is stored next to the compiled css. Its name starts with a dot, so that
+    `collectstatic` ignores it, as it is inlined and never served on its own.
+    """
+    dist_css = get_full_dist_css_path(entry)
+    return dist_css.parent / f".{dist_css.stem}.critical{dist_css.suffix}"
+
+
+def uses_generated_config() -> bool:
+    """Check if the CLI is run with a generated config file computing the `content`."""
+    return settings.TAILWIND_CLI_AUTO_CONTENT or settings.TAILWIND_CLI_EXTRACT_CLASSES
+
+
+def get_full_candidates_path() -> Path:
+    """Get path to the class name candidates extracted for `TAILWIND_CLI_EXTRACT_CLASSES`.
+
+    The file is stored in the project cache or next to the default tailwind.config.js file, if the
+    cache is disabled.
+    """
+    cache_dir = get_cache_dir()
+    if cache_dir is None:
+        return Path(settings.BASE_DIR) / ".tailwind.candidates.txt"
+    return cache_dir / "candidates.txt"
+
+
+def get_full_generated_config_file_path(entry: Optional[Entry] = None) -> Path:
+    """Get path to the config file generated for `TAILWIND_CLI_AUTO_CONTENT`.
+
+    The file is stored next to the tailwind.config.js file, so that modules required by the
+    configuration are resolved the same way.
+    """
+    config_file = get_full_config_file_path(entry)
+    return config_file.parent / f".{config_file.stem}.django{config_file.suffix}"
+
+
+def get_content_globs() -> list[str]:
+    """Get the content globs matching the templates of the template directories.
+
+    With `TAILWIND_CLI_EXTRACT_CLASSES` the file with the extracted candidates replaces the
+    templates. The globs in `TAILWIND_CLI_EXTRA_CONTENT` are appended. Relative globs are resolved
+    against the `BASE_DIR`.
+    """
+    extensions = ",".join(extension.lstrip(".") for extension in TEMPLATE_EXTENSIONS)
+    content: list[str] = []
+    if settings.TAILWIND_CLI_EXTRACT_CLASSES:
+        content.append(get_full_candidates_path().as_posix())
+    else:
+        for template_dir in get_template_dirs():
+            template_dir = Path(settings.BASE_DIR) / template_dir
+            content.append(f"{template_dir.as_posix()}/**/*.{{{extensions}}}")
+            content.extend(
+                f"!{template_dir.as_posix()}/**/{pattern}/**"
+                for pattern in settings.TAILWIND_CLI_TEMPLATE_IGNORE_PATTERNS
+            )
+    for glob in settings.TAILWIND_CLI_EXTRA_CONTENT:
+        negated = glob.startswith("!")
+        path = (Path(settings.BASE_DIR) / glob.lstrip("!")).as_posix()
+        content.append(f"!{path}" if negated else path)
+    return content
+
+
+def _expand_braces(pattern: str) -> list[str]:
+    """Expand the `{a,b}` groups of a glob, which the CLI supports and the glob module doesn't."""
+    start = pattern.find("{")
+    end = pattern.find("}", start)
+    if start < 0 or end < 0:
+        return [pattern]
+    return [
+        expanded
+        for option in pattern[start + 1 : end].split(",")
+        for expanded in _expand_braces(pattern[:start] + option + pattern[end + 1 :])
+    ]
+
+
+def _glob_files(pattern: str) -> set[str]:
+    return {
+        path
+        for expanded in _expand_braces(pattern)
+        for path in iglob(expanded, recursive=True)
+        if os.path.isfile(path)
+    }
+
+
+def get_extra_content_files() -> list[Path]:
+    """Get the files matching the globs in `TAILWIND_CLI_EXTRA_CONTENT`.
 
+    Relative globs are resolved against the `BASE_DIR`. Files matching a glob starting with `!` are
+    left out.
+    """
+    files: set[str] = set()
+    excluded: set[str] = set()
+    for pattern in settings.TAILWIND_CLI_EXTRA_CONTENT:
+        if pattern.startswith("!"):
+            excluded |= _glob_files(str(Path(settings.BASE_DIR) / pattern[1:]))
+        else:
+            files |= _glob_files(str(Path(settings.BASE_DIR) / pattern))
+    return [Path(path) for path in sorted(files - excluded)]
 
-def get_full_config_file_path() -> Path:
-    """Get path to the tailwind.config.js file."""
-    return Path(settings.BASE_DIR) / settings.TAILWIND_CLI_CONFIG_FILE
+
+def write_generated_config_file(entry: Optional[Entry] = None) -> Path:
+    """Write a config file extending tailwind.config.js with the content globs of the project.
+
+    The file is only touched, if its content changes. Otherwise the watcher of the CLI would
+    rebuild the stylesheet.
+    """
+    generated_config_file = get_full_generated_config_file_path(entry)
+    config = GENERATED_TAILWIND_CONFIG.format(
+        config_file=json.dumps(str(get_full_config_file_path(entry))),
+        content=json.dumps(get_content_globs(), indent=4),
+    )
+    try:
+        if generated_config_file.read_text() == config:
+            return generated_config_file
+    except OSError:
+        pass
+    write_file_atomic(generated_config_file, config.encode())
+    return generated_config_file
+
+
+def get_full_fingerprint_path(entry: Optional[Entry] = None) -> Path:
+    """Get path to the fingerprint of the last production build.
+
+    The file is stored next to the compiled css. Its name starts with a dot, so that
+    `collectstatic` ignores it.
+    """
+    dist_css = get_full_dist_css_path(entry)
+    return dist_css.parent / f".{dist_css.name}.fingerprint"
+
+
+def get_full_stats_path(entry: Optional[Entry] = None) -> Path:
+    """Get path to the sizes of the compiled css of the last production build.
+
+    The file is stored next to the compiled css. Its name starts with a dot, so that
+    `collectstatic` ignores it.
+    """
+    dist_css = get_full_dist_css_path(entry)
+    return dist_css.parent / f".{dist_css.name}.stats.json"
+
+
+def get_template_dirs() -> list[Path]:
+    """Get the template directories of all configured template engines.
+
+    For the Django template engine the directories are taken from its template loaders, so that
+    app directories are also found, if the loaders are configured explicitly.
+    """
+    template_dirs: list[Path] = []
+    for backend in engines.all():
+        if isinstance(backend, DjangoTemplates):
+            for loader in backend.engine.template_loaders:
+                if hasattr(loader, "get_dirs"):
+                    template_dirs.extend(Path(d) for d in loader.get_dirs())
+        else:
+            template_dirs.extend(Path(d) for d in backend.template_dirs)
+    return list(dict.fromkeys(template_dirs))
+
+
+def get_template_files() -> list[str]:
+    """Get a sorted list of the template files of all template directories."""
+    from django_tailwind_cli.template_index import get_template_index
+
+    return get_template_index().files()
+
+
+def get_build_fingerprint(
+    build_cmd: list[str],
+    entry: Optional[Entry] = None,
+    template_files: Optional[list["TemplateFile"]] = None,
+) -> str:
+    """Calculate a digest of all the inputs of a production build.
+
+    The digest covers the version of the CLI, the command line, the post-processing options, the
+    Tailwind CSS config file, the source css, all the templates of the project and the files
+    matching `TAILWIND_CLI_EXTRA_CONTENT`. The templates are taken from the template index, unless
+    they are passed in `template_files`.
+
+    Paths are hashed relative to the `BASE_DIR`, so that a checkout of the same project at another
+    path, e.g. in CI or another worktree, gets the same fingerprint and hits the build cache.
+    """
+    base_dir = Path(settings.BASE_DIR)
+    digest = hashlib.sha256()
+
+    def relative(value: Union[str, Path]) -> str:
+        path = Path(value)
+        if not path.is_absolute():
+            return str(value)
+        try:
+            return path.relative_to(base_dir).as_posix()
+        except ValueError:
+            return str(value)
+
+    def update(name: str, value: bytes) -> None:
+        digest.update(name.encode())
+        digest.update(b"\0")
+        digest.update(str(len(value)).encode())
+        digest.update(b"\0")
+        digest.update(value)
+
+    def update_file(path: Union[str, Path]) -> None:
+        try:
+            content = Path(path).read_bytes()
+        except OSError:
+            content = b""
+        # The generated config contains the absolute paths of the content globs.
+        content = content.replace(base_dir.as_posix().encode(), b".")
+        update(relative(path), content)
+
+    # The template index is built on top of these utilities.
+    from django_tailwind_cli.template_index import get_template_index
+
+    update("version", settings.TAILWIND_CLI_VERSION.encode())
+    # The name of the CLI contains its version, wherever it is installed.
+    cmd = [Path(build_cmd[0]).name, *(relative(arg) for arg in build_cmd[1:])]
+    update("command", "\0".join(cmd).encode())
+    update("hashed_filenames", str(settings.TAILWIND_CLI_HASHED_FILENAMES).encode())
+    update("precompress", ",".join(settings.TAILWIND_CLI_PRECOMPRESS).encode())
+    update("critical_templates", "\0".join(settings.TAILWIND_CLI_CRITICAL_TEMPLATES).encode())
+    entry = entry or get_entry()
+    update_file(get_full_config_file_path(entry))
+    if uses_generated_config():
+        update_file(get_full_generated_config_file_path(entry))
+    if entry.src_css is not None:
+        update_file(get_full_src_css_path(entry))
+    if template_files is None:
+        template_files = get_template_index().entries()
+    for template_file in template_files:
+        update(relative(template_file.path), template_file.sha256.encode())
+    # The CLI only reads the extra content through the generated config.
+    if uses_generated_config():
+        for path in get_extra_content_files():
+            try:
+                content_digest = hashlib.sha256(path.read_bytes()).hexdigest()
+            except OSError:
+                continue
+            update(relative(path), content_digest.encode())
+
+    return digest.hexdigest()
+
+
+def is_build_up_to_date(fingerprint: str, entry: Optional[Entry] = None) -> bool:
+    """Check if the compiled css has been built from inputs with the given fingerprint."""
+    fingerprint_path = get_full_fingerprint_path(entry)
+    if not get_full_dist_css_path(entry).exists() or not fingerprint_path.exists():
+        return False
+    if settings.TAILWIND_CLI_CRITICAL_TEMPLATES and not get_full_critical_css_path(entry).exists():
+        return False
+    return fingerprint_path.read_text().strip() == fingerprint
+
+
+def write_build_fingerprint(fingerprint: str, entry: Optional[Entry] = None) -> None:
+    """Store the fingerprint of the inputs next to the compiled css."""
+    if get_full_dist_css_path(entry).exists():
+        get_full_fingerprint_path(entry).write_text(fingerprint)
+
+
+def get_cache_dir() -> Optional[Path]:
+    """Get path to the project cache or None, if the cache is disabled."""
+    if not settings.TAILWIND_CLI_CACHE_DIR:
+        return None
+    return Path(settings.BASE_DIR) / Path(settings.TAILWIND_CLI_CACHE_DIR).expanduser()
+
+
+def get_build_cache_dir() -> Optional[Path]:
+    """Get path to the build cache or None, if the build cache is disabled."""
+    if not settings.TAILWIND_CLI_BUILD_CACHE_DIR:
+        return None
+    return Path(settings.BASE_DIR) / Path(settings.TAILWIND_CLI_BUILD_CACHE_DIR).expanduser()
+
+
+def write_file_atomic(dest: Path, content: bytes) -> None:
+    """Write `content` to a temporary file and move it to `dest`."""
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_name = tempfile.mkstemp(dir=dest.parent, prefix=f".{dest.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as tmp_file:
+            tmp_file.write(content)
+        os.replace(tmp_name, dest)
+    except BaseException:
+        Path(tmp_name).unlink(missing_ok=True)
+        raise
+
+
+def restore_from_build_cache(fingerprint: str, entry: Optional[Entry] = None) -> bool:
+    """Copy a cached build with the given fingerprint to the compiled css path.
+
+    Returns True, if the build cache contained a matching stylesheet.
+    """
+    cache_dir = get_build_cache_dir()
+    if cache_dir is None:
+        return False
+
+    cached_css = cache_dir / f"{fingerprint}.css"
+    try:
+        content = cached_css.read_bytes()
+    except FileNotFoundError:
+        return False
+    write_file_atomic(get_full_dist_css_path(entry), content)
+
+    # Mark the entry as recently used for the LRU eviction.
+    cached_css.touch()
+    return True
+
+
+def store_in_build_cache(fingerprint: str, entry: Optional[Entry] = None) -> None:
+    """Store the compiled css in the build cache and evict the least recently used entries."""
+    cache_dir = get_build_cache_dir()
+    dist_css = get_full_dist_css_path(entry)
+    if cache_dir is None or not dist_css.exists():
+        return
+
+    write_file_atomic(cache_dir / f"{fingerprint}.css", dist_css.read_bytes())
+
+    entries: list[tuple[float, int, Path]] = []
+    for cached_css in cache_dir.glob("*.css"):
+        try:
+            stat = cached_css.stat()
+        except FileNotFoundError:
+            continue
+        entries.append((stat.st_mtime, stat.st_size, cached_css))
+
+    total_size = sum(size for _, size, _ in entries)
+    for _, size, cached_css in sorted(entries):
+        if total_size <= settings.TAILWIND_CLI_BUILD_CACHE_MAX_SIZE:
+            break
+        cached_css.unlink(missing_ok=True)
+        total_size -= size
+
+
+def clear_cache() -> None:
+    """Forget the paths resolved from the settings.
+
+    This happens automatically, when the settings are changed with Django's `override_settings`.
+    """
+    get_system_and_machine.cache_clear()
+    get_entries.cache_clear()
+    get_full_cli_path.cache_clear()
+    get_full_src_css_path.cache_clear()
+    get_full_dist_css_path.cache_clear()
+
+
+@receiver(setting_changed)
+def _clear_cache_on_setting_changed(*, setting: str, **kwargs: Any) -> None:  # noqa: ARG001
+    if setting.startswith("TAILWIND_CLI_") or setting in ("BASE_DIR", "STATICFILES_DIRS"):
+        clear_cache()
 
 
 def validate_settings() -> None:
@@ -83,3 +587,14 @@ def validate_settings() -> None:
     if settings.STATICFILES_DIRS is None or len(settings.STATICFILES_DIRS) == 0:
         msg = "STATICFILES_DIRS is empty. Please add a path to your static files."
         raise ValueError(msg)
+    get_entries()
+
+
+GENERATED_TAILWIND_CONFIG = """// Generated by django-tailwind-cli. Don't edit this file.
+const config = require({config_file});
+
+module.exports = {{
+  ...config,
+  content: {content},
+}};
+"""
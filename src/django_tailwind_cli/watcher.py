@@ -0,0 +1,341 @@
+"""
+Debounced watcher of the templates.
+
+The watcher of the CLI starts a rebuild for every file change it sees. When hundreds of templates
+change at once, e.g. on `git checkout`, it rebuilds the stylesheet over and over. With
+`TAILWIND_CLI_WATCH_DEBOUNCE` the management commands watch the inputs themselves instead. The
+changes are collected until no further change happens for the debounce window, and the CLI is run
+once for the whole burst.
+
+Only templates, the Tailwind CSS config files, the source css and the files matching
+`TAILWIND_CLI_EXTRA_CONTENT` are watched. On Linux the watcher uses inotify, elsewhere it polls the
+modification times of the files.
+"""
+
+import abc
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import threading
+import time
+from collections.abc import Iterator
+from fnmatch import fnmatch
+from pathlib import Path
+from types import TracebackType
+from typing import Any, NamedTuple, Optional
+
+from django_tailwind_cli import utils
+from django_tailwind_cli.conf import settings
+
+POLL_INTERVAL = 0.5
+# How often the loop checks, whether it should stop, if it was given a stop event.
+STOP_CHECK_INTERVAL = 0.5
+# A burst of changes, that never settles, still triggers a build after this many windows.
+MAX_BURST_WINDOWS = 10
+
+# A change, that can't be attributed to a single file, e.g. an overflow of the event queue.
+UNKNOWN_CHANGE = "*"
+
+GLOB_CHARS = "*?["
+
+
+def _is_ignored(name: str, ignore_patterns: list[str]) -> bool:
+    return any(fnmatch(name, pattern) for pattern in ignore_patterns)
+
+
+class WatchRoot(NamedTuple):
+    """A directory, whose files matching `patterns` are watched."""
+
+    path: Path
+    patterns: tuple[str, ...]
+    recursive: bool = True
+
+
+def _split_glob(glob: str) -> WatchRoot:
+    """Split a content glob into the directory before the first wildcard and a file pattern."""
+    path = Path(settings.BASE_DIR) / glob
+    parts = path.parts
+    for index, part in enumerate(parts):
+        if any(char in part for char in GLOB_CHARS):
+            recursive = index < len(parts) - 1
+            return WatchRoot(Path(*parts[:index]), (parts[-1],), recursive)
+    return WatchRoot(path.parent, (path.name,), False)
+
+
+def get_watch_roots() -> list[WatchRoot]:
+    """Get the directories and files, that are inputs of the CLI."""
+    template_patterns = tuple(f"*{extension}" for extension in utils.TEMPLATE_EXTENSIONS)
+    roots = [
+        WatchRoot(Path(settings.BASE_DIR) / template_dir, template_patterns)
+        for template_dir in utils.get_template_dirs()
+    ]
+
+    files: dict[Path, list[str]] = {}
+    for entry in utils.get_entries():
+        paths = [utils.get_full_config_file_path(entry)]
+        if entry.src_css is not None:
+            paths.append(utils.get_full_src_css_path(entry))
+        for path in paths:
+            files.setdefault(path.parent, []).append(path.name)
+    roots.extend(WatchRoot(path, tuple(names), False) for path, names in files.items())
+
+    roots.extend(
+        _split_glob(glob)
+        for glob in settings.TAILWIND_CLI_EXTRA_CONTENT
+        if not glob.startswith("!")
+    )
+    return roots
+
+
+class FileWatcher(abc.ABC):
+    """Base class of the watchers of the inputs."""
+
+    def __init__(self, roots: list[WatchRoot]) -> None:
+        self.roots = roots
+        self.ignore_patterns = list(settings.TAILWIND_CLI_TEMPLATE_IGNORE_PATTERNS)
+
+    def _relative_parts(self, root: WatchRoot, path: str) -> Optional[tuple[str, ...]]:
+        try:
+            parts = Path(path).relative_to(root.path).parts
+        except ValueError:
+            return None
+        if any(_is_ignored(part, self.ignore_patterns) for part in parts):
+            return None
+        return parts
+
+    def is_relevant(self, path: str) -> bool:
+        """Check if a file is an input of the CLI."""
+        for root in self.roots:
+            parts = self._relative_parts(root, path)
+            if not parts or (not root.recursive and len(parts) != 1):
+                continue
+            if any(fnmatch(parts[-1], pattern) for pattern in root.patterns):
+                return True
+        return False
+
+    def is_watched_dir(self, path: str) -> bool:
+        """Check if a directory is inside of a recursively watched root."""
+        return any(
+            root.recursive and self._relative_parts(root, path) is not None for root in self.roots
+        )
+
+    def iter_dirs(self, path: str) -> Iterator[str]:
+        """Get a directory and all its subdirectories, that aren't ignored."""
+        yield path
+        try:
+            with os.scandir(path) as it:
+                subdirs = [
+                    entry.path
+                    for entry in it
+                    if entry.is_dir(follow_symlinks=False)
+                    and not _is_ignored(entry.name, self.ignore_patterns)
+                ]
+        except OSError:
+            return
+        for subdir in subdirs:
+            yield from self.iter_dirs(subdir)
+
+    def _iter_relevant_files(self, path: str) -> Iterator[str]:
+        try:
+            with os.scandir(path) as it:
+                for entry in it:
+                    if not entry.is_dir() and self.is_relevant(entry.path):
+                        yield entry.path
+        except OSError:
+            return
+
+    def iter_root_dirs(self) -> Iterator[str]:
+        for root in self.roots:
+            if root.recursive:
+                yield from self.iter_dirs(str(root.path))
+            else:
+                yield str(root.path)
+
+    @abc.abstractmethod
+    def wait(self, timeout: Optional[float]) -> set[str]:
+        """Wait for changes and return the changed files.
+
+        Returns an empty set, if nothing changed within `timeout` seconds. It might return an empty
+        set earlier, e.g. if only files, that aren't inputs of the CLI, changed.
+        """
+
+    def close(self) -> None:
+        pass
+
+    def __enter__(self) -> "FileWatcher":
+        return self
+
+    def __exit__(
+        self,
+        exc_type: Optional[type[BaseException]],
+        exc_value: Optional[BaseException],
+        traceback: Optional[TracebackType],
+    ) -> None:
+        self.close()
+
+
+class PollingWatcher(FileWatcher):
+    """Watcher comparing the modification times and sizes of the files."""
+
+    def __init__(self, roots: list[WatchRoot], poll_interval: float = POLL_INTERVAL) -> None:
+        super().__init__(roots)
+        self.poll_interval = poll_interval
+        self._state = self._snapshot()
+
+    def _snapshot(self) -> dict[str, tuple[int, int]]:
+        state = {}
+        for path in dict.fromkeys(self.iter_root_dirs()):
+            for file_path in self._iter_relevant_files(path):
+                try:
+                    stat = os.stat(file_path)
+                except OSError:
+                    continue
+                state[file_path] = (stat.st_mtime_ns, stat.st_size)
+        return state
+
+    def wait(self, timeout: Optional[float]) -> set[str]:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                return set()
+            time.sleep(min(self.poll_interval, remaining or self.poll_interval))
+            state = self._snapshot()
+            changes = {
+                path
+                for path in state.keys() | self._state.keys()
+                if state.get(path) != self._state.get(path)
+            }
+            self._state = state
+            if changes:
+                return changes
+
+
+# Constants of <sys/inotify.h>.
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+INOTIFY_MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+INOTIFY_EVENT = struct.Struct("iIII")
+READ_SIZE = 64 * 1024
+
+
+def _load_libc() -> Optional[Any]:
+    if not sys.platform.startswith("linux"):
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+    except OSError:
+        return None
+    return libc if hasattr(libc, "inotify_init1") else None
+
+
+class InotifyWatcher(FileWatcher):
+    """Watcher receiving the changes from inotify on Linux."""
+
+    def __init__(self, roots: list[WatchRoot], libc: Any) -> None:
+        super().__init__(roots)
+        self._libc = libc
+        self._fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self._fd < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, os.strerror(errno))
+        self._dirs: dict[int, str] = {}
+        for path in self.iter_root_dirs():
+            self._add_watch(path)
+
+    def _add_watch(self, path: str) -> None:
+        wd = self._libc.inotify_add_watch(self._fd, os.fsencode(path), INOTIFY_MASK)
+        if wd >= 0:
+            self._dirs[wd] = path
+
+    def _read_events(self) -> Iterator[tuple[int, int, str]]:
+        try:
+            data = os.read(self._fd, READ_SIZE)
+        except BlockingIOError:
+            return
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, length = INOTIFY_EVENT.unpack_from(data, offset)
+            offset += INOTIFY_EVENT.size
+            name = os.fsdecode(data[offset : offset + length].rstrip(b"\0"))
+            offset += length
+            yield wd, mask, name
+
+    def wait(self, timeout: Optional[float]) -> set[str]:
+        ready, _, _ = select.select([self._fd], [], [], timeout)
+        if not ready:
+            return set()
+
+        changes = set()
+        for wd, mask, name in self._read_events():
+            if mask & IN_Q_OVERFLOW:
+                changes.add(UNKNOWN_CHANGE)
+                continue
+            if mask & IN_IGNORED:
+                self._dirs.pop(wd, None)
+                continue
+            dir_path = self._dirs.get(wd)
+            if dir_path is None:
+                continue
+            path = os.path.join(dir_path, name)
+            if not mask & IN_ISDIR:
+                if self.is_relevant(path):
+                    changes.add(path)
+            elif self.is_watched_dir(path):
+                if mask & (IN_CREATE | IN_MOVED_TO):
+                    # Files might have been created in the new directory before it was watched.
+                    for new_dir in self.iter_dirs(path):
+                        self._add_watch(new_dir)
+                        changes.update(self._iter_relevant_files(new_dir))
+                elif mask & IN_MOVED_FROM:
+                    changes.add(path)
+        return changes
+
+    def close(self) -> None:
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+
+
+def create_watcher(roots: list[WatchRoot]) -> FileWatcher:
+    """Create an inotify watcher, if available, or a polling watcher."""
+    libc = _load_libc()
+    if libc is not None:
+        try:
+            return InotifyWatcher(roots, libc)
+        except OSError:
+            pass
+    return PollingWatcher(roots)
+
+
+def iter_bursts(
+    file_watcher: FileWatcher, debounce: float, stop: Optional[threading.Event] = None
+) -> Iterator[set[str]]:
+    """Yield the changed files once per burst of changes.
+
+    A burst ends, when no input of the CLI changed for `debounce` seconds. The loop ends, when
+    `stop` is set.
+    """
+    while stop is None or not stop.is_set():
+        changes = file_watcher.wait(None if stop is None else STOP_CHECK_INTERVAL)
+        if not changes:
+            continue
+        started = time.monotonic()
+        burst_deadline = started + debounce * MAX_BURST_WINDOWS
+        quiet_deadline = started + debounce
+        while (remaining := min(quiet_deadline, burst_deadline) - time.monotonic()) > 0:
+            more_changes = file_watcher.wait(remaining)
+            if more_changes:
+                changes |= more_changes
+                quiet_deadline = time.monotonic() + debounce
+        yield changes
@@ -0,0 +1,48 @@
+import hashlib
+import io
+import urllib.error
+
+import pytest
+
+from django_tailwind_cli import utils
+
+CLI_CONTENT = b"#!/bin/sh\necho tailwindcss\n"
+
+
+class FakeResponse(io.BytesIO):
+    def __init__(self, content: bytes, status: int = 200):
+        super().__init__(content)
+        self.status = status
+        self.headers = {"Content-Length": str(len(content))}
+
+
+@pytest.fixture(autouse=True)
+def clear_utils_cache():
+    """Forget the paths resolved by other tests, e.g. with a mocked platform."""
+    utils.clear_cache()
+    yield
+    utils.clear_cache()
+
+
+@pytest.fixture
+def fake_urlopen(mocker):
+    """Serve a fake CLI binary and the matching checksum file instead of GitHub."""
+
+    def urlopen(request, *args, **kwargs):
+        url = request.full_url
+        if url.endswith("/sha256sums.txt"):
+            checksums = "\n".join(
+                f"{hashlib.sha256(CLI_CONTENT).hexdigest()}  ./tailwindcss-{system}-{machine}"
+                for system in ["linux", "macos", "windows"]
+                for machine in ["x64", "arm64", "armv7"]
+            )
+            return FakeResponse(checksums.encode())
+        if "/releases/download/" in url:
+            range_header = request.get_header("Range")
+            if range_header:
+                offset = int(range_header.removeprefix("bytes=").rstrip("-"))
+                return FakeResponse(CLI_CONTENT[offset:], status=206)
+            return FakeResponse(CLI_CONTENT)
+        raise urllib.error.HTTPError(url, 404, "Not Found", {}, None)  # type: ignore
+
+    return mocker.patch("urllib.request.urlopen", side_effect=urlopen)
@@ -0,0 +1,146 @@
+import asyncio
+import sys
+import time
+
+import pytest
+
+from django_tailwind_cli import api, utils
+
+FAKE_CLI = """#!{python}
+import pathlib, sys, time
+output = pathlib.Path(sys.argv[sys.argv.index("--output") + 1])
+print("Rebuilding...", flush=True)
+time.sleep({delay})
+output.parent.mkdir(parents=True, exist_ok=True)
+output.write_text("/* css */")
+print("Done in 1ms.")
+"""
+
+
+def python(code: str) -> list[str]:
+    return [sys.executable, "-c", code]
+
+
+@pytest.fixture
+def fake_cli(settings, tmp_path):
+    settings.BASE_DIR = tmp_path
+    settings.STATICFILES_DIRS = [tmp_path / "assets"]
+    cli_path = tmp_path / "tailwindcss"
+    settings.TAILWIND_CLI_PATH = str(cli_path)
+
+    def write_cli(delay: float = 0.0) -> None:
+        cli_path.write_text(FAKE_CLI.format(python=sys.executable, delay=delay))
+        cli_path.chmod(0o755)
+
+    write_cli()
+    return write_cli
+
+
+def test_run_cli_passes_output_to_on_output(settings, tmp_path):
+    settings.BASE_DIR = tmp_path
+    received = []
+    asyncio.run(
+        api.run_cli(
+            python("print('Rebuilding...'); print('Done in 10ms.')"),
+            name="site",
+            on_output=lambda name, line: received.append((name, line)),
+        )
+    )
+    assert received == [("site", "Rebuilding..."), ("site", "Done in 10ms.")]
+
+
+def test_run_cli_raises_build_error(settings, tmp_path):
+    settings.BASE_DIR = tmp_path
+    with pytest.raises(api.BuildError) as e:
+        asyncio.run(api.run_cli(python("print('Syntax error'); raise SystemExit(3)")))
+    assert e.value.returncode == 3
+    assert e.value.output == "Syntax error"
+
+
+def test_run_cli_terminates_cli_when_cancelled(settings, tmp_path):
+    settings.BASE_DIR = tmp_path
+
+    async def main():
+        task = asyncio.ensure_future(
+            api.run_cli(python("print('ready', flush=True); import time; time.sleep(60)"))
+        )
+        await asyncio.sleep(0.5)
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+
+    started = time.monotonic()
+    asyncio.run(main())
+    assert time.monotonic() - started < 5
+
+
+def test_build(fake_cli):
+    received = []
+    messages = []
+    stats = api.build(
+        on_output=lambda name, line: received.append((name, line)),
+        on_message=lambda message, level: messages.append((message, level)),
+    )
+    assert received == [("default", "Rebuilding..."), ("default", "Done in 1ms.")]
+    assert (
+        f"Built production stylesheet '{utils.get_full_dist_css_path()}'.",
+        utils.MESSAGE_SUCCESS,
+    ) in messages
+    [stylesheet] = stats.stylesheets
+    assert stylesheet.status == "built"
+    assert stylesheet.size == 9
+    assert "run_cli" in stats.timings
+    assert utils.get_full_fingerprint_path().exists()
+
+
+def test_build_skips_unchanged_inputs(fake_cli):
+    api.build()
+    stats = api.build()
+    assert stats.stylesheets[0].status == "up to date"
+    assert "run_cli" not in stats.timings
+
+
+def test_abuild_in_running_event_loop(fake_cli):
+    async def main():
+        return await api.abuild(force=True)
+
+    stats = asyncio.run(main())
+    assert stats.stylesheets[0].status == "built"
+
+
+def test_build_in_running_event_loop(fake_cli):
+    async def main():
+        return api.build(force=True)
+
+    stats = asyncio.run(main())
+    assert stats.stylesheets[0].status == "built"
+
+
+def test_build_with_timeout(fake_cli):
+    fake_cli(delay=60)
+    started = time.monotonic()
+    with pytest.raises(asyncio.TimeoutError):
+        api.build(timeout=1)
+    assert time.monotonic() - started < 10
+    assert not utils.get_full_dist_css_path().exists()
+    assert not utils.get_full_fingerprint_path().exists()
+
+
+def test_build_with_timeout_while_preparing(fake_cli, settings, tmp_path, mocker):
+    settings.TAILWIND_CLI_BUILD_CACHE_DIR = str(tmp_path / "build-cache")
+    api.build()
+    utils.get_full_dist_css_path().unlink()
+    utils.get_full_fingerprint_path().unlink()
+    mocker.patch.object(api, "require_cli", side_effect=lambda on_message: time.sleep(1))  # noqa: ARG005
+    with pytest.raises(asyncio.TimeoutError):
+        api.build(timeout=0.1)
+    # The stylesheet would have been restored from the build cache.
+    assert not utils.get_full_dist_css_path().exists()
+    assert not utils.get_full_fingerprint_path().exists()
+
+
+def test_build_without_cli(settings, tmp_path):
+    settings.BASE_DIR = tmp_path
+    settings.TAILWIND_CLI_PATH = str(tmp_path)
+    settings.TAILWIND_CLI_AUTOMATIC_DOWNLOAD = False
+    with pytest.raises(api.CliNotFoundError, match="Tailwind CSS CLI not found."):
+        api.build()
@@ -0,0 +1,95 @@
+import asyncio
+
+import pytest
+
+from django_tailwind_cli import candidates, extract, utils
+from django_tailwind_cli.template_index import get_template_index
+
+
+@pytest.fixture
+def templates(settings, tmp_path):
+    settings.BASE_DIR = tmp_path
+    settings.TAILWIND_CLI_EXTRACT_CLASSES = True
+    settings.TEMPLATES = [
+        {
+            "BACKEND": "django.template.backends.django.DjangoTemplates",
+            "DIRS": [tmp_path / "templates"],
+        }
+    ]
+    template_dir = tmp_path / "templates"
+    template_dir.mkdir()
+    (template_dir / "base.html").write_text('<body class="p-4">{% block content %}{% endblock %}')
+    (template_dir / "index.html").write_text('<p class="mt-2">Hello</p>')
+    return template_dir
+
+
+def test_write_candidates_file(templates):
+    assert candidates.write_candidates_file()
+    assert utils.get_full_candidates_path().read_text() == "mt-2\np-4\n"
+    assert not candidates.write_candidates_file()
+
+
+def test_write_candidates_file_tokenizes_changed_templates_only(templates, mocker):
+    candidates.write_candidates_file()
+    extract_template_candidates = mocker.spy(extract, "extract_template_candidates")
+    (templates / "index.html").write_text('<p class="mt-4">Hello</p>')
+    assert candidates.write_candidates_file()
+    assert extract_template_candidates.call_count == 1
+    assert utils.get_full_candidates_path().read_text() == "mt-4\np-4\n"
+
+
+def test_write_candidates_file_ignores_text_changes(templates):
+    candidates.write_candidates_file()
+    (templates / "index.html").write_text('<p class="mt-2">Hello world</p>')
+    assert not candidates.write_candidates_file()
+
+
+def test_candidates_cache_is_stored(templates):
+    candidates.write_candidates_file()
+    cache = candidates.CandidatesCache(candidates.get_candidates_cache().cache_file)
+    template_files = get_template_index().entries()
+    assert cache._candidates == {f.sha256: [c] for f, c in zip(template_files, ["p-4", "mt-2"])}
+
+
+def test_candidates_path_without_cache_dir(settings, tmp_path):
+    settings.BASE_DIR = tmp_path
+    settings.TAILWIND_CLI_CACHE_DIR = None
+    assert utils.get_full_candidates_path() == tmp_path / ".tailwind.candidates.txt"
+
+
+def test_watch_rewrites_candidates_file(templates, mocker):
+    mocker.patch.object(candidates, "DEBOUNCE", 0.01)
+    mocker.patch("django_tailwind_cli.watcher.STOP_CHECK_INTERVAL", 0.05)
+    candidates.write_candidates_file()
+    (templates / "index.html").write_text('<p class="mt-8">Hello</p>')
+
+    async def wait_for_candidates(candidate):
+        for _ in range(500):
+            await asyncio.sleep(0.01)
+            if candidate in utils.get_full_candidates_path().read_text():
+                return
+
+    async def main():
+        task = asyncio.ensure_future(candidates.watch())
+        try:
+            await wait_for_candidates("mt-8")
+            (templates / "index.html").write_text('<p class="mt-12">Hello</p>')
+            await wait_for_candidates("mt-12")
+        finally:
+            task.cancel()
+
+    asyncio.run(main())
+    assert utils.get_full_candidates_path().read_text() == "mt-12\np-4\n"
+
+
+def test_watch_does_not_refresh_without_changes(templates, mocker):
+    mocker.patch("django_tailwind_cli.watcher.STOP_CHECK_INTERVAL", 0.05)
+    write_candidates_file = mocker.spy(candidates, "write_candidates_file")
+
+    async def main():
+        task = asyncio.ensure_future(candidates.watch())
+        await asyncio.sleep(0.5)
+        task.cancel()
+
+    asyncio.run(main())
+    assert write_candidates_file.call_count == 1
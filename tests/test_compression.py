@@ -0,0 +1,83 @@
+import gzip
+import os
+
+import pytest
+
+from django_tailwind_cli import compression, utils
+
+
+@pytest.fixture(autouse=True)
+def configure_settings(settings, tmp_path):
+    settings.STATICFILES_DIRS = [tmp_path]
+    settings.TAILWIND_CLI_PRECOMPRESS = ["gzip"]
+    utils.get_full_dist_css_path().parent.mkdir(parents=True)
+    utils.get_full_dist_css_path().write_text(".p-4{padding:1rem}")
+
+
+@pytest.fixture
+def brotli(settings):
+    """Compress with Brotli as well. Brotli is an optional dependency."""
+    settings.TAILWIND_CLI_PRECOMPRESS = ["gzip", "br"]
+    return pytest.importorskip("brotli")
+
+
+def test_compress_files(tmp_path, brotli):
+    dist_css = utils.get_full_dist_css_path()
+    written = compression.compress_files([dist_css])
+    assert sorted(written) == [tmp_path / "css/tailwind.css.br", tmp_path / "css/tailwind.css.gz"]
+    content = dist_css.read_bytes()
+    assert gzip.decompress((tmp_path / "css/tailwind.css.gz").read_bytes()) == content
+    assert brotli.decompress((tmp_path / "css/tailwind.css.br").read_bytes()) == content
+
+
+def test_compress_files_is_reproducible():
+    dist_css = utils.get_full_dist_css_path()
+    compression.compress_files([dist_css])
+    first = dist_css.with_name("tailwind.css.gz").read_bytes()
+    dist_css.with_name("tailwind.css.gz").unlink()
+    compression.compress_files([dist_css])
+    assert dist_css.with_name("tailwind.css.gz").read_bytes() == first
+
+
+def test_compress_files_skips_unchanged_content():
+    dist_css = utils.get_full_dist_css_path()
+    compression.compress_files([dist_css])
+    os.utime(dist_css.with_name("tailwind.css.gz"), ns=(0, 0))
+    dist_css.write_text(".p-4{padding:1rem}")
+    assert compression.compress_files([dist_css]) == []
+    assert dist_css.with_name("tailwind.css.gz").stat().st_mtime_ns == 0
+
+
+def test_compress_files_replaces_changed_content(brotli):  # noqa: ARG001
+    dist_css = utils.get_full_dist_css_path()
+    compression.compress_files([dist_css])
+    dist_css.write_text(".p-8{padding:2rem}")
+    assert len(compression.compress_files([dist_css])) == 2
+    compressed = dist_css.with_name("tailwind.css.gz").read_bytes()
+    assert gzip.decompress(compressed) == b".p-8{padding:2rem}"
+
+
+def test_compress_files_replaces_damaged_copy():
+    dist_css = utils.get_full_dist_css_path()
+    dist_css.with_name("tailwind.css.gz").write_bytes(b"garbage")
+    assert dist_css.with_name("tailwind.css.gz") in compression.compress_files([dist_css])
+
+
+def test_compress_files_only_gzip(settings):
+    settings.TAILWIND_CLI_PRECOMPRESS = ["gzip"]
+    dist_css = utils.get_full_dist_css_path()
+    assert compression.compress_files([dist_css]) == [dist_css.with_name("tailwind.css.gz")]
+    assert not dist_css.with_name("tailwind.css.br").exists()
+
+
+def test_compress_files_unknown_compression(settings):
+    settings.TAILWIND_CLI_PRECOMPRESS = ["zstd"]
+    with pytest.raises(ValueError, match="Unknown compression 'zstd'"):
+        compression.compress_files([utils.get_full_dist_css_path()])
+
+
+def test_compress_files_without_brotli(settings, mocker):
+    settings.TAILWIND_CLI_PRECOMPRESS = ["gzip", "br"]
+    mocker.patch.dict("sys.modules", {"brotli": None})
+    with pytest.raises(ValueError, match="requires the brotli package"):
+        compression.compress_files([utils.get_full_dist_css_path()])
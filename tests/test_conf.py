@@ -4,6 +4,22 @@ def test_default_settings(settings):
     assert settings.TAILWIND_CLI_AUTOMATIC_DOWNLOAD is True
     assert settings.TAILWIND_CLI_SRC_CSS is None
     assert settings.TAILWIND_CLI_DIST_CSS == "css/tailwind.css"
+    assert settings.TAILWIND_CLI_HASHED_FILENAMES is False
+    assert settings.TAILWIND_CLI_HASHED_FILENAMES_KEEP == 5
+    assert settings.TAILWIND_CLI_PRECOMPRESS == []
+    assert settings.TAILWIND_CLI_CRITICAL_TEMPLATES == []
     assert settings.TAILWIND_CLI_CONFIG_FILE == "tailwind.config.js"
+    assert settings.TAILWIND_CLI_ENTRIES == []
+    assert settings.TAILWIND_CLI_AUTO_CONTENT is False
+    assert settings.TAILWIND_CLI_EXTRACT_CLASSES is False
+    assert settings.TAILWIND_CLI_EXTRA_CONTENT == []
     assert settings.TAILWIND_CLI_SRC_REPO == "tailwindlabs/tailwindcss"
     assert settings.TAILWIND_CLI_ASSET_NAME == "tailwindcss"
+    assert settings.TAILWIND_CLI_CHECKSUM is None
+    assert settings.TAILWIND_CLI_SHARED_CACHE is False
+    assert settings.TAILWIND_CLI_CACHE_DIR == ".tailwind-cli"
+    assert settings.TAILWIND_CLI_TEMPLATE_IGNORE_PATTERNS == [".*", "node_modules", "__pycache__"]
+    assert settings.TAILWIND_CLI_BUILD_CACHE_DIR is None
+    assert settings.TAILWIND_CLI_BUILD_CACHE_MAX_SIZE == 50 * 1024 * 1024
+    assert settings.TAILWIND_CLI_LIVE_RELOAD is False
+    assert settings.TAILWIND_CLI_WATCH_DEBOUNCE is None
@@ -0,0 +1,74 @@
+from pathlib import Path
+
+import pytest
+
+from django_tailwind_cli import critical, utils
+
+
+@pytest.fixture(autouse=True)
+def configure_settings(settings, tmp_path):
+    settings.STATICFILES_DIRS = [tmp_path]
+    settings.TAILWIND_CLI_CRITICAL_TEMPLATES = ["tests/base.html"]
+    critical.clear_cache()
+
+
+def test_get_full_critical_css_path(tmp_path):
+    assert utils.get_full_critical_css_path() == tmp_path / "css/.tailwind.critical.css"
+
+
+def test_get_critical_template_files(settings):
+    assert critical.get_critical_template_files() == [
+        Path(settings.BASE_DIR) / "templates/tests/base.html"
+    ]
+
+
+def test_get_critical_template_files_missing_template(settings):
+    settings.TAILWIND_CLI_CRITICAL_TEMPLATES = ["missing.html"]
+    with pytest.raises(ValueError, match="Critical template 'missing.html' does not exist."):
+        critical.get_critical_template_files()
+
+
+def test_get_build_cmd(settings):
+    build_cmd = ["tailwindcss", "--output", "tailwind.css", "--minify"]
+    assert critical.get_build_cmd(build_cmd) == [
+        "tailwindcss",
+        "--output",
+        str(utils.get_full_critical_css_path()),
+        "--minify",
+        "--content",
+        (Path(settings.BASE_DIR) / "templates/tests/base.html").as_posix(),
+    ]
+    assert build_cmd[2] == "tailwind.css"
+
+
+def test_get_critical_css():
+    utils.get_full_critical_css_path().parent.mkdir(parents=True)
+    utils.get_full_critical_css_path().write_text(".p-4{padding:1rem}")
+    assert critical.get_critical_css() == ".p-4{padding:1rem}"
+
+
+def test_get_critical_css_is_cached():
+    utils.get_full_critical_css_path().parent.mkdir(parents=True)
+    utils.get_full_critical_css_path().write_text(".p-4{padding:1rem}")
+    critical.get_critical_css()
+    utils.get_full_critical_css_path().write_text(".p-8{padding:2rem}")
+    assert critical.get_critical_css() == ".p-4{padding:1rem}"
+    critical.clear_cache()
+    assert critical.get_critical_css() == ".p-8{padding:2rem}"
+
+
+def test_get_critical_css_escapes_closing_tags():
+    utils.get_full_critical_css_path().parent.mkdir(parents=True)
+    utils.get_full_critical_css_path().write_text('.a::after{content:"</style>"}')
+    assert critical.get_critical_css() == '.a::after{content:"<\\/style>"}'
+
+
+def test_get_critical_css_missing_file():
+    assert critical.get_critical_css() is None
+
+
+def test_get_critical_css_disabled(settings):
+    settings.TAILWIND_CLI_CRITICAL_TEMPLATES = []
+    utils.get_full_critical_css_path().parent.mkdir(parents=True)
+    utils.get_full_critical_css_path().write_text(".p-4{padding:1rem}")
+    assert critical.get_critical_css() is None
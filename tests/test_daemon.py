@@ -0,0 +1,141 @@
+import os
+import threading
+import time
+
+import pytest
+
+from django_tailwind_cli import daemon, utils
+from django_tailwind_cli.template_index import TemplateFile
+
+BUILD_CMD = ["tailwindcss", "--output", "css/tailwind.css", "--minify"]
+
+
+@pytest.fixture
+def build_daemon(settings, tmp_path, mocker):
+    settings.BASE_DIR = tmp_path
+    mocker.patch.object(daemon, "WAIT_TIMEOUT", 0.5)
+    output = daemon.get_output_path(utils.get_entry())
+    output.parent.mkdir(parents=True)
+    output.write_text(".p-4{padding:1rem}")
+    return daemon.BuildDaemon(
+        {"default": daemon.Watcher(BUILD_CMD, output)}, list_templates=lambda: list(TEMPLATES)
+    )
+
+
+TEMPLATES = ["/app/templates/base.html", "/app/templates/index.html"]
+TEMPLATES_DIGEST = daemon.get_templates_digest(TEMPLATES)
+
+
+def request(
+    inputs_mtime_ns: int, build_cmd=BUILD_CMD, entry="default", templates_digest=TEMPLATES_DIGEST
+):
+    return {
+        "entry": entry,
+        "build_cmd": build_cmd,
+        "inputs_mtime_ns": inputs_mtime_ns,
+        "templates_digest": templates_digest,
+    }
+
+
+def test_get_address(settings, tmp_path):
+    settings.BASE_DIR = tmp_path
+    assert daemon.get_address() == str(tmp_path / ".tailwind-cli" / "daemon.sock")
+    settings.TAILWIND_CLI_CACHE_DIR = None
+    assert daemon.get_address() is None
+    assert not daemon.is_running()
+
+
+def test_handle_returns_css_of_finished_build(build_daemon):
+    inputs_mtime_ns = time.time_ns()
+    build_daemon.on_output("default", "Rebuilding...")
+    build_daemon.on_output("default", "Done in 120ms.")
+    assert build_daemon.handle(request(inputs_mtime_ns)) == {
+        "status": "ok",
+        "css": b".p-4{padding:1rem}",
+    }
+
+
+def test_handle_waits_for_build_started_after_inputs_changed(build_daemon):
+    build_daemon.on_output("default", "Rebuilding...")
+    build_daemon.on_output("default", "Done in 120ms.")
+    inputs_mtime_ns = time.time_ns()
+
+    def rebuild():
+        time.sleep(0.05)
+        build_daemon.on_output("default", "Rebuilding...")
+        build_daemon.on_output("default", "Done in 80ms.")
+
+    thread = threading.Thread(target=rebuild)
+    thread.start()
+    assert build_daemon.handle(request(inputs_mtime_ns))["status"] == "ok"
+    thread.join()
+
+
+def test_handle_times_out_while_building(build_daemon):
+    build_daemon.on_output("default", "Rebuilding...")
+    assert build_daemon.handle(request(0)) == {"status": "timeout"}
+
+
+def test_handle_waits_for_build_without_removed_template(build_daemon, mocker):
+    build_daemon.on_output("default", "Rebuilding...")
+    build_daemon.on_output("default", "Done in 120ms.")
+    remaining = TEMPLATES[:1]
+    templates_digest = daemon.get_templates_digest(remaining)
+    assert build_daemon.handle(request(0, templates_digest=templates_digest)) == {
+        "status": "timeout"
+    }
+
+    mocker.patch.object(build_daemon, "_list_templates", return_value=remaining)
+    build_daemon.on_output("default", "Rebuilding...")
+    build_daemon.on_output("default", "Done in 80ms.")
+    assert build_daemon.handle(request(0, templates_digest=templates_digest))["status"] == "ok"
+
+
+def test_handle_rejects_other_command_line(build_daemon):
+    build_daemon.on_output("default", "Done in 120ms.")
+    assert build_daemon.handle(request(0, build_cmd=[*BUILD_CMD, "--poll"])) == {
+        "status": "mismatch"
+    }
+    assert build_daemon.handle(request(0, entry="emails")) == {"status": "mismatch"}
+
+
+def test_request_css_without_daemon(settings, tmp_path):
+    settings.BASE_DIR = tmp_path
+    assert daemon.request_css(utils.get_entry(), BUILD_CMD, 0, TEMPLATES_DIGEST) is None
+
+
+def test_request_css_from_daemon(build_daemon):
+    build_daemon.on_output("default", "Done in 120ms.")
+    entry = utils.get_entry()
+    with build_daemon.listen() as address:
+        assert daemon.is_running()
+        assert os.stat(daemon._get_authkey_path()).st_mode & 0o777 == 0o600
+        assert daemon.request_css(entry, BUILD_CMD, 0, TEMPLATES_DIGEST) == b".p-4{padding:1rem}"
+        assert daemon.request_css(entry, [*BUILD_CMD, "--poll"], 0, TEMPLATES_DIGEST) is None
+    assert not os.path.exists(address)
+    assert daemon.request_css(entry, BUILD_CMD, 0, TEMPLATES_DIGEST) is None
+
+
+def test_get_inputs_mtime_ns(settings, tmp_path):
+    settings.BASE_DIR = tmp_path
+    template_dir = tmp_path / "templates"
+    template_dir.mkdir()
+    template = template_dir / "index.html"
+    template.write_text("<p class='p-4'></p>")
+    os.utime(template_dir, ns=(0, 0))
+    os.utime(template, ns=(0, 1_000))
+    template_files = [TemplateFile(str(template), 21, 1_000, "digest")]
+    assert daemon.get_inputs_mtime_ns(utils.get_entry(), template_files) == 1_000
+
+    (tmp_path / "tailwind.config.js").write_text("module.exports = {}")
+    config_mtime_ns = (tmp_path / "tailwind.config.js").stat().st_mtime_ns
+    assert daemon.get_inputs_mtime_ns(utils.get_entry(), template_files) == config_mtime_ns
+
+    # Other files in the template directories don't count.
+    (template_dir / "index.html.swp").write_text("")
+    assert daemon.get_inputs_mtime_ns(utils.get_entry(), template_files) == config_mtime_ns
+
+
+def test_get_templates_digest():
+    assert daemon.get_templates_digest(TEMPLATES) == daemon.get_templates_digest(TEMPLATES[::-1])
+    assert daemon.get_templates_digest(TEMPLATES) != daemon.get_templates_digest(TEMPLATES[:1])
@@ -0,0 +1,107 @@
+import hashlib
+import http.client
+import urllib.error
+
+import pytest
+
+from django_tailwind_cli import download
+
+from .conftest import CLI_CONTENT, FakeResponse
+
+URL = "https://github.com/tailwindlabs/tailwindcss/releases/download/v3.4.11/tailwindcss-linux-x64"
+CHECKSUM = hashlib.sha256(CLI_CONTENT).hexdigest()
+
+
+@pytest.fixture(autouse=True)
+def no_retry_delay(mocker):
+    mocker.patch("time.sleep")
+
+
+def test_download_file(fake_urlopen, tmp_path):
+    dest_file = tmp_path / "bin" / "tailwindcss"
+    download.download_file(URL, dest_file, checksum=CHECKSUM)
+    assert dest_file.read_bytes() == CLI_CONTENT
+    assert dest_file.stat().st_mode & 0o777 == 0o755
+    assert not download.get_partial_path(dest_file).exists()
+
+
+def test_download_file_reports_progress(fake_urlopen, tmp_path):
+    progress = []
+    download.download_file(
+        URL, tmp_path / "tailwindcss", progress=lambda done, total: progress.append((done, total))
+    )
+    assert progress[-1] == (len(CLI_CONTENT), len(CLI_CONTENT))
+
+
+def test_download_file_resumes_partial_download(fake_urlopen, tmp_path):
+    dest_file = tmp_path / "tailwindcss"
+    download.get_partial_path(dest_file).write_bytes(CLI_CONTENT[:10])
+    download.download_file(URL, dest_file, checksum=CHECKSUM)
+    assert dest_file.read_bytes() == CLI_CONTENT
+    request = fake_urlopen.call_args.args[0]
+    assert request.get_header("Range") == "bytes=10-"
+
+
+def test_download_file_restarts_if_range_is_ignored(mocker, tmp_path):
+    mocker.patch("urllib.request.urlopen", return_value=FakeResponse(CLI_CONTENT))
+    dest_file = tmp_path / "tailwindcss"
+    download.get_partial_path(dest_file).write_bytes(b"garbage")
+    download.download_file(URL, dest_file, checksum=CHECKSUM)
+    assert dest_file.read_bytes() == CLI_CONTENT
+
+
+def test_download_file_retries_interrupted_download(mocker, tmp_path):
+    truncated = FakeResponse(CLI_CONTENT[:10])
+    truncated.headers["Content-Length"] = str(len(CLI_CONTENT))
+    urlopen = mocker.patch(
+        "urllib.request.urlopen",
+        side_effect=[truncated, FakeResponse(CLI_CONTENT[10:], status=206)],
+    )
+    dest_file = tmp_path / "tailwindcss"
+    download.download_file(URL, dest_file, checksum=CHECKSUM)
+    assert dest_file.read_bytes() == CLI_CONTENT
+    assert urlopen.call_count == 2
+
+
+def test_download_file_gives_up_after_retries(mocker, tmp_path):
+    mocker.patch("urllib.request.urlopen", side_effect=http.client.RemoteDisconnected())
+    dest_file = tmp_path / "tailwindcss"
+    with pytest.raises(download.DownloadError, match="Failed to download"):
+        download.download_file(URL, dest_file, retries=2)
+    assert not dest_file.exists()
+
+
+def test_download_file_does_not_retry_not_found(mocker, tmp_path):
+    urlopen = mocker.patch(
+        "urllib.request.urlopen",
+        side_effect=urllib.error.HTTPError(URL, 404, "Not Found", {}, None),  # type: ignore
+    )
+    with pytest.raises(download.DownloadError, match="Failed to download"):
+        download.download_file(URL, tmp_path / "tailwindcss")
+    assert urlopen.call_count == 1
+
+
+def test_download_file_with_checksum_mismatch(fake_urlopen, tmp_path):
+    dest_file = tmp_path / "tailwindcss"
+    with pytest.raises(download.DownloadError, match="Checksum mismatch"):
+        download.download_file(URL, dest_file, checksum="0" * 64)
+    assert not dest_file.exists()
+    assert not download.get_partial_path(dest_file).exists()
+
+
+def test_get_expected_checksum_from_release(fake_urlopen):
+    assert download.get_expected_checksum("tailwindcss-linux-x64") == CHECKSUM
+    assert download.get_expected_checksum("tailwindcss-plan9-x64") is None
+
+
+def test_get_expected_checksum_pinned(fake_urlopen, settings):
+    settings.TAILWIND_CLI_CHECKSUM = "ABCDEF"
+    assert download.get_expected_checksum("tailwindcss-linux-x64") == "abcdef"
+    assert fake_urlopen.call_count == 0
+
+
+def test_get_expected_checksum_without_checksum_file(fake_urlopen, settings):
+    settings.TAILWIND_CLI_SRC_REPO = "someone/tailwind-fork"
+    settings.TAILWIND_CLI_VERSION = "1.0.0"
+    fake_urlopen.side_effect = urllib.error.HTTPError("", 404, "Not Found", {}, None)  # type: ignore
+    assert download.get_expected_checksum("tailwindcss-linux-x64") is None
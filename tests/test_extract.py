@@ -0,0 +1,61 @@
+from django_tailwind_cli import extract
+
+
+def test_extract_candidates():
+    content = (
+        '<div class="p-4 md:p-8 {% if active %}bg-red-500{% endif %} w-[50%] -mt-2 !font-bold">'
+        "Hello world. {{ user.name }}</div>"
+    )
+    candidates = extract.extract_candidates(content)
+    assert {"p-4", "md:p-8", "bg-red-500", "w-[50%]", "-mt-2", "!font-bold"} <= candidates
+    assert "world" in candidates
+    assert not {"world.", "Hello", "%", "}}", '"'} & candidates
+
+
+def test_extract_candidates_skips_long_tokens():
+    assert extract.extract_candidates("a" * (extract.MAX_CANDIDATE_LENGTH + 1)) == set()
+
+
+def test_extract_file_candidates(tmp_path):
+    template = tmp_path / "index.html"
+    template.write_text('<p class="text-sm"></p>')
+    assert "text-sm" in extract.extract_file_candidates(template)
+    assert extract.extract_file_candidates(tmp_path / "missing.html") == set()
+
+
+def test_extract_css_classes():
+    css = (
+        ".p-4{padding:1rem}.md\\:p-8:hover{padding:.5rem}"
+        "@media (min-width:40.5rem){.\\32xl\\:w-1\\/2,.\\32 xl\\:block{width:50%}}"
+        ".w-\\[50\\%\\]>.space-y-2{width:50%}"
+    )
+    assert extract.extract_css_classes(css) == {
+        "p-4",
+        "md:p-8",
+        "2xl:w-1/2",
+        "2xl:block",
+        "w-[50%]",
+        "space-y-2",
+    }
+
+
+def test_extract_template_candidates():
+    content = (
+        '{% load static %}<p class="p-4 {% if active %}font-bold{% else %}font-normal{% endif %}"'
+        ' :class="{ \'bg-red-500\': open }">Hello world {{ ok|yesno:"text-sm,text-lg" }}</p>'
+        '{# <p class="px-1"> #}{% comment %}<p class="px-2">{% endcomment %}'
+        '{% include "card.html" with css="mt-4" %}'
+        "<script>el.classList.add('hidden')</script>"
+    )
+    candidates = extract.extract_template_candidates(content)
+    assert {
+        "p-4",
+        "font-bold",
+        "font-normal",
+        "bg-red-500",
+        "text-sm",
+        "text-lg",
+        "mt-4",
+        "hidden",
+    } <= candidates
+    assert not {"world", "px-1", "px-2", "load", "static", "active"} & candidates
@@ -0,0 +1,106 @@
+import asyncio
+import os
+from urllib.parse import urlparse
+
+from django_tailwind_cli import livereload
+
+
+def test_get_live_reload_url(monkeypatch):
+    monkeypatch.delenv(livereload.URL_ENV_VAR, raising=False)
+    assert livereload.get_live_reload_url() is None
+    monkeypatch.setenv(livereload.URL_ENV_VAR, "http://127.0.0.1:8001/events")
+    assert livereload.get_live_reload_url() == "http://127.0.0.1:8001/events"
+
+
+def test_get_allowed_origins():
+    assert livereload.get_allowed_origins(None) == {
+        "http://localhost:8000",
+        "https://localhost:8000",
+        "http://127.0.0.1:8000",
+        "https://127.0.0.1:8000",
+        "http://[::1]:8000",
+        "https://[::1]:8000",
+    }
+    assert "http://localhost:8001" in livereload.get_allowed_origins("8001")
+    assert "http://0.0.0.0:8001" not in livereload.get_allowed_origins("0.0.0.0:8001")
+    assert "http://example.test:8001" in livereload.get_allowed_origins("example.test:8001")
+    assert "http://localhost:8000" not in livereload.get_allowed_origins("example.test:8001")
+
+
+def test_url():
+    url = urlparse(livereload.LiveReloadServer({}).url)
+    assert url.hostname == "127.0.0.1"
+    assert url.port > 0
+    assert url.path == "/events"
+
+
+def test_serve_sends_event_when_stylesheet_changes(tmp_path, mocker):
+    mocker.patch.object(livereload, "POLL_INTERVAL", 0.01)
+    dist_css = tmp_path / "tailwind.css"
+    dist_css.write_text(".p-4{padding:1rem}")
+    server = livereload.LiveReloadServer(
+        {dist_css: "css/tailwind.css"}, allowed_origins={"http://localhost:8000"}
+    )
+
+    async def main():
+        serve_task = asyncio.ensure_future(server.serve())
+        url = urlparse(server.url)
+        reader, writer = await asyncio.open_connection(url.hostname, url.port)
+        writer.write(
+            b"GET /events HTTP/1.1\r\nHost: localhost\r\nOrigin: http://localhost:8000\r\n\r\n"
+        )
+        await writer.drain()
+        headers = await reader.readuntil(b"\r\n\r\n")
+        while not server._clients:
+            await asyncio.sleep(0.01)
+
+        dist_css.write_text(".p-8{padding:2rem}")
+        os.utime(dist_css, ns=(0, 0))
+        event = await asyncio.wait_for(reader.readuntil(b"\n\n"), 5)
+
+        writer.close()
+        serve_task.cancel()
+        await asyncio.gather(serve_task, return_exceptions=True)
+        return headers, event
+
+    headers, event = asyncio.run(main())
+    assert b"Content-Type: text/event-stream" in headers
+    assert b"Access-Control-Allow-Origin: http://localhost:8000\r\n" in headers
+    assert event == b"event: css\ndata: css/tailwind.css\n\n"
+
+
+def test_serve_ignores_unchanged_stylesheets(tmp_path, mocker):
+    mocker.patch.object(livereload, "POLL_INTERVAL", 0.01)
+    dist_css = tmp_path / "tailwind.css"
+    dist_css.write_text(".p-4{padding:1rem}")
+    server = livereload.LiveReloadServer({dist_css: "css/tailwind.css"})
+    broadcast = mocker.spy(server, "broadcast")
+
+    async def main():
+        serve_task = asyncio.ensure_future(server.serve())
+        await asyncio.sleep(0.1)
+        serve_task.cancel()
+        await asyncio.gather(serve_task, return_exceptions=True)
+
+    asyncio.run(main())
+    assert broadcast.call_count == 0
+
+
+def test_serve_rejects_other_origins(tmp_path):
+    server = livereload.LiveReloadServer({}, allowed_origins={"http://localhost:8000"})
+
+    async def main():
+        serve_task = asyncio.ensure_future(server.serve())
+        url = urlparse(server.url)
+        reader, writer = await asyncio.open_connection(url.hostname, url.port)
+        writer.write(b"GET /events HTTP/1.1\r\nOrigin: https://evil.test\r\n\r\n")
+        await writer.drain()
+        headers = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), 5)
+        writer.close()
+        serve_task.cancel()
+        await asyncio.gather(serve_task, return_exceptions=True)
+        return headers
+
+    headers = asyncio.run(main())
+    assert b"Content-Type: text/event-stream" in headers
+    assert b"Access-Control-Allow-Origin" not in headers
@@ -1,20 +1,26 @@
+import asyncio
+import json
+import os
+import pathlib
+import subprocess
 import sys
+import threading
+import time
 
 import pytest
 from django.core.management import CommandError, call_command
 
-from django_tailwind_cli import utils
-from django_tailwind_cli.management.commands.tailwind import DEFAULT_TAILWIND_CONFIG
+from django_tailwind_cli import api, download, signals, utils
+from django_tailwind_cli.api import DEFAULT_TAILWIND_CONFIG
+from django_tailwind_cli.management.commands import tailwind
 
 
 @pytest.fixture(autouse=True)
-def configure_settings(mocker):
+def configure_settings(mocker, fake_urlopen):
     mocker.resetall()
-    mocker.patch("multiprocessing.Process.start")
-    mocker.patch("multiprocessing.Process.join")
+    mocker.patch("django_tailwind_cli.supervisor.run", return_value=0)
     mocker.patch("subprocess.run")
-    mocker.patch("urllib.request.urlopen")
-    mocker.patch("shutil.copyfileobj")
+    mocker.patch("django_tailwind_cli.api.run_cli")
 
 
 def test_calling_unknown_subcommand():
@@ -88,12 +94,12 @@ def test_with_existing_tailwind_config(settings, tmp_path):
     assert DEFAULT_TAILWIND_CONFIG != utils.get_full_config_file_path().read_text()
 
 
-def test_build_subprocess_run_called(settings, tmp_path, mocker):
+def test_build_run_cli_called(settings, tmp_path, mocker):
     settings.BASE_DIR = tmp_path
     settings.TAILWIND_CLI_PATH = str(tmp_path)
-    subprocess_run = mocker.patch("subprocess.run")
+    run_cli = mocker.patch("django_tailwind_cli.api.run_cli")
     call_command("tailwind", "build")
-    assert 1 <= subprocess_run.call_count <= 2
+    assert 1 <= run_cli.call_count <= 2
 
 
 def test_build_output_of_first_run(settings, tmp_path, capsys):
@@ -127,8 +133,8 @@ def test_build_output_of_second_run(settings, tmp_path, capsys):
 def test_build_keyboard_interrupt(settings, tmp_path, mocker, capsys):
     settings.BASE_DIR = tmp_path
     settings.TAILWIND_CLI_PATH = str(tmp_path)
-    subprocess_run = mocker.patch("subprocess.run")
-    subprocess_run.side_effect = KeyboardInterrupt
+    run_cli = mocker.patch("django_tailwind_cli.api.run_cli")
+    run_cli.side_effect = KeyboardInterrupt
     call_command("tailwind", "build")
     captured = capsys.readouterr()
     assert "Canceled building production stylesheet." in captured.out
@@ -137,9 +143,9 @@ def test_build_keyboard_interrupt(settings, tmp_path, mocker, capsys):
 def test_build_without_input_file(settings, tmp_path, mocker):
     settings.BASE_DIR = tmp_path
     settings.TAILWIND_CLI_PATH = str(tmp_path)
-    subprocess_run = mocker.patch("subprocess.run")
+    run_cli = mocker.patch("django_tailwind_cli.api.run_cli")
     call_command("tailwind", "build")
-    name, args, kwargs = subprocess_run.mock_calls[0]
+    name, args, kwargs = run_cli.mock_calls[0]
     assert "--input" not in args[0]
 
 
@@ -147,12 +153,336 @@ def test_build_with_input_file(settings, tmp_path, mocker):
     settings.BASE_DIR = tmp_path
     settings.TAILWIND_CLI_PATH = str(tmp_path)
     settings.TAILWIND_CLI_SRC_CSS = "css/source.css"
-    subprocess_run = mocker.patch("subprocess.run")
+    run_cli = mocker.patch("django_tailwind_cli.api.run_cli")
     call_command("tailwind", "build")
-    name, args, kwargs = subprocess_run.mock_calls[0]
+    name, args, kwargs = run_cli.mock_calls[0]
     assert "--input" in args[0]
 
 
+@pytest.fixture
+def build_writes_dist_css(settings, tmp_path, mocker):
+    settings.BASE_DIR = tmp_path
+    settings.TAILWIND_CLI_PATH = str(tmp_path)
+    settings.STATICFILES_DIRS = [tmp_path / "assets"]
+
+    def write_dist_css(*args, **kwargs):
+        utils.get_full_dist_css_path().parent.mkdir(parents=True, exist_ok=True)
+        utils.get_full_dist_css_path().write_text("/* css */")
+
+    return mocker.patch("django_tailwind_cli.api.run_cli", side_effect=write_dist_css)
+
+
+def test_build_writes_fingerprint(build_writes_dist_css):
+    call_command("tailwind", "build")
+    assert utils.get_full_fingerprint_path().exists()
+    assert utils.get_full_fingerprint_path().name.startswith(".")
+
+
+def test_build_in_running_event_loop(build_writes_dist_css):
+    async def main():
+        call_command("tailwind", "build")
+
+    asyncio.run(main())
+    assert build_writes_dist_css.call_count == 1
+    assert utils.get_full_fingerprint_path().exists()
+
+
+def test_build_skipped_when_inputs_unchanged(build_writes_dist_css, capsys):
+    call_command("tailwind", "build")
+    capsys.readouterr()
+    call_command("tailwind", "build")
+    captured = capsys.readouterr()
+    assert build_writes_dist_css.call_count == 1
+    assert "is up to date" in captured.out
+
+
+def test_build_runs_again_when_config_changed(build_writes_dist_css):
+    call_command("tailwind", "build")
+    utils.get_full_config_file_path().write_text("module.exports = {}")
+    call_command("tailwind", "build")
+    assert build_writes_dist_css.call_count == 2
+
+
+def test_build_runs_again_when_extra_content_changed(build_writes_dist_css, settings, tmp_path):
+    settings.TAILWIND_CLI_AUTO_CONTENT = True
+    settings.TAILWIND_CLI_EXTRA_CONTENT = ["js/**/*.js"]
+    (tmp_path / "js").mkdir()
+    (tmp_path / "js" / "a.js").write_text('el.classList.add("p-4")')
+    call_command("tailwind", "build")
+    call_command("tailwind", "build")
+    assert build_writes_dist_css.call_count == 1
+    (tmp_path / "js" / "a.js").write_text('el.classList.add("p-8")')
+    call_command("tailwind", "build")
+    assert build_writes_dist_css.call_count == 2
+
+
+def test_build_runs_again_when_dist_css_missing(build_writes_dist_css):
+    call_command("tailwind", "build")
+    utils.get_full_dist_css_path().unlink()
+    call_command("tailwind", "build")
+    assert build_writes_dist_css.call_count == 2
+
+
+def test_build_with_force(build_writes_dist_css):
+    call_command("tailwind", "build")
+    call_command("tailwind", "build", "--force")
+    assert build_writes_dist_css.call_count == 2
+
+
+def test_build_restored_from_build_cache(build_writes_dist_css, settings, tmp_path, capsys):
+    settings.TAILWIND_CLI_BUILD_CACHE_DIR = str(tmp_path / "cache")
+    call_command("tailwind", "build")
+    assert len(list((tmp_path / "cache").glob("*.css"))) == 1
+
+    utils.get_full_dist_css_path().unlink()
+    capsys.readouterr()
+    call_command("tailwind", "build")
+    captured = capsys.readouterr()
+    assert build_writes_dist_css.call_count == 1
+    assert "from cache" in captured.out
+    assert utils.get_full_dist_css_path().read_text() == "/* css */"
+
+
+def test_build_with_hashed_filenames(build_writes_dist_css, settings):
+    settings.TAILWIND_CLI_HASHED_FILENAMES = True
+    call_command("tailwind", "build")
+    assert utils.get_full_manifest_path().exists()
+    assert len(list(utils.get_full_dist_css_path().parent.glob("tailwind.*.css"))) == 1
+
+
+def test_build_runs_again_when_hashed_filenames_enabled(build_writes_dist_css, settings):
+    call_command("tailwind", "build")
+    settings.TAILWIND_CLI_HASHED_FILENAMES = True
+    call_command("tailwind", "build")
+    assert build_writes_dist_css.call_count == 2
+    assert utils.get_full_manifest_path().exists()
+
+
+def test_build_with_precompress(build_writes_dist_css, settings):
+    settings.TAILWIND_CLI_PRECOMPRESS = ["gzip"]
+    settings.TAILWIND_CLI_HASHED_FILENAMES = True
+    call_command("tailwind", "build")
+    compressed_files = sorted(utils.get_full_dist_css_path().parent.glob("*.gz"))
+    assert len(compressed_files) == 2
+    assert utils.get_full_dist_css_path().with_name("tailwind.css.gz") in compressed_files
+
+
+def test_build_with_unknown_precompress(build_writes_dist_css, settings):
+    settings.TAILWIND_CLI_PRECOMPRESS = ["zstd"]
+    with pytest.raises(CommandError, match="Unknown compression"):
+        call_command("tailwind", "build")
+
+
+@pytest.fixture
+def build_writes_output(build_writes_dist_css):
+    def write_output(build_cmd, **kwargs):
+        output = pathlib.Path(build_cmd[build_cmd.index("--output") + 1])
+        output.parent.mkdir(parents=True, exist_ok=True)
+        output.write_text("/* css */")
+
+    build_writes_dist_css.side_effect = write_output
+    return build_writes_dist_css
+
+
+def test_build_with_critical_templates(build_writes_output, settings):
+    settings.TAILWIND_CLI_CRITICAL_TEMPLATES = ["tests/base.html"]
+    call_command("tailwind", "build")
+    assert build_writes_output.call_count == 2
+    name, args, kwargs = build_writes_output.mock_calls[1]
+    assert "--content" in args[0]
+    assert utils.get_full_critical_css_path().exists()
+    assert utils.get_full_dist_css_path().exists()
+
+
+def test_build_runs_again_when_critical_css_missing(build_writes_output, settings):
+    settings.TAILWIND_CLI_CRITICAL_TEMPLATES = ["tests/base.html"]
+    call_command("tailwind", "build")
+    utils.get_full_critical_css_path().unlink()
+    call_command("tailwind", "build")
+    assert build_writes_output.call_count == 4
+
+
+def test_build_with_missing_critical_template(build_writes_output, settings):
+    settings.TAILWIND_CLI_CRITICAL_TEMPLATES = ["missing.html"]
+    with pytest.raises(CommandError, match="Critical template 'missing.html' does not exist."):
+        call_command("tailwind", "build")
+
+
+def test_build_reports_sizes_and_timings(build_writes_dist_css, capsys):
+    call_command("tailwind", "build")
+    out = capsys.readouterr().out
+    assert f"{utils.get_full_dist_css_path()}: 9 B (gzip " in out
+    assert "Timings: validate " in out
+    assert "run_cli " in out
+    call_command("tailwind", "build", "--force")
+    assert "+0 B (gzip +0 B) since the previous build" in capsys.readouterr().out
+
+
+def test_build_with_json(build_writes_dist_css, capsys):
+    call_command("tailwind", "build", "--json")
+    captured = capsys.readouterr()
+    stats = json.loads(captured.out)
+    assert list(stats["timings"]) == [
+        "validate",
+        "resolve_cli",
+        "templates",
+        "fingerprint",
+        "cache",
+        "run_cli",
+        "postprocess",
+    ]
+    assert stats["total_time"] >= sum(stats["timings"].values())
+    [stylesheet] = stats["stylesheets"]
+    assert stylesheet["status"] == "built"
+    assert stylesheet["size"] == 9
+    assert stylesheet["size_delta"] is None
+    assert "Built production stylesheet" in captured.err
+
+
+def test_build_with_daemon(build_writes_dist_css, mocker, capsys):
+    mocker.patch("django_tailwind_cli.daemon.is_running", return_value=True)
+    request_css = mocker.patch(
+        "django_tailwind_cli.daemon.request_css", return_value=b"/* daemon */"
+    )
+    call_command("tailwind", "build", "--json")
+    captured = capsys.readouterr()
+    assert build_writes_dist_css.call_count == 0
+    assert request_css.call_args.args[1][2] == str(utils.get_full_dist_css_path())
+    assert utils.get_full_dist_css_path().read_text() == "/* daemon */"
+    assert utils.get_full_fingerprint_path().exists()
+    assert "with the build daemon" in captured.err
+    stats = json.loads(captured.out)
+    assert "daemon" in stats["timings"]
+    assert "run_cli" not in stats["timings"]
+    assert stats["stylesheets"][0]["status"] == "built by daemon"
+
+
+def test_build_falls_back_when_daemon_can_not_help(build_writes_dist_css, mocker):
+    mocker.patch("django_tailwind_cli.daemon.is_running", return_value=True)
+    mocker.patch("django_tailwind_cli.daemon.request_css", return_value=None)
+    call_command("tailwind", "build")
+    assert build_writes_dist_css.call_count == 1
+    assert utils.get_full_dist_css_path().read_text() == "/* css */"
+
+
+def test_build_force_skips_daemon(build_writes_dist_css, mocker):
+    mocker.patch("django_tailwind_cli.daemon.is_running", return_value=True)
+    request_css = mocker.patch("django_tailwind_cli.daemon.request_css")
+    call_command("tailwind", "build", "--force")
+    assert request_css.call_count == 0
+    assert build_writes_dist_css.call_count == 1
+
+
+def test_daemon_runs_minifying_watchers(settings, tmp_path, mocker, capsys):
+    settings.BASE_DIR = tmp_path
+    settings.TAILWIND_CLI_PATH = str(tmp_path)
+    settings.TAILWIND_CLI_ENTRIES = [
+        {"name": "site", "dist_css": "css/site.css"},
+        {"name": "emails", "dist_css": "css/emails.css"},
+    ]
+    supervisor_run = mocker.patch("django_tailwind_cli.supervisor.run")
+    call_command("tailwind", "daemon")
+    watchers = supervisor_run.call_args.args[0]
+    assert [watcher.name for watcher in watchers] == ["site", "emails"]
+    site_cmd = watchers[0].cmd
+    assert "--watch" in site_cmd and "--minify" in site_cmd
+    assert site_cmd[2] == str(tmp_path / ".tailwind-cli" / "daemon" / "site.css")
+    assert supervisor_run.call_args.kwargs["on_output"] is not None
+    assert "Build daemon listening on" in capsys.readouterr().out
+    assert not (tmp_path / ".tailwind-cli" / "daemon.sock").exists()
+
+
+def test_daemon_requires_cache_dir(settings, tmp_path):
+    settings.BASE_DIR = tmp_path
+    settings.TAILWIND_CLI_CACHE_DIR = None
+    with pytest.raises(CommandError, match="requires TAILWIND_CLI_CACHE_DIR"):
+        call_command("tailwind", "daemon")
+
+
+def test_build_with_json_up_to_date(build_writes_dist_css, capsys):
+    call_command("tailwind", "build")
+    capsys.readouterr()
+    call_command("tailwind", "build", "--json")
+    stats = json.loads(capsys.readouterr().out)
+    assert "run_cli" not in stats["timings"]
+    assert stats["stylesheets"][0]["status"] == "up to date"
+    assert stats["stylesheets"][0]["size_delta"] == 0
+
+
+def test_build_sends_build_finished(build_writes_dist_css):
+    received = []
+
+    def receiver(sender, stats, **kwargs):
+        received.append(stats)
+
+    signals.build_finished.connect(receiver)
+    try:
+        call_command("tailwind", "build")
+    finally:
+        signals.build_finished.disconnect(receiver)
+    [stats] = received
+    assert stats.stylesheets[0].status == "built"
+    assert "run_cli" in stats.timings
+
+
+def test_build_canceled_sends_no_build_finished(build_writes_dist_css, mocker):
+    build_writes_dist_css.side_effect = KeyboardInterrupt
+    send = mocker.patch.object(signals.build_finished, "send")
+    call_command("tailwind", "build")
+    assert send.call_count == 0
+
+
+@pytest.fixture
+def entries(settings):
+    settings.TAILWIND_CLI_ENTRIES = [
+        {"name": "site", "src_css": "css/site.src.css", "dist_css": "css/site.css"},
+        {"name": "emails", "dist_css": "css/emails.css", "config_file": "tailwind.emails.js"},
+    ]
+    return utils.get_entries()
+
+
+def test_build_with_entries(build_writes_output, entries):
+    call_command("tailwind", "build")
+    assert build_writes_output.call_count == 2
+    assert sorted(call.kwargs["name"] for call in build_writes_output.call_args_list) == [
+        "emails",
+        "site",
+    ]
+    for entry in entries:
+        assert utils.get_full_dist_css_path(entry).exists()
+        assert utils.get_full_fingerprint_path(entry).exists()
+        assert utils.get_full_config_file_path(entry).exists()
+
+
+def test_build_with_entries_passes_config_file(build_writes_output, entries):
+    call_command("tailwind", "build")
+    build_cmds = sorted(
+        (args[0] for _, args, _ in build_writes_output.mock_calls), key=lambda cmd: cmd[2]
+    )
+    assert "--config" not in build_cmds[1]
+    assert "--input" in build_cmds[1]
+    assert build_cmds[0][build_cmds[0].index("--config") + 1] == str(
+        utils.get_full_config_file_path(entries[1])
+    )
+
+
+def test_build_with_entries_only_builds_changed_entries(build_writes_output, entries):
+    call_command("tailwind", "build")
+    utils.get_full_dist_css_path(entries[1]).unlink()
+    call_command("tailwind", "build")
+    assert build_writes_output.call_count == 3
+    _, args, _ = build_writes_output.mock_calls[2]
+    assert args[0][2] == str(utils.get_full_dist_css_path(entries[1]))
+
+
+def test_build_with_entries_fails(build_writes_output, entries):
+    build_writes_output.side_effect = api.BuildError(1, "tailwindcss")
+    with pytest.raises(subprocess.CalledProcessError):
+        call_command("tailwind", "build")
+    for entry in entries:
+        assert not utils.get_full_fingerprint_path(entry).exists()
+
+
 def test_watch_subprocess_run_called(settings, tmp_path, mocker):
     settings.BASE_DIR = tmp_path
     settings.TAILWIND_CLI_PATH = str(tmp_path)
@@ -214,6 +544,67 @@ def test_watch_with_input_file(settings, tmp_path, mocker):
     assert "--input" in args[0]
 
 
+def test_watch_with_entries(settings, tmp_path, mocker):
+    settings.BASE_DIR = tmp_path
+    settings.TAILWIND_CLI_PATH = str(tmp_path)
+    settings.TAILWIND_CLI_ENTRIES = [
+        {"name": "site", "dist_css": "css/site.css"},
+        {"name": "emails", "dist_css": "css/emails.css"},
+    ]
+    supervisor_run = mocker.patch("django_tailwind_cli.supervisor.run")
+    call_command("tailwind", "watch")
+    watchers = supervisor_run.call_args.args[0]
+    assert [watcher.name for watcher in watchers] == ["site", "emails"]
+    assert all("--watch" in watcher.cmd and watcher.restart for watcher in watchers)
+    assert watchers[1].cmd[2].endswith("css/emails.css")
+
+
+def test_watch_with_entries_keyboard_interrupt(settings, tmp_path, mocker, capsys):
+    settings.BASE_DIR = tmp_path
+    settings.TAILWIND_CLI_PATH = str(tmp_path)
+    settings.TAILWIND_CLI_ENTRIES = [
+        {"name": "site", "dist_css": "css/site.css"},
+        {"name": "emails", "dist_css": "css/emails.css"},
+    ]
+    mocker.patch("django_tailwind_cli.supervisor.run", side_effect=KeyboardInterrupt)
+    call_command("tailwind", "watch")
+    assert "Stopped watching for changes." in capsys.readouterr().out
+
+
+def test_stats(settings, tmp_path, capsys):
+    settings.BASE_DIR = tmp_path
+    settings.STATICFILES_DIRS = [tmp_path / "assets"]
+    settings.TEMPLATES = [
+        {
+            "BACKEND": "django.template.backends.django.DjangoTemplates",
+            "DIRS": [tmp_path / "templates"],
+        }
+    ]
+    (tmp_path / "templates").mkdir()
+    (tmp_path / "templates" / "index.html").write_text('<p class="p-4 mt-2">')
+    (tmp_path / "templates" / "robots.txt").write_text("User-agent: *")
+    call_command("tailwind", "stats")
+    captured = capsys.readouterr()
+    assert "No compiled stylesheet found" in captured.out
+
+    (tmp_path / "assets" / "css").mkdir(parents=True)
+    (tmp_path / "assets" / "css" / "tailwind.css").write_text(".p-4{padding:1rem}.mt-2{}.hidden{}")
+    call_command("tailwind", "stats")
+    captured = capsys.readouterr()
+    assert "2 templates use 2 of the 3 classes in the compiled stylesheets." in captured.out
+    assert "index.html: 2 unique of 2 classes" in captured.out
+    assert captured.out.rstrip().endswith("robots.txt")
+
+
+def test_stats_json(settings, tmp_path, capsys):
+    settings.BASE_DIR = tmp_path
+    call_command("tailwind", "stats", "--json", "--limit", "1")
+    report = json.loads(capsys.readouterr().out)
+    assert report["css_classes"] is None
+    assert len(report["heaviest_templates"]) <= 1
+    assert len(report["templates"]) == len(utils.get_template_files())
+
+
 def test_runserver():
     call_command("tailwind", "runserver")
 
@@ -222,6 +613,95 @@ def test_runserver_plus_with_django_extensions_installed():
     call_command("tailwind", "runserver_plus")
 
 
+def test_runserver_supervises_watcher_and_server(settings, tmp_path):
+    settings.BASE_DIR = tmp_path
+    settings.TAILWIND_CLI_PATH = str(tmp_path)
+    call_command("tailwind", "runserver", "8080")
+    from django_tailwind_cli import supervisor
+
+    children = supervisor.run.call_args.args[0]
+    assert [child.name for child in children] == ["default", "server"]
+    watcher, server = children
+    assert watcher.cmd[0] == str(utils.get_full_cli_path())
+    assert "--watch" in watcher.cmd
+    assert not watcher.restart
+    assert server.cmd[1:3] == ["manage.py", "runserver"]
+    assert server.cmd[-1] == "8080"
+    assert not server.restart
+    assert not server.prefix_output
+    assert supervisor.run.call_args.kwargs["env"]["PYTHONUNBUFFERED"] == "1"
+
+
+def test_runserver_stops_server_when_watcher_exits(settings, tmp_path):
+    settings.BASE_DIR = tmp_path
+    settings.TAILWIND_CLI_PATH = str(tmp_path)
+    call_command("tailwind", "runserver")
+    from django_tailwind_cli import supervisor
+
+    watcher, server = supervisor.run.call_args.args[0]
+    children = [
+        watcher._replace(cmd=[sys.executable, "-c", "raise SystemExit(3)"]),
+        server._replace(cmd=[sys.executable, "-c", "import time; time.sleep(60)"]),
+    ]
+    lines = []
+    started = time.monotonic()
+    returncode = asyncio.run(supervisor.Supervisor(children, write=lines.append).run())
+    assert returncode == 3
+    assert time.monotonic() - started < 10
+    assert "Restarting" not in "\n".join(lines)
+
+
+def test_runserver_with_entries(settings, tmp_path):
+    settings.BASE_DIR = tmp_path
+    settings.TAILWIND_CLI_PATH = str(tmp_path)
+    settings.TAILWIND_CLI_ENTRIES = [
+        {"name": "site", "dist_css": "css/site.css"},
+        {"name": "emails", "dist_css": "css/emails.css"},
+    ]
+    call_command("tailwind", "runserver")
+    from django_tailwind_cli import supervisor
+
+    children = supervisor.run.call_args.args[0]
+    assert [child.name for child in children] == ["site", "emails", "server"]
+
+
+def test_runserver_with_live_reload(settings, tmp_path):
+    settings.BASE_DIR = tmp_path
+    settings.TAILWIND_CLI_PATH = str(tmp_path)
+    settings.TAILWIND_CLI_LIVE_RELOAD = True
+    call_command("tailwind", "runserver", "8001")
+    from django_tailwind_cli import supervisor
+
+    kwargs = supervisor.run.call_args.kwargs
+    assert kwargs["env"]["TAILWIND_CLI_LIVE_RELOAD_URL"].startswith("http://127.0.0.1:")
+    assert len(kwargs["services"]) == 1
+    live_reload_server = kwargs["services"][0].__self__
+    assert "http://localhost:8001" in live_reload_server.allowed_origins
+
+
+def test_runserver_without_live_reload(settings, tmp_path):
+    settings.BASE_DIR = tmp_path
+    settings.TAILWIND_CLI_PATH = str(tmp_path)
+    call_command("tailwind", "runserver")
+    from django_tailwind_cli import supervisor
+
+    kwargs = supervisor.run.call_args.kwargs
+    assert "TAILWIND_CLI_LIVE_RELOAD_URL" not in kwargs["env"]
+    assert kwargs["services"] == []
+
+
+def test_runserver_propagates_exit_code(mocker):
+    mocker.patch("django_tailwind_cli.supervisor.run", return_value=3)
+    with pytest.raises(CommandError, match="exited with code 3") as e:
+        call_command("tailwind", "runserver")
+    assert e.value.returncode == 3
+
+
+def test_runserver_keyboard_interrupt(mocker):
+    mocker.patch("django_tailwind_cli.supervisor.run", side_effect=KeyboardInterrupt)
+    call_command("tailwind", "runserver")
+
+
 def test_runserver_plus_without_django_extensions_installed(mocker):
     mocker.patch.dict(sys.modules, {"django_extensions": None, "werkzeug": None})
     with pytest.raises(CommandError, match="Missing dependencies."):
@@ -252,3 +732,247 @@ def test_list_projecttest_list_project_all_templates_templates(capsys, settings)
     assert "templates/tailwind_cli/tailwind_css.html" in captured.out
     assert "templates/tests/base.html" in captured.out
     assert "templates/admin" in captured.out
+
+
+def test_download_cli_with_checksum_mismatch(settings, tmp_path):
+    settings.BASE_DIR = tmp_path
+    settings.TAILWIND_CLI_PATH = str(tmp_path)
+    settings.TAILWIND_CLI_CHECKSUM = "0" * 64
+    with pytest.raises(CommandError, match="Checksum mismatch"):
+        call_command("tailwind", "download_cli")
+    assert not utils.get_full_cli_path().exists()
+
+
+def test_download_cli_with_shared_cache(settings, tmp_path, monkeypatch, fake_urlopen, capsys):
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "cache"))
+    settings.TAILWIND_CLI_SHARED_CACHE = True
+    settings.TAILWIND_CLI_PATH = None
+
+    settings.BASE_DIR = tmp_path / "project1"
+    call_command("tailwind", "download_cli")
+    first_cli = utils.get_full_cli_path()
+    settings.BASE_DIR = tmp_path / "project2"
+    capsys.readouterr()
+    call_command("tailwind", "download_cli")
+    second_cli = utils.get_full_cli_path()
+    captured = capsys.readouterr()
+
+    assert "Downloading Tailwind CSS CLI from " not in captured.out
+    assert "Linked Tailwind CSS CLI from shared cache" in captured.out
+    binary_downloads = [
+        c for c in fake_urlopen.call_args_list if "sha256sums" not in c.args[0].full_url
+    ]
+    assert len(binary_downloads) == 1
+    [blob] = (tmp_path / "cache" / "django-tailwind-cli" / "blobs").iterdir()
+    assert first_cli.samefile(blob)
+    assert second_cli.samefile(blob)
+
+
+def test_download_cli_concurrently(settings, tmp_path, mocker, fake_urlopen):
+    settings.BASE_DIR = tmp_path
+    settings.TAILWIND_CLI_PATH = str(tmp_path)
+    download_file = download.download_file
+
+    def slow_download_file(*args, **kwargs):
+        time.sleep(0.1)
+        download_file(*args, **kwargs)
+
+    mocker.patch("django_tailwind_cli.download.download_file", side_effect=slow_download_file)
+    threads = [
+        threading.Thread(target=call_command, args=("tailwind", "download_cli")) for _ in range(4)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    binary_downloads = [
+        c for c in fake_urlopen.call_args_list if "sha256sums" not in c.args[0].full_url
+    ]
+    assert len(binary_downloads) == 1
+    assert utils.get_full_cli_path().exists()
+    assert not download.get_partial_path(utils.get_full_cli_path()).exists()
+
+
+def test_list_templates_does_not_require_cli(settings, tmp_path, fake_urlopen):
+    settings.BASE_DIR = tmp_path
+    settings.TAILWIND_CLI_PATH = str(tmp_path)
+    call_command("tailwind", "list_templates")
+    assert not utils.get_full_cli_path().exists()
+    assert not utils.get_full_config_file_path().exists()
+    assert fake_urlopen.call_count == 0
+
+
+# Generous upper bound for a cold start of a subcommand, including the import of the command.
+STARTUP_BUDGET = 1.0
+
+STARTUP_CODE = """
+import contextlib, sys, time, django
+django.setup()
+from django.conf import settings
+settings.BASE_DIR = settings.TAILWIND_CLI_PATH = sys.argv[1]
+settings.STATICFILES_DIRS = [sys.argv[1] + "/assets"]
+from django.core.management import call_command
+start = time.perf_counter()
+with contextlib.suppress(SystemExit):
+    call_command("tailwind", *sys.argv[2:])
+print()
+print(time.perf_counter() - start)
+modules = ["django_tailwind_cli.download", "multiprocessing", "urllib.request"]
+print(sorted(m for m in modules if m in sys.modules))
+"""
+
+STUB_CLI = """#!{python}
+import pathlib, sys
+output = pathlib.Path(sys.argv[sys.argv.index("--output") + 1])
+output.parent.mkdir(parents=True, exist_ok=True)
+output.write_text("/* css */")
+"""
+
+
+@pytest.mark.parametrize(
+    ("args", "imported_modules"),
+    [
+        (["list_templates"], []),
+        (["--help"], []),
+        # The client of the build daemon pulls in multiprocessing, but an existing CLI is used
+        # without loading the download.
+        (["build"], ["multiprocessing"]),
+    ],
+)
+def test_startup(settings, tmp_path, args, imported_modules):
+    settings.BASE_DIR = settings.TAILWIND_CLI_PATH = tmp_path
+    cli_path = utils.get_full_cli_path()
+    cli_path.write_text(STUB_CLI.format(python=sys.executable))
+    cli_path.chmod(0o755)
+    # subprocess.run is mocked by the configure_settings fixture.
+    with subprocess.Popen(
+        [sys.executable, "-c", STARTUP_CODE, str(tmp_path), *args],
+        stdout=subprocess.PIPE,
+        cwd=pathlib.Path(__file__).parent.parent,
+        env={**os.environ, "DJANGO_SETTINGS_MODULE": "tests.settings", "PYTHONPATH": ".:src"},
+        text=True,
+    ) as process:
+        stdout, _ = process.communicate()
+    assert process.returncode == 0
+    *_, duration, modules = stdout.splitlines()
+    assert modules == str(imported_modules)
+    assert float(duration) < STARTUP_BUDGET
+
+
+def test_build_with_auto_content(settings, tmp_path, mocker):
+    settings.BASE_DIR = tmp_path
+    settings.TAILWIND_CLI_PATH = str(tmp_path)
+    settings.TAILWIND_CLI_AUTO_CONTENT = True
+    run_cli = mocker.patch("django_tailwind_cli.api.run_cli")
+    call_command("tailwind", "build")
+    name, args, kwargs = run_cli.mock_calls[0]
+    assert "--config" in args[0]
+    assert args[0][args[0].index("--config") + 1] == str(
+        utils.get_full_generated_config_file_path()
+    )
+    assert utils.get_full_generated_config_file_path().exists()
+
+
+def test_watch_with_debounce(settings, tmp_path, mocker, capsys):
+    settings.BASE_DIR = tmp_path
+    settings.TAILWIND_CLI_PATH = str(tmp_path)
+    settings.TAILWIND_CLI_WATCH_DEBOUNCE = 0.2
+    iter_bursts = mocker.patch(
+        "django_tailwind_cli.watcher.iter_bursts", return_value=iter([{"a.html", "b.html"}])
+    )
+    subprocess_run = mocker.patch("subprocess.run")
+    call_command("tailwind", "watch")
+    assert iter_bursts.call_args.args[1] == 0.2
+    assert subprocess_run.call_count == 2
+    cmd = subprocess_run.call_args.args[0]
+    assert "--watch" not in cmd and "--minify" not in cmd
+    assert "2 changed files. Rebuilding stylesheets." in capsys.readouterr().out
+
+
+def test_watch_with_debounce_keeps_running_after_failed_build(settings, tmp_path, mocker, capsys):
+    settings.BASE_DIR = tmp_path
+    settings.TAILWIND_CLI_PATH = str(tmp_path)
+    settings.TAILWIND_CLI_WATCH_DEBOUNCE = 0.2
+    mocker.patch("django_tailwind_cli.watcher.iter_bursts", return_value=iter([{"a.html"}]))
+    subprocess_run = mocker.patch(
+        "subprocess.run", side_effect=subprocess.CalledProcessError(1, "tailwindcss")
+    )
+    call_command("tailwind", "watch")
+    assert subprocess_run.call_count == 2
+    assert "The Tailwind CSS CLI exited with code 1." in capsys.readouterr().out
+
+
+def test_runserver_with_debounce(settings, tmp_path):
+    settings.BASE_DIR = tmp_path
+    settings.TAILWIND_CLI_PATH = str(tmp_path)
+    settings.TAILWIND_CLI_WATCH_DEBOUNCE = 0.2
+    settings.TAILWIND_CLI_LIVE_RELOAD = False
+    call_command("tailwind", "runserver")
+    from django_tailwind_cli import supervisor
+
+    children = supervisor.run.call_args.args[0]
+    assert [child.name for child in children] == ["server"]
+    [service] = supervisor.run.call_args.kwargs["services"]
+    assert service.__name__ == "_watch_debounced_service"
+
+
+def test_watch_debounced_service_stops_when_cancelled(settings, tmp_path, mocker):
+    import asyncio
+
+    settings.BASE_DIR = tmp_path
+    settings.TAILWIND_CLI_PATH = str(tmp_path)
+    settings.TAILWIND_CLI_WATCH_DEBOUNCE = 0.2
+    subprocess_run = mocker.patch("subprocess.run")
+    command = tailwind.Command()
+
+    async def main():
+        task = asyncio.ensure_future(command._watch_debounced_service())
+        while not subprocess_run.called:
+            await asyncio.sleep(0.01)
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+
+    started = time.monotonic()
+    asyncio.run(main())
+    assert time.monotonic() - started < 5
+
+
+def test_build_with_extract_classes(settings, tmp_path, mocker):
+    settings.BASE_DIR = tmp_path
+    settings.TAILWIND_CLI_PATH = str(tmp_path)
+    settings.TAILWIND_CLI_EXTRACT_CLASSES = True
+    run_cli = mocker.patch("django_tailwind_cli.api.run_cli")
+    call_command("tailwind", "build")
+    name, args, kwargs = run_cli.mock_calls[0]
+    assert args[0][args[0].index("--config") + 1] == str(
+        utils.get_full_generated_config_file_path()
+    )
+    assert str(utils.get_full_candidates_path()) in (
+        utils.get_full_generated_config_file_path().read_text()
+    )
+    assert utils.get_full_candidates_path().exists()
+
+
+def test_watch_with_extract_classes(settings, tmp_path, mocker):
+    settings.BASE_DIR = tmp_path
+    settings.TAILWIND_CLI_PATH = str(tmp_path)
+    settings.TAILWIND_CLI_EXTRACT_CLASSES = True
+    supervisor_run = mocker.patch("django_tailwind_cli.supervisor.run")
+    call_command("tailwind", "watch")
+    from django_tailwind_cli import candidates
+
+    [watcher] = supervisor_run.call_args.args[0]
+    assert "--watch" in watcher.cmd
+    assert supervisor_run.call_args.kwargs["services"] == [candidates.watch]
+    assert utils.get_full_candidates_path().exists()
+
+
+def test_watch_with_auto_content(settings, tmp_path, mocker):
+    settings.BASE_DIR = tmp_path
+    settings.TAILWIND_CLI_PATH = str(tmp_path)
+    settings.TAILWIND_CLI_AUTO_CONTENT = True
+    subprocess_run = mocker.patch("subprocess.run")
+    call_command("tailwind", "watch")
+    name, args, kwargs = subprocess_run.mock_calls[0]
+    assert "--config" in args[0]
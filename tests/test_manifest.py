@@ -0,0 +1,80 @@
+import json
+import os
+
+import pytest
+
+from django_tailwind_cli import manifest, utils
+
+
+@pytest.fixture(autouse=True)
+def configure_settings(settings, tmp_path):
+    settings.STATICFILES_DIRS = [tmp_path]
+    settings.TAILWIND_CLI_HASHED_FILENAMES = True
+    utils.get_full_dist_css_path().parent.mkdir(parents=True)
+    utils.get_full_dist_css_path().write_text(".p-4{padding:1rem}")
+    manifest._read_manifest.cache_clear()
+
+
+def test_get_hashed_name():
+    assert "css/tailwind.36e64f19f57a.css" == manifest.get_hashed_name("css/tailwind.css", b"css")
+
+
+def test_write_hashed_css(tmp_path):
+    hashed_css = manifest.write_hashed_css()
+    assert hashed_css.parent == tmp_path / "css"
+    assert hashed_css.read_text() == ".p-4{padding:1rem}"
+    assert {"css/tailwind.css": f"css/{hashed_css.name}"} == json.loads(
+        utils.get_full_manifest_path().read_text()
+    )
+
+
+def test_write_hashed_css_keeps_recent_copies(settings, tmp_path):
+    settings.TAILWIND_CLI_HASHED_FILENAMES_KEEP = 2
+    (tmp_path / "css" / "other.0123456789ab.css").write_text("")
+    hashed_copies = []
+    for i, css in enumerate([".p-4{padding:1rem}", ".p-8{padding:2rem}", ".p-2{padding:.5rem}"]):
+        utils.get_full_dist_css_path().write_text(css)
+        hashed_css = manifest.write_hashed_css()
+        hashed_css.with_name(f"{hashed_css.name}.gz").write_text("")
+        os.utime(hashed_css, (1000 + i, 1000 + i))
+        hashed_copies.append(hashed_css)
+
+    assert not hashed_copies[0].exists()
+    assert not hashed_copies[0].with_name(f"{hashed_copies[0].name}.gz").exists()
+    assert sorted(p.name for p in (tmp_path / "css").glob("*.css")) == sorted(
+        [hashed_copies[1].name, hashed_copies[2].name, "other.0123456789ab.css", "tailwind.css"]
+    )
+
+
+def test_write_hashed_css_keeps_reverted_copy(settings, tmp_path):
+    settings.TAILWIND_CLI_HASHED_FILENAMES_KEEP = 2
+    first_css = manifest.write_hashed_css()
+    os.utime(first_css, (1000, 1000))
+    utils.get_full_dist_css_path().write_text(".p-8{padding:2rem}")
+    os.utime(manifest.write_hashed_css(), (2000, 2000))
+
+    utils.get_full_dist_css_path().write_text(".p-4{padding:1rem}")
+    assert manifest.write_hashed_css() == first_css
+    utils.get_full_dist_css_path().write_text(".p-2{padding:.5rem}")
+    manifest.write_hashed_css()
+    assert first_css.exists()
+
+
+def test_get_dist_css():
+    assert "css/tailwind.css" == manifest.get_dist_css()
+    hashed_css = manifest.write_hashed_css()
+    assert f"css/{hashed_css.name}" == manifest.get_dist_css()
+
+
+def test_get_dist_css_is_cached(mocker):
+    manifest.write_hashed_css()
+    manifest.get_dist_css()
+    read_text = mocker.spy(manifest.Path, "read_text")
+    manifest.get_dist_css()
+    assert read_text.call_count == 0
+
+
+def test_get_dist_css_without_hashed_filenames(settings):
+    manifest.write_hashed_css()
+    settings.TAILWIND_CLI_HASHED_FILENAMES = False
+    assert "css/tailwind.css" == manifest.get_dist_css()
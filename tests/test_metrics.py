@@ -0,0 +1,83 @@
+import json
+
+import pytest
+
+from django_tailwind_cli import metrics, utils
+
+
+@pytest.fixture(autouse=True)
+def configure_settings(settings, tmp_path):
+    settings.STATICFILES_DIRS = [tmp_path]
+    utils.get_full_dist_css_path().parent.mkdir(parents=True)
+    utils.get_full_dist_css_path().write_text(".p-4{padding:1rem}" * 100)
+
+
+def test_timings(mocker):
+    perf_counter = mocker.patch(
+        "time.perf_counter", side_effect=[0.0, 0.5, 1.5, 2.0, 2.5, 3.0, 3.25, 4.0]
+    )
+    timings = metrics.Timings()
+    with timings.phase("templates"):
+        pass
+    with timings.phase("run_cli"):
+        pass
+    with timings.phase("templates"):
+        pass
+    timings.stop()
+    assert timings.phases == {"templates": 1.25, "run_cli": 0.5}
+    assert timings.total == 4.0
+    assert timings.total == 4.0
+    assert perf_counter.call_count == 8
+
+
+def test_measure_stylesheet():
+    stylesheet = metrics.measure_stylesheet(utils.get_entry(), metrics.BUILT)
+    assert stylesheet.entry == "default"
+    assert stylesheet.status == "built"
+    assert stylesheet.size == 1800
+    assert 0 < stylesheet.gzip_size < stylesheet.size
+    assert stylesheet.size_delta is None
+    assert stylesheet.gzip_size_delta is None
+    assert json.loads(utils.get_full_stats_path().read_text()) == {
+        "size": 1800,
+        "gzip_size": stylesheet.gzip_size,
+    }
+
+
+def test_measure_stylesheet_delta():
+    metrics.measure_stylesheet(utils.get_entry(), metrics.BUILT)
+    utils.get_full_dist_css_path().write_text(".p-4{padding:1rem}" * 50)
+    stylesheet = metrics.measure_stylesheet(utils.get_entry(), metrics.BUILT)
+    assert stylesheet.size_delta == -900
+    assert stylesheet.gzip_size_delta is not None
+
+
+def test_measure_stylesheet_up_to_date_keeps_previous_sizes():
+    utils.get_full_stats_path().write_text(json.dumps({"size": 1000, "gzip_size": 10}))
+    stylesheet = metrics.measure_stylesheet(utils.get_entry(), metrics.UP_TO_DATE)
+    assert stylesheet.size_delta == 800
+    assert json.loads(utils.get_full_stats_path().read_text())["size"] == 1000
+
+
+def test_measure_stylesheet_missing():
+    utils.get_full_dist_css_path().unlink()
+    assert metrics.measure_stylesheet(utils.get_entry(), metrics.BUILT) is None
+
+
+def test_format_stylesheet():
+    stylesheet = metrics.StylesheetStats("default", "tailwind.css", "built", 2048, 512, 512, -10)
+    assert (
+        "2.0 KiB (gzip 512 B), +512 B (gzip -10 B) since the previous build"
+        == metrics.format_stylesheet(stylesheet)
+    )
+
+
+def test_format_stylesheet_without_previous_build():
+    stylesheet = metrics.StylesheetStats("default", "tailwind.css", "built", 100, 80, None, None)
+    assert "100 B (gzip 80 B)" == metrics.format_stylesheet(stylesheet)
+
+
+def test_format_timings():
+    assert "run_cli 1234 ms, postprocess 5 ms, total 1239 ms" == metrics.format_timings(
+        {"run_cli": 1.234, "postprocess": 0.005}, 1.239
+    )
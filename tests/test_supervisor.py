@@ -0,0 +1,195 @@
+import asyncio
+import os
+import signal
+import sys
+import threading
+import time
+
+import pytest
+
+from django_tailwind_cli import supervisor
+
+
+def python(code: str) -> list[str]:
+    return [sys.executable, "-c", code]
+
+
+@pytest.fixture(autouse=True)
+def fast_restarts(mocker):
+    mocker.patch.object(supervisor, "RESTART_DELAY", 0.01)
+    mocker.patch.object(supervisor, "STOP_TIMEOUT", 1.0)
+
+
+def test_run_prefixes_output():
+    lines = []
+    returncode = supervisor.run(
+        [supervisor.ChildProcess("site", python("print('Done in 10ms.')"), restart=False)],
+        write=lines.append,
+    )
+    assert returncode == 0
+    assert lines == ["[site] Done in 10ms.", "[site] Exited with code 0."]
+
+
+def test_run_passes_output_to_on_output():
+    received = []
+    supervisor.run(
+        [supervisor.ChildProcess("site", python("print('Rebuilding...')"), restart=False)],
+        write=lambda line: None,  # noqa: ARG005
+        on_output=lambda name, line: received.append((name, line)),
+    )
+    assert received == [("site", "Rebuilding...")]
+
+
+def test_run_aligns_prefixes():
+    lines = []
+    supervisor.run(
+        [
+            supervisor.ChildProcess("site", python("import time; time.sleep(0.2)"), restart=False),
+            supervisor.ChildProcess("emails", python("print('ready')")),
+        ],
+        write=lines.append,
+    )
+    assert "[emails] ready" in lines
+    assert "[site]   Exited with code 0." in lines
+
+
+def test_run_returns_exit_code():
+    returncode = supervisor.run(
+        [supervisor.ChildProcess("server", python("raise SystemExit(3)"), restart=False)],
+        write=lambda _: None,
+    )
+    assert returncode == 3
+
+
+def test_run_restarts_crashed_children():
+    lines = []
+    supervisor.run(
+        [
+            supervisor.ChildProcess("watcher", python("print('crash'); raise SystemExit(1)")),
+            supervisor.ChildProcess("timer", python("import time; time.sleep(1)"), restart=False),
+        ],
+        write=lines.append,
+    )
+    assert lines.count("[watcher] crash") >= 2
+    assert "[watcher] Exited with code 1. Restarting in 0.01s." in lines
+
+
+def test_run_stops_other_children():
+    started = time.monotonic()
+    supervisor.run(
+        [
+            supervisor.ChildProcess("watcher", python("import time; time.sleep(30)")),
+            supervisor.ChildProcess("server", python("pass"), restart=False),
+        ],
+        write=lambda _: None,
+    )
+    assert time.monotonic() - started < 10
+
+
+def test_stop_kills_children_ignoring_terminate(mocker):
+    mocker.patch.object(supervisor, "STOP_TIMEOUT", 0.2)
+    code = (
+        "import signal, time\n"
+        "signal.signal(signal.SIGTERM, signal.SIG_IGN)\n"
+        "print('ready', flush=True)\n"
+        "time.sleep(30)\n"
+    )
+
+    async def main():
+        lines = []
+        s = supervisor.Supervisor(
+            [supervisor.ChildProcess("stubborn", python(code))], write=lines.append
+        )
+        task = asyncio.ensure_future(s.run())
+        while not lines:
+            await asyncio.sleep(0.01)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        return s
+
+    started = time.monotonic()
+    s = asyncio.run(main())
+    assert time.monotonic() - started < 10
+    assert all(process.returncode is not None for process in s._processes.values())
+
+
+def test_run_with_env():
+    lines = []
+    supervisor.run(
+        [supervisor.ChildProcess("env", python("import os; print(os.environ['FOO'])"), False)],
+        write=lines.append,
+        env={**os.environ, "FOO": "bar"},
+    )
+    assert "[env] bar" in lines
+
+
+def test_run_without_prefixed_output(capfd):
+    lines = []
+    supervisor.run(
+        [supervisor.ChildProcess("server", python("print('direct')"), False, False)],
+        write=lines.append,
+    )
+    assert lines == ["[server] Exited with code 0."]
+    assert "direct" in capfd.readouterr().out
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="Signals are not supported on Windows.")
+def test_run_stops_children_on_sigterm():
+    timer = threading.Timer(0.5, os.kill, (os.getpid(), signal.SIGTERM))
+    timer.start()
+    started = time.monotonic()
+    returncode = supervisor.run(
+        [supervisor.ChildProcess("server", python("import time; time.sleep(30)"), False)],
+        write=lambda _: None,
+    )
+    assert returncode == 128 + signal.SIGTERM
+    assert time.monotonic() - started < 10
+
+
+def test_run_with_services():
+    events = []
+
+    async def service():
+        events.append("started")
+        try:
+            await asyncio.sleep(30)
+        finally:
+            events.append("stopped")
+
+    supervisor.run(
+        [supervisor.ChildProcess("server", python("import time; time.sleep(0.2)"), False)],
+        write=lambda _: None,
+        services=[service],
+    )
+    assert events == ["started", "stopped"]
+
+
+def test_run_stops_when_service_fails():
+    async def broken_service():
+        await asyncio.sleep(0.1)
+        raise RuntimeError("Address already in use")
+
+    lines = []
+    started = time.monotonic()
+    returncode = supervisor.run(
+        [supervisor.ChildProcess("server", python("import time; time.sleep(30)"), restart=False)],
+        write=lines.append,
+        services=[broken_service],
+    )
+    assert returncode == supervisor.SERVICE_FAILED
+    assert "Service 'broken_service' failed. Stopping." in lines
+    assert "RuntimeError: Address already in use" in lines
+    assert time.monotonic() - started < 10
+
+
+def test_run_keeps_running_when_service_returns():
+    async def short_service():
+        pass
+
+    returncode = supervisor.run(
+        [supervisor.ChildProcess("server", python("import time; time.sleep(0.2)"), restart=False)],
+        write=lambda _: None,
+        services=[short_service],
+    )
+    assert returncode == 0
@@ -1,6 +1,8 @@
 import pytest
 from django.template import engines
 
+from django_tailwind_cli import critical, manifest, utils
+
 
 @pytest.fixture
 def template_string():
@@ -20,3 +22,134 @@ def test_tailwind_css_tag_in_devmode(settings, template_string):
     settings.DEBUG = True
     template = engines["django"].from_string(template_string)
     assert '<link rel="stylesheet" href="/static/css/tailwind.css">' == template.render({})
+
+
+def test_tailwind_css_tag_with_hashed_filenames(settings, template_string, tmp_path):
+    settings.DEBUG = False
+    settings.STATICFILES_DIRS = [tmp_path]
+    settings.TAILWIND_CLI_HASHED_FILENAMES = True
+    utils.get_full_dist_css_path().parent.mkdir(parents=True)
+    utils.get_full_dist_css_path().write_text(".p-4{padding:1rem}")
+    hashed_css = manifest.write_hashed_css()
+    template = engines["django"].from_string(template_string)
+    assert (
+        f'<link rel="preload" href="/static/css/{hashed_css.name}" as="style"><link rel="stylesheet" href="/static/css/{hashed_css.name}">'  # noqa: E501
+        == template.render({})
+    )
+
+
+def test_tailwind_css_tag_with_hashed_filenames_in_devmode(settings, template_string, tmp_path):
+    settings.DEBUG = True
+    settings.STATICFILES_DIRS = [tmp_path]
+    settings.TAILWIND_CLI_HASHED_FILENAMES = True
+    utils.get_full_dist_css_path().parent.mkdir(parents=True)
+    utils.get_full_dist_css_path().write_text(".p-4{padding:1rem}")
+    manifest.write_hashed_css()
+    template = engines["django"].from_string(template_string)
+    assert '<link rel="stylesheet" href="/static/css/tailwind.css">' == template.render({})
+
+
+def test_tailwind_css_tag_with_critical_css(settings, template_string, tmp_path):
+    settings.DEBUG = False
+    settings.STATICFILES_DIRS = [tmp_path]
+    settings.TAILWIND_CLI_CRITICAL_TEMPLATES = ["tests/base.html"]
+    utils.get_full_critical_css_path().parent.mkdir(parents=True)
+    utils.get_full_critical_css_path().write_text(".p-4{padding:1rem}")
+    critical.clear_cache()
+    template = engines["django"].from_string(template_string)
+    assert (
+        "<style>.p-4{padding:1rem}</style>"
+        '<link rel="preload" href="/static/css/tailwind.css" as="style" onload="this.onload=null;this.rel=\'stylesheet\'">'  # noqa: E501
+        '<noscript><link rel="stylesheet" href="/static/css/tailwind.css"></noscript>'
+        == template.render({})
+    )
+
+
+def test_tailwind_css_tag_with_critical_css_in_devmode(settings, template_string, tmp_path):
+    settings.DEBUG = True
+    settings.STATICFILES_DIRS = [tmp_path]
+    settings.TAILWIND_CLI_CRITICAL_TEMPLATES = ["tests/base.html"]
+    utils.get_full_critical_css_path().parent.mkdir(parents=True)
+    utils.get_full_critical_css_path().write_text(".p-4{padding:1rem}")
+    critical.clear_cache()
+    template = engines["django"].from_string(template_string)
+    assert '<link rel="stylesheet" href="/static/css/tailwind.css">' == template.render({})
+
+
+def test_tailwind_css_tag_is_rendered_once(settings, template_string, mocker):
+    settings.DEBUG = False
+    get_dist_css = mocker.spy(manifest, "get_dist_css")
+    template = engines["django"].from_string(template_string)
+    assert template.render({}) == template.render({})
+    assert get_dist_css.call_count == 1
+
+
+def test_tailwind_css_tag_rendered_again_when_settings_change(settings, template_string):
+    settings.DEBUG = False
+    template = engines["django"].from_string(template_string)
+    template.render({})
+    settings.STATIC_URL = "/assets/"
+    assert "/assets/css/tailwind.css" in template.render({})
+
+
+def test_tailwind_css_tag_rendered_again_when_manifest_changes(settings, template_string, tmp_path):
+    settings.DEBUG = False
+    settings.STATICFILES_DIRS = [tmp_path]
+    settings.TAILWIND_CLI_HASHED_FILENAMES = True
+    utils.get_full_dist_css_path().parent.mkdir(parents=True)
+    utils.get_full_dist_css_path().write_text(".p-4{padding:1rem}")
+    template = engines["django"].from_string(template_string)
+    hashed_css = manifest.write_hashed_css()
+    assert hashed_css.name in template.render({})
+    utils.get_full_dist_css_path().write_text(".p-8{padding:2rem}")
+    hashed_css = manifest.write_hashed_css()
+    assert hashed_css.name in template.render({})
+
+
+def test_tailwind_css_tag_with_entry(settings):
+    settings.DEBUG = True
+    settings.TAILWIND_CLI_ENTRIES = [
+        {"name": "site", "dist_css": "css/site.css"},
+        {"name": "emails", "dist_css": "css/emails.css"},
+    ]
+    template = engines["django"].from_string(
+        '{% load tailwind_cli %}{% tailwind_css %}{% tailwind_css "emails" %}'
+    )
+    html = template.render({})
+    assert '<link rel="stylesheet" href="/static/css/site.css">' in html
+    assert '<link rel="stylesheet" href="/static/css/emails.css">' in html
+
+
+def test_tailwind_css_tag_with_unknown_entry(settings):
+    template = engines["django"].from_string('{% load tailwind_cli %}{% tailwind_css "admin" %}')
+    with pytest.raises(ValueError, match="Unknown entry 'admin'"):
+        template.render({})
+
+
+def test_tailwind_css_tag_with_live_reload(settings, template_string, monkeypatch):
+    settings.DEBUG = True
+    settings.TAILWIND_CLI_LIVE_RELOAD = True
+    monkeypatch.setenv("TAILWIND_CLI_LIVE_RELOAD_URL", "http://127.0.0.1:8001/events")
+    template = engines["django"].from_string(template_string)
+    html = template.render({})
+    assert (
+        '<link rel="stylesheet" href="/static/css/tailwind.css" data-tailwind-cli="css/tailwind.css">'  # noqa: E501
+        in html
+    )
+    assert 'new EventSource("http://127.0.0.1:8001/events")' in html
+
+
+def test_tailwind_css_tag_with_live_reload_disabled(settings, template_string, monkeypatch):
+    settings.DEBUG = True
+    settings.TAILWIND_CLI_LIVE_RELOAD = False
+    monkeypatch.setenv("TAILWIND_CLI_LIVE_RELOAD_URL", "http://127.0.0.1:8001/events")
+    template = engines["django"].from_string(template_string)
+    assert '<link rel="stylesheet" href="/static/css/tailwind.css">' == template.render({})
+
+
+def test_tailwind_css_tag_with_live_reload_in_production(settings, template_string, monkeypatch):
+    settings.DEBUG = False
+    settings.TAILWIND_CLI_LIVE_RELOAD = True
+    monkeypatch.setenv("TAILWIND_CLI_LIVE_RELOAD_URL", "http://127.0.0.1:8001/events")
+    template = engines["django"].from_string(template_string)
+    assert "EventSource" not in template.render({})
@@ -0,0 +1,131 @@
+import os
+import time
+
+import pytest
+
+from django_tailwind_cli import template_index, utils
+
+OLD = time.time() - 60
+
+
+@pytest.fixture
+def templates(settings, tmp_path):
+    settings.BASE_DIR = tmp_path
+    settings.INSTALLED_APPS = []
+    settings.TEMPLATES = [
+        {
+            "BACKEND": "django.template.backends.django.DjangoTemplates",
+            "DIRS": [tmp_path / "templates"],
+        }
+    ]
+    for path in ["index.html", "partials/nav.html", "partials/footer.html"]:
+        (tmp_path / "templates" / path).parent.mkdir(parents=True, exist_ok=True)
+        (tmp_path / "templates" / path).write_text(f"<div>{path}</div>")
+    age(tmp_path / "templates")
+    return tmp_path / "templates"
+
+
+def age(root):
+    """Move all modification times into the past, so that the index trusts them."""
+    for d, _, filenames in os.walk(root):
+        for name in filenames:
+            os.utime(os.path.join(d, name), (OLD, OLD))
+        os.utime(d, (OLD, OLD))
+
+
+def test_files(templates):
+    index = template_index.get_template_index()
+    assert [
+        str(templates / "index.html"),
+        str(templates / "partials/footer.html"),
+        str(templates / "partials/nav.html"),
+    ] == index.files()
+
+
+def test_index_is_persisted(templates, settings):
+    template_index.get_template_index().entries()
+    assert (utils.get_cache_dir() / "templates.json").exists()
+
+
+def test_index_without_cache_dir(templates, settings):
+    settings.TAILWIND_CLI_CACHE_DIR = None
+    index = template_index.get_template_index()
+    assert index.index_file is None
+    assert len(index.entries()) == 3
+    assert not (settings.BASE_DIR / ".tailwind-cli").exists()
+
+
+def test_unchanged_directories_are_not_listed_again(templates, mocker):
+    template_index.TemplateIndex(utils.get_cache_dir() / "templates.json").files()
+
+    scandir = mocker.spy(os, "scandir")
+    index = template_index.TemplateIndex(utils.get_cache_dir() / "templates.json")
+    assert len(index.files()) == 3
+    assert scandir.call_count == 0
+
+    (templates / "partials" / "header.html").write_text("<header></header>")
+    assert str(templates / "partials" / "header.html") in index.files()
+    assert [c.args[0] for c in scandir.call_args_list] == [str(templates / "partials")]
+
+
+def test_unchanged_index_is_not_written_again(templates, mocker):
+    template_index.TemplateIndex(utils.get_cache_dir() / "templates.json").entries()
+
+    index = template_index.TemplateIndex(utils.get_cache_dir() / "templates.json")
+    save = mocker.spy(index, "save")
+    index.files()
+    index.entries()
+    assert save.call_count == 0
+
+    (templates / "partials" / "nav.html").unlink()
+    index.entries()
+    assert save.call_count == 1
+
+
+def test_unchanged_files_are_not_hashed_again(templates, mocker):
+    template_index.TemplateIndex(utils.get_cache_dir() / "templates.json").entries()
+
+    sha256 = mocker.spy(template_index.hashlib, "sha256")
+    index = template_index.TemplateIndex(utils.get_cache_dir() / "templates.json")
+    entries = index.entries()
+    assert sha256.call_count == 0
+
+    (templates / "index.html").write_text("<main>changed</main>")
+    changed_entries = index.entries()
+    assert sha256.call_count == 1
+    assert entries[0].path == changed_entries[0].path
+    assert entries[0].sha256 != changed_entries[0].sha256
+    assert entries[1:] == changed_entries[1:]
+
+
+def test_recently_modified_files_are_hashed_again(templates, mocker):
+    (templates / "index.html").write_text("<main>fresh</main>")
+    index = template_index.get_template_index()
+    index.entries()
+
+    sha256 = mocker.spy(template_index.hashlib, "sha256")
+    index.entries()
+    assert sha256.call_count == 1
+
+
+def test_removed_files(templates):
+    index = template_index.get_template_index()
+    index.entries()
+    (templates / "partials" / "nav.html").unlink()
+    assert [str(templates / "index.html"), str(templates / "partials/footer.html")] == [
+        e.path for e in index.entries()
+    ]
+
+
+def test_changed_ignore_patterns(templates, settings):
+    index = template_index.get_template_index()
+    assert len(index.files()) == 3
+    settings.TAILWIND_CLI_TEMPLATE_IGNORE_PATTERNS = ["partials"]
+    assert [str(templates / "index.html")] == index.files()
+
+
+def test_corrupt_index_file(templates):
+    index_file = utils.get_cache_dir() / "templates.json"
+    index_file.parent.mkdir(parents=True)
+    index_file.write_text("{")
+    assert len(template_index.TemplateIndex(index_file).files()) == 3
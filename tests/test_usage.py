@@ -0,0 +1,62 @@
+from django_tailwind_cli import usage
+
+
+def write(path, content):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(content)
+    return str(path)
+
+
+def test_collect_usage(settings, tmp_path):
+    settings.BASE_DIR = tmp_path
+    base = write(tmp_path / "templates" / "base.html", '<body class="p-4 text-sm">')
+    index = write(tmp_path / "templates" / "index.html", '<p class="p-4 mt-2 md:mt-4 hello">')
+    robots = write(tmp_path / "templates" / "robots.txt", "User-agent: *")
+    css_classes = {"p-4", "text-sm", "mt-2", "md:mt-4", "hidden"}
+
+    report = usage.collect_usage([base, index, robots], css_classes)
+    assert report.classes == 4
+    assert report.css_classes == 5
+    assert report.templates == [
+        usage.TemplateUsage(base, usage.PROJECT_LABEL, 2, 1),
+        usage.TemplateUsage(index, usage.PROJECT_LABEL, 3, 2),
+        usage.TemplateUsage(robots, usage.PROJECT_LABEL, 0, 0),
+    ]
+    assert report.apps == [usage.AppUsage(usage.PROJECT_LABEL, 3, 4)]
+    assert [t.path for t in report.heaviest_templates(1)] == [index]
+    assert [t.path for t in report.templates_without_classes()] == [robots]
+    assert report.as_dict(1)["templates_without_classes"] == [robots]
+
+
+def test_collect_usage_without_css_classes(settings, tmp_path):
+    settings.BASE_DIR = tmp_path
+    index = write(tmp_path / "templates" / "index.html", '<p class="p-4 hello">')
+    report = usage.collect_usage([index])
+    # The element and attribute names are candidates as well.
+    assert report.classes == 4
+    assert report.css_classes is None
+
+
+def test_get_app_label():
+    app_paths = [("/app/blog/comments/", "comments"), ("/app/blog/", "blog")]
+    assert usage.get_app_label("/app/blog/comments/templates/a.html", app_paths) == "comments"
+    assert usage.get_app_label("/app/blog/templates/b.html", app_paths) == "blog"
+    assert usage.get_app_label("/app/templates/c.html", app_paths) == usage.PROJECT_LABEL
+
+
+def test_get_app_paths_keeps_apps_sharing_a_prefix_with_the_project(settings, tmp_path, mocker):
+    settings.BASE_DIR = tmp_path / "app_project"
+    app_configs = [
+        mocker.Mock(path=str(tmp_path / "app"), label="app"),
+        mocker.Mock(path=str(tmp_path), label="everything"),
+    ]
+    mocker.patch.object(usage.apps, "get_app_configs", return_value=app_configs)
+    assert usage._get_app_paths() == [(f"{tmp_path.resolve() / 'app'}/", "app")]
+
+
+def test_get_css_classes(settings, tmp_path):
+    settings.BASE_DIR = tmp_path
+    settings.STATICFILES_DIRS = [tmp_path / "assets"]
+    assert usage.get_css_classes() is None
+    write(tmp_path / "assets" / "css" / "tailwind.css", ".p-4{padding:1rem}")
+    assert usage.get_css_classes() == {"p-4"}
@@ -1,6 +1,11 @@
+import os
+import threading
+import time
+from pathlib import Path
+
 import pytest
 
-from django_tailwind_cli import utils
+from django_tailwind_cli import api, utils
 
 
 @pytest.fixture(autouse=True)
@@ -54,20 +59,24 @@ def test_get_system_and_machine(mocker):
     assert system == "windows"
 
     platform_system.return_value = "Darwin"
+    utils.clear_cache()
     [system, _] = utils.get_system_and_machine()
     assert system == "macos"
 
     platform_machine = mocker.patch("platform.machine")
 
     platform_machine.return_value = "x86_64"
+    utils.clear_cache()
     [_, machine] = utils.get_system_and_machine()
     assert machine == "x64"
 
     platform_machine.return_value = "amd64"
+    utils.clear_cache()
     [_, machine] = utils.get_system_and_machine()
     assert machine == "x64"
 
     platform_machine.return_value = "aarch64"
+    utils.clear_cache()
     [_, machine] = utils.get_system_and_machine()
     assert machine == "arm64"
 
@@ -90,6 +99,13 @@ def test_get_download_url(mocker, platform, machine, result):
     assert utils.get_download_url().endswith(result)
 
 
+def test_get_checksums_url():
+    assert (
+        "https://github.com/tailwindlabs/tailwindcss/releases/download/v3.4.11/sha256sums.txt"
+        == utils.get_checksums_url()
+    )
+
+
 @pytest.mark.parametrize(
     "platform,machine,result",
     [
@@ -107,9 +123,31 @@ def test_get_full_cli_path(mocker, platform, machine, result):
 
     platform_system.return_value = platform
     platform_machine.return_value = machine
+    utils.clear_cache()
     assert str(utils.get_full_cli_path()).endswith(result)
 
 
+def test_get_full_cli_path_is_cached(mocker):
+    platform_system = mocker.patch("platform.system", return_value="Linux")
+    cli_path = utils.get_full_cli_path()
+    assert utils.get_full_cli_path() is cli_path
+    assert platform_system.call_count == 1
+
+
+def test_get_full_cli_path_cache_cleared_on_setting_changed(settings):
+    cli_path = utils.get_full_cli_path()
+    settings.TAILWIND_CLI_VERSION = "3.4.13"
+    assert utils.get_full_cli_path() != cli_path
+    assert utils.get_full_cli_path().name.endswith("-3.4.13")
+
+
+def test_get_full_dist_css_path_cache_cleared_on_setting_changed(settings):
+    settings.STATICFILES_DIRS = ["/home/user/project"]
+    assert "/home/user/project/css/tailwind.css" == str(utils.get_full_dist_css_path())
+    settings.TAILWIND_CLI_DIST_CSS = "css/styles.css"
+    assert "/home/user/project/css/styles.css" == str(utils.get_full_dist_css_path())
+
+
 def test_get_full_cli_path_with_existing_executable(tmp_path, settings):
     settings.TAILWIND_CLI_PATH = tmp_path / "tailwindcss.exe"
     settings.TAILWIND_CLI_PATH.touch(mode=0o755, exist_ok=True)
@@ -119,3 +157,307 @@ def test_get_full_cli_path_with_existing_executable(tmp_path, settings):
 def test_get_full_cli_path_with_changed_tailwind_cli_path(settings):
     settings.TAILWIND_CLI_PATH = "/opt/bin"
     assert "/opt/bin/tailwindcss-" in str(utils.get_full_cli_path())
+
+
+def test_get_full_fingerprint_path(settings):
+    settings.STATICFILES_DIRS = ["/home/user/project/assets"]
+    assert "/home/user/project/assets/css/.tailwind.css.fingerprint" == str(
+        utils.get_full_fingerprint_path()
+    )
+
+
+def test_get_build_fingerprint_changes_with_inputs(settings, tmp_path):
+    settings.BASE_DIR = tmp_path
+    settings.TAILWIND_CLI_SRC_CSS = "source.css"
+    utils.get_full_src_css_path().write_text("@tailwind base;")
+    fingerprint = utils.get_build_fingerprint(["tailwindcss"])
+    assert fingerprint == utils.get_build_fingerprint(["tailwindcss"])
+    assert fingerprint != utils.get_build_fingerprint(["tailwindcss", "--minify"])
+
+    utils.get_full_src_css_path().write_text("@tailwind components;")
+    assert fingerprint != utils.get_build_fingerprint(["tailwindcss"])
+
+    settings.TAILWIND_CLI_VERSION = "3.4.0"
+    assert fingerprint != utils.get_build_fingerprint(["tailwindcss"])
+
+
+def test_get_build_fingerprint_changes_with_templates(settings, tmp_path):
+    settings.BASE_DIR = tmp_path
+    settings.TEMPLATES = [{**settings.TEMPLATES[0], "DIRS": [tmp_path / "templates"]}]
+    (tmp_path / "templates").mkdir()
+    template = tmp_path / "templates" / "index.html"
+    template.write_text('<div class="p-4"></div>')
+    fingerprint = utils.get_build_fingerprint(["tailwindcss"])
+
+    template.write_text('<div class="p-8"></div>')
+    assert fingerprint != utils.get_build_fingerprint(["tailwindcss"])
+
+
+def test_get_cache_dir(settings):
+    assert "/home/user/project/.tailwind-cli" == str(utils.get_cache_dir())
+    settings.TAILWIND_CLI_CACHE_DIR = None
+    assert utils.get_cache_dir() is None
+
+
+def test_get_build_cache_dir(settings):
+    assert utils.get_build_cache_dir() is None
+    settings.TAILWIND_CLI_BUILD_CACHE_DIR = ".cache/tailwind"
+    assert "/home/user/project/.cache/tailwind" == str(utils.get_build_cache_dir())
+    settings.TAILWIND_CLI_BUILD_CACHE_DIR = "/var/cache/tailwind"
+    assert "/var/cache/tailwind" == str(utils.get_build_cache_dir())
+
+
+def test_build_cache_roundtrip(settings, tmp_path):
+    settings.TAILWIND_CLI_BUILD_CACHE_DIR = str(tmp_path / "cache")
+    settings.STATICFILES_DIRS = [tmp_path / "assets"]
+    assert not utils.restore_from_build_cache("abc")
+
+    utils.get_full_dist_css_path().parent.mkdir(parents=True)
+    utils.get_full_dist_css_path().write_text("/* abc */")
+    utils.store_in_build_cache("abc")
+    assert (tmp_path / "cache" / "abc.css").read_text() == "/* abc */"
+
+    utils.get_full_dist_css_path().unlink()
+    assert utils.restore_from_build_cache("abc")
+    assert utils.get_full_dist_css_path().read_text() == "/* abc */"
+
+
+def test_build_cache_evicts_least_recently_used(settings, tmp_path):
+    cache_dir = tmp_path / "cache"
+    settings.TAILWIND_CLI_BUILD_CACHE_DIR = str(cache_dir)
+    settings.TAILWIND_CLI_BUILD_CACHE_MAX_SIZE = 25
+    settings.STATICFILES_DIRS = [tmp_path / "assets"]
+    utils.get_full_dist_css_path().parent.mkdir(parents=True)
+
+    for i, fingerprint in enumerate(["old", "used", "new"]):
+        utils.get_full_dist_css_path().write_text("x" * 10)
+        utils.store_in_build_cache(fingerprint)
+        os.utime(cache_dir / f"{fingerprint}.css", (1000 + i, 1000 + i))
+        if fingerprint == "used":
+            os.utime(cache_dir / "old.css", (900, 900))
+
+    assert sorted(p.name for p in cache_dir.glob("*.css")) == ["new.css", "used.css"]
+
+
+def test_get_shared_cache_dir(settings, monkeypatch, tmp_path):
+    assert utils.get_shared_cache_dir() is None
+    settings.TAILWIND_CLI_SHARED_CACHE = True
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path))
+    assert tmp_path / "django-tailwind-cli" == utils.get_shared_cache_dir()
+    monkeypatch.delenv("XDG_CACHE_HOME")
+    assert str(utils.get_shared_cache_dir()).endswith("/.cache/django-tailwind-cli")
+
+
+def test_file_lock_is_exclusive(tmp_path):
+    events = []
+
+    def worker(name):
+        with utils.file_lock(tmp_path / "lock"):
+            events.append(f"{name} start")
+            time.sleep(0.05)
+            events.append(f"{name} end")
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    for i in range(0, len(events), 2):
+        assert events[i].split()[0] == events[i + 1].split()[0]
+
+
+@pytest.fixture
+def template_tree(settings, tmp_path):
+    for path in [
+        "templates/index.html",
+        "templates/partials/nav.html",
+        "templates/emails/welcome.txt",
+        "templates/node_modules/pkg/readme.html",
+        "templates/.hidden/secret.html",
+        "templates/static/app.js",
+        "more_templates/extra.html",
+    ]:
+        (tmp_path / path).parent.mkdir(parents=True, exist_ok=True)
+        (tmp_path / path).write_text("<div></div>")
+    settings.BASE_DIR = tmp_path
+    settings.INSTALLED_APPS = []
+    settings.TEMPLATES = [
+        {
+            "BACKEND": "django.template.backends.django.DjangoTemplates",
+            "DIRS": [tmp_path / "templates"],
+        },
+        {
+            "NAME": "second",
+            "BACKEND": "django.template.backends.django.DjangoTemplates",
+            "DIRS": [tmp_path / "more_templates"],
+        },
+    ]
+    return tmp_path
+
+
+def test_get_template_files(template_tree):
+    assert [
+        str(template_tree / "more_templates/extra.html"),
+        str(template_tree / "templates/emails/welcome.txt"),
+        str(template_tree / "templates/index.html"),
+        str(template_tree / "templates/partials/nav.html"),
+    ] == utils.get_template_files()
+
+
+def test_get_template_files_with_custom_ignore_patterns(template_tree, settings):
+    settings.TAILWIND_CLI_TEMPLATE_IGNORE_PATTERNS = ["partials", "*.txt"]
+    assert (
+        sorted(
+            str(template_tree / p)
+            for p in [
+                "more_templates/extra.html",
+                "templates/index.html",
+                "templates/node_modules/pkg/readme.html",
+                "templates/.hidden/secret.html",
+            ]
+        )
+        == utils.get_template_files()
+    )
+
+
+def test_get_template_dirs_with_explicit_loaders(settings):
+    settings.TEMPLATES = [
+        {
+            "BACKEND": "django.template.backends.django.DjangoTemplates",
+            "DIRS": [],
+            "APP_DIRS": False,
+            "OPTIONS": {
+                "loaders": [
+                    (
+                        "django.template.loaders.cached.Loader",
+                        ["django.template.loaders.app_directories.Loader"],
+                    )
+                ]
+            },
+        }
+    ]
+    assert any(str(d).endswith("django_tailwind_cli/templates") for d in utils.get_template_dirs())
+
+
+def test_get_template_dirs_without_app_dirs(settings):
+    settings.TEMPLATES = [
+        {"BACKEND": "django.template.backends.django.DjangoTemplates", "DIRS": ["/srv/templates"]}
+    ]
+    assert [Path("/srv/templates")] == utils.get_template_dirs()
+
+
+def test_get_full_generated_config_file_path():
+    assert "/home/user/project/.tailwind.config.django.js" == str(
+        utils.get_full_generated_config_file_path()
+    )
+
+
+def test_get_content_globs(template_tree, settings):
+    settings.TAILWIND_CLI_TEMPLATE_IGNORE_PATTERNS = ["node_modules"]
+    settings.TAILWIND_CLI_EXTRA_CONTENT = ["app/**/*.py", "!app/migrations/**", "/srv/js/*.js"]
+    assert [
+        f"{template_tree}/templates/**/*.{{html,txt}}",
+        f"!{template_tree}/templates/**/node_modules/**",
+        f"{template_tree}/more_templates/**/*.{{html,txt}}",
+        f"!{template_tree}/more_templates/**/node_modules/**",
+        f"{template_tree}/app/**/*.py",
+        f"!{template_tree}/app/migrations/**",
+        "/srv/js/*.js",
+    ] == utils.get_content_globs()
+
+
+def test_get_content_globs_with_extract_classes(template_tree, settings):
+    settings.TAILWIND_CLI_EXTRACT_CLASSES = True
+    settings.TAILWIND_CLI_EXTRA_CONTENT = ["app/**/*.py"]
+    assert [
+        f"{template_tree}/.tailwind-cli/candidates.txt",
+        f"{template_tree}/app/**/*.py",
+    ] == utils.get_content_globs()
+
+
+def test_get_extra_content_files(settings, tmp_path):
+    settings.BASE_DIR = tmp_path
+    settings.TAILWIND_CLI_EXTRA_CONTENT = ["app/**/*.{py,js}", "!app/migrations/**"]
+    for name in ["app/views.py", "app/js/main.js", "app/migrations/0001_initial.py", "app/a.txt"]:
+        (tmp_path / name).parent.mkdir(parents=True, exist_ok=True)
+        (tmp_path / name).write_text("")
+    assert utils.get_extra_content_files() == [
+        tmp_path / "app" / "js" / "main.js",
+        tmp_path / "app" / "views.py",
+    ]
+
+
+def test_write_generated_config_file(template_tree, settings):
+    settings.TAILWIND_CLI_TEMPLATE_IGNORE_PATTERNS = []
+    generated_config_file = utils.write_generated_config_file()
+    config = generated_config_file.read_text()
+    assert f'require("{template_tree}/tailwind.config.js")' in config
+    assert f'"{template_tree}/templates/**/*.{{html,txt}}"' in config
+
+    os.utime(generated_config_file, (1000, 1000))
+    utils.write_generated_config_file()
+    assert generated_config_file.stat().st_mtime == 1000
+
+
+def test_get_entries_default(settings):
+    settings.TAILWIND_CLI_SRC_CSS = "css/source.css"
+    assert utils.get_entries() == (
+        utils.Entry("default", "css/source.css", "css/tailwind.css", "tailwind.config.js"),
+    )
+
+
+def test_get_entries(settings):
+    settings.TAILWIND_CLI_ENTRIES = [
+        {"name": "site", "src_css": "css/site.src.css", "dist_css": "css/site.css"},
+        {"name": "emails", "dist_css": "css/emails.css", "config_file": "tailwind.emails.js"},
+    ]
+    assert utils.get_entries() == (
+        utils.Entry("site", "css/site.src.css", "css/site.css", "tailwind.config.js"),
+        utils.Entry("emails", None, "css/emails.css", "tailwind.emails.js"),
+    )
+    assert utils.get_entry() == utils.get_entries()[0]
+    assert utils.get_entry("emails") == utils.get_entries()[1]
+
+
+def test_get_entries_with_duplicate_name(settings):
+    settings.TAILWIND_CLI_ENTRIES = [
+        {"name": "site", "dist_css": "css/site.css"},
+        {"name": "site", "dist_css": "css/other.css"},
+    ]
+    with pytest.raises(ValueError, match="Duplicate entry 'site'"):
+        utils.get_entries()
+
+
+def test_get_entries_without_dist_css(settings):
+    settings.TAILWIND_CLI_ENTRIES = [{"name": "site"}]
+    with pytest.raises(ValueError, match="needs a 'name' and a 'dist_css'"):
+        utils.validate_settings()
+
+
+def test_get_entry_unknown():
+    with pytest.raises(ValueError, match="Unknown entry 'admin'"):
+        utils.get_entry("admin")
+
+
+def test_paths_of_entry(settings):
+    settings.STATICFILES_DIRS = ["/home/user/project/assets"]
+    entry = utils.Entry("emails", "css/emails.src.css", "css/emails.css", "tailwind.emails.js")
+    assert "/home/user/project/css/emails.src.css" == str(utils.get_full_src_css_path(entry))
+    assert "/home/user/project/assets/css/emails.css" == str(utils.get_full_dist_css_path(entry))
+    assert "/home/user/project/tailwind.emails.js" == str(utils.get_full_config_file_path(entry))
+    assert ".emails.css.fingerprint" == utils.get_full_fingerprint_path(entry).name
+
+
+def test_get_build_fingerprint_is_independent_of_checkout_path(settings, tmp_path):
+    fingerprints = []
+    for checkout in ["a", "b"]:
+        base_dir = tmp_path / checkout
+        (base_dir / "templates").mkdir(parents=True)
+        (base_dir / "templates" / "index.html").write_text('<div class="p-4"></div>')
+        (base_dir / "tailwind.config.js").write_text("module.exports = {}")
+        settings.BASE_DIR = base_dir
+        settings.TEMPLATES = [{**settings.TEMPLATES[0], "DIRS": [base_dir / "templates"]}]
+        build_cmd = api.get_cli_cmd(utils.get_entry(), "--minify")
+        fingerprints.append(utils.get_build_fingerprint(build_cmd))
+    assert fingerprints[0] == fingerprints[1]
@@ -0,0 +1,145 @@
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+from django_tailwind_cli import watcher
+
+
+@pytest.fixture
+def template_dir(settings, tmp_path):
+    settings.BASE_DIR = tmp_path
+    settings.TEMPLATES = [
+        {
+            "BACKEND": "django.template.backends.django.DjangoTemplates",
+            "DIRS": [tmp_path / "templates"],
+        }
+    ]
+    template_dir = tmp_path / "templates"
+    (template_dir / "blog").mkdir(parents=True)
+    return template_dir
+
+
+WATCHERS = [
+    pytest.param(lambda roots: watcher.PollingWatcher(roots, poll_interval=0.01), id="polling"),
+    pytest.param(
+        lambda roots: watcher.InotifyWatcher(roots, watcher._load_libc()),
+        id="inotify",
+        marks=pytest.mark.skipif(watcher._load_libc() is None, reason="Requires inotify."),
+    ),
+]
+
+
+def test_get_watch_roots(template_dir, settings, tmp_path):
+    settings.TAILWIND_CLI_SRC_CSS = "src/styles.css"
+    settings.TAILWIND_CLI_EXTRA_CONTENT = ["app/**/*.py", "!app/migrations/**", "static/main.js"]
+    roots = watcher.get_watch_roots()
+    assert watcher.WatchRoot(template_dir, ("*.html", "*.txt")) in roots
+    assert watcher.WatchRoot(tmp_path, ("tailwind.config.js",), False) in roots
+    assert watcher.WatchRoot(tmp_path / "src", ("styles.css",), False) in roots
+    assert watcher.WatchRoot(tmp_path / "app", ("*.py",), True) in roots
+    assert watcher.WatchRoot(tmp_path / "static", ("main.js",), False) in roots
+    assert len(roots) == 5
+
+
+def test_is_relevant(template_dir, tmp_path):
+    file_watcher = watcher.PollingWatcher(watcher.get_watch_roots())
+    assert file_watcher.is_relevant(str(template_dir / "blog" / "post.html"))
+    assert file_watcher.is_relevant(str(tmp_path / "tailwind.config.js"))
+    assert not file_watcher.is_relevant(str(template_dir / "blog" / "post.html.swp"))
+    assert not file_watcher.is_relevant(str(template_dir / "node_modules" / "x" / "a.html"))
+    assert not file_watcher.is_relevant(str(tmp_path / "manage.py"))
+    assert not file_watcher.is_relevant(str(tmp_path / "other" / "tailwind.config.js"))
+
+
+@pytest.mark.parametrize("create_watcher", WATCHERS)
+def test_wait_reports_changed_templates(template_dir, create_watcher):
+    with create_watcher(watcher.get_watch_roots()) as file_watcher:
+        assert file_watcher.wait(0.05) == set()
+        (template_dir / "blog" / "post.html").write_text("<p></p>")
+        (template_dir / "blog" / "notes.md").write_text("# Notes")
+        assert file_watcher.wait(5) == {str(template_dir / "blog" / "post.html")}
+
+
+@pytest.mark.parametrize("create_watcher", WATCHERS)
+def test_wait_watches_new_directories(template_dir, create_watcher):
+    with create_watcher(watcher.get_watch_roots()) as file_watcher:
+        (template_dir / "shop").mkdir()
+        (template_dir / "shop" / "cart.html").write_text("<p></p>")
+        changes: set[str] = set()
+        deadline = time.monotonic() + 5
+        while str(template_dir / "shop" / "cart.html") not in changes:
+            assert time.monotonic() < deadline
+            changes |= file_watcher.wait(0.1)
+        (template_dir / "shop" / "order.html").write_text("<p></p>")
+        assert str(template_dir / "shop" / "order.html") in file_watcher.wait(5)
+
+
+@pytest.mark.parametrize("create_watcher", WATCHERS)
+def test_iter_bursts_coalesces_changes(template_dir, create_watcher):
+    with create_watcher(watcher.get_watch_roots()) as file_watcher:
+        stop = threading.Event()
+
+        def checkout():
+            for i in range(200):
+                (template_dir / "blog" / f"{i}.html").write_text("<p></p>")
+                if i % 50 == 0:
+                    time.sleep(0.02)
+
+        thread = threading.Thread(target=checkout)
+        thread.start()
+        bursts = watcher.iter_bursts(file_watcher, 0.3, stop)
+        changes = next(bursts)
+        thread.join()
+        assert len(changes) == 200
+        stop.set()
+        assert list(bursts) == []
+
+
+@pytest.mark.parametrize("create_watcher", WATCHERS)
+def test_iter_bursts_ignores_other_files_within_a_burst(template_dir, create_watcher):
+    with create_watcher(watcher.get_watch_roots()) as file_watcher:
+        stop = threading.Event()
+
+        def edit():
+            (template_dir / "index.html").write_text("<p></p>")
+            for i in range(3):
+                time.sleep(0.05)
+                (template_dir / f".index.html.swp{i}").write_text("")
+            (template_dir / "base.html").write_text("<p></p>")
+
+        thread = threading.Thread(target=edit)
+        thread.start()
+        bursts = watcher.iter_bursts(file_watcher, 0.3, stop)
+        changes = next(bursts)
+        thread.join()
+        stop.set()
+        assert changes == {str(template_dir / "index.html"), str(template_dir / "base.html")}
+        assert list(bursts) == []
+
+
+def test_iter_bursts_ends_long_bursts(mocker):
+    file_watcher = mocker.Mock()
+    file_watcher.wait.side_effect = lambda timeout: {f"{time.monotonic()}.html"}  # noqa: ARG005
+    mocker.patch.object(watcher, "MAX_BURST_WINDOWS", 3)
+    started = time.monotonic()
+    changes = next(watcher.iter_bursts(file_watcher, 0.01))
+    assert len(changes) > 1
+    assert time.monotonic() - started < 1
+
+
+def test_file_watcher_requires_wait():
+    with pytest.raises(TypeError):
+        watcher.FileWatcher([])
+
+
+def test_create_watcher_falls_back_to_polling(template_dir, mocker):
+    mocker.patch.object(watcher, "_load_libc", return_value=None)
+    assert isinstance(watcher.create_watcher([]), watcher.PollingWatcher)
+
+
+def test_split_glob(settings, tmp_path):
+    settings.BASE_DIR = tmp_path
+    root = watcher._split_glob("/srv/js/*.js")
+    assert root == watcher.WatchRoot(Path("/srv/js"), ("*.js",), False)